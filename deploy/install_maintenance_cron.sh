@@ -0,0 +1,55 @@
+#!/usr/bin/env bash
+# Install/refresh cron entries for periodic Django maintenance commands.
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
+LOG_DIR="${MAINTENANCE_LOG_DIR:-$PROJECT_DIR/logs}"
+DB_SERVICE="${DB_SERVICE:-web}"
+TARGET="${MAINTENANCE_CRON_TARGET:-auto}" # auto|user|root
+
+# schedule|management command
+JOBS=(
+    "* * * * *|flush_view_counts"
+    "* * * * *|flush_activity_log"
+    "5 * * * *|rollup_daily_stats"
+    "30 3 * * *|clean_expired_exports"
+    "45 3 * * *|archive_activity_log"
+)
+
+mkdir -p "$LOG_DIR"
+
+if [[ "$TARGET" == "auto" ]]; then
+    if docker compose ps >/dev/null 2>&1; then
+        TARGET="user"
+    else
+        TARGET="root"
+    fi
+fi
+
+if [[ "$TARGET" == "root" ]]; then
+    CURRENT_CRONTAB="$(sudo crontab -l 2>/dev/null || true)"
+else
+    CURRENT_CRONTAB="$(crontab -l 2>/dev/null || true)"
+fi
+
+NEW_CRONTAB="$(printf '%s\n' "$CURRENT_CRONTAB" | sed '/# fikrly-maintenance$/d')"
+for job in "${JOBS[@]}"; do
+    schedule="${job%%|*}"
+    command="${job#*|}"
+    entry="$schedule cd $PROJECT_DIR && docker compose exec -T $DB_SERVICE python manage.py $command >> $LOG_DIR/$command.log 2>&1 # fikrly-maintenance"
+    NEW_CRONTAB="$(printf '%s\n%s\n' "$NEW_CRONTAB" "$entry")"
+done
+NEW_CRONTAB="$(printf '%s\n' "$NEW_CRONTAB" | awk 'NF')"
+
+if [[ "$TARGET" == "root" ]]; then
+    printf '%s\n' "$NEW_CRONTAB" | sudo crontab -
+else
+    printf '%s\n' "$NEW_CRONTAB" | crontab -
+fi
+
+echo "✅ Maintenance cron installed ($TARGET crontab)"
+for job in "${JOBS[@]}"; do
+    echo "   ${job%%|*}  ${job#*|}"
+done
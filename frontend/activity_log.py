@@ -0,0 +1,363 @@
+"""
+Buffered, append-only activity log.
+
+Views and signals record ``ActivityLog`` rows with :func:`log_activity`
+instead of ``ActivityLog.objects.create``. The entry is stamped when the
+action happens and queued once the surrounding transaction commits (a
+rolled-back approval logs nothing):
+
+- Redis: entries are pushed onto a list; ``flush_activity_log`` (cron,
+  every minute) drains it with multi-row INSERTs of
+  ``ACTIVITY_FLUSH_BATCH`` rows.
+- Without Redis (development, tests) the row is inserted on commit as
+  before. Unlike view counts, an in-process buffer would lose audit rows
+  whenever a worker is killed.
+
+Storage (PostgreSQL): the table is range-partitioned by month on
+``created_at`` (migration 0062), one ``frontend_activitylog_pYYYY_MM``
+partition per UTC month plus a default partition as a safety net.
+``archive_activity_log`` (daily) creates the coming months' partitions and
+moves months older than ``ACTIVITY_LOG_RETENTION_MONTHS`` to gzip JSON-lines
+files in ``ACTIVITY_LOG_ARCHIVE_DIR``, dropping the partition afterwards.
+Other databases get the same files, with the rows deleted instead.
+
+Only months already folded into the daily rollups are archived: contact
+reveals are counted from this table (see ``frontend.rollups``).
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_BUFFER_KEY = "activitybuf"
+ACTIVITY_FLUSHING_KEY = "activitybuf:flushing"
+ACTIVITY_FLUSH_LOCK = "activitybuf:lock"
+ACTIVITY_FLUSH_BATCH = 1000  # rows per INSERT / per drained chunk
+ACTIVITY_PARTITIONS_AHEAD = 2  # future monthly partitions kept in place
+
+ARCHIVE_FIELDS = ("id", "created_at", "action", "actor_id", "company_id", "review_id", "details")
+_PARTITION_RE = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def _redis():
+    """Raw Redis client behind the default cache, or None (LocMem, tests)."""
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+    except Exception:
+        return None
+
+
+def _redis_key(name: str) -> str:
+    return cache.make_key(name)
+
+
+def _pk(obj):
+    return None if obj is None else getattr(obj, "pk", obj)
+
+
+def log_activity(action, actor=None, company=None, review=None, details="") -> None:
+    """Record an ``ActivityLog`` row once the current transaction commits.
+
+    ``actor``, ``company`` and ``review`` may be instances or primary keys.
+    """
+    entry = {
+        "action": action,
+        "actor_id": _pk(actor),
+        "company_id": _pk(company),
+        "review_id": _pk(review),
+        "details": details or "",
+        "created_at": timezone.now().isoformat(),
+    }
+    transaction.on_commit(lambda: _enqueue(entry))
+
+
+def _enqueue(entry) -> None:
+    conn = _redis()
+    if conn is not None:
+        try:
+            conn.rpush(_redis_key(ACTIVITY_BUFFER_KEY), json.dumps(entry))
+            return
+        except Exception:
+            logger.warning("Redis activity buffer unavailable; writing directly")
+    try:
+        write_activity_entries([entry], check_targets=False)
+    except Exception:
+        logger.exception("Failed to write activity log entry")
+
+
+def write_activity_entries(entries, check_targets=True) -> int:
+    """Insert queued entries in batches; returns rows written.
+
+    With ``check_targets``, users, companies and reviews deleted since the
+    action are written as NULL, as ``on_delete=SET_NULL`` would have done.
+    """
+    from django.contrib.auth import get_user_model
+
+    from .models import ActivityLog, Company, Review
+
+    if not entries:
+        return 0
+    existing = {}
+    if check_targets:
+        for field, model in (
+            ("actor_id", get_user_model()),
+            ("company_id", Company),
+            ("review_id", Review),
+        ):
+            ids = {e[field] for e in entries if e.get(field)}
+            existing[field] = (
+                set(model.objects.filter(pk__in=ids).values_list("pk", flat=True)) if ids else set()
+            )
+
+    def target(entry, field):
+        value = entry.get(field)
+        if value and check_targets and value not in existing[field]:
+            return None
+        return value
+
+    rows = [
+        ActivityLog(
+            action=entry["action"],
+            actor_id=target(entry, "actor_id"),
+            company_id=target(entry, "company_id"),
+            review_id=target(entry, "review_id"),
+            details=entry.get("details", ""),
+            created_at=parse_datetime(entry["created_at"]) or timezone.now(),
+        )
+        for entry in entries
+    ]
+    ActivityLog.objects.bulk_create(rows, batch_size=ACTIVITY_FLUSH_BATCH)
+    return len(rows)
+
+
+def flush_activity_log() -> int:
+    """Drain the Redis buffer into ``ActivityLog``; returns rows written.
+
+    The live list is renamed aside first, so entries logged during the flush
+    land in a fresh list, and is consumed one committed batch at a time. A
+    leftover ``flushing`` list from a crashed run is written before anything
+    new; a crash between a commit and the trim repeats at most one batch.
+    """
+    conn = _redis()
+    if conn is None:
+        return 0
+    if not cache.add(ACTIVITY_FLUSH_LOCK, 1, 300):
+        logger.info("Another activity log flush is running")
+        return 0
+    live, flushing = _redis_key(ACTIVITY_BUFFER_KEY), _redis_key(ACTIVITY_FLUSHING_KEY)
+    written = 0
+    try:
+        if not conn.exists(flushing) and conn.exists(live):
+            conn.renamenx(live, flushing)
+        while True:
+            raw = conn.lrange(flushing, 0, ACTIVITY_FLUSH_BATCH - 1)
+            if not raw:
+                return written
+            with transaction.atomic():
+                written += write_activity_entries([json.loads(item) for item in raw])
+            conn.ltrim(flushing, len(raw), -1)
+    finally:
+        cache.delete(ACTIVITY_FLUSH_LOCK)
+
+
+# --- Partitions and archival ------------------------------------------------
+
+
+def month_start(value) -> datetime:
+    """First instant (UTC) of the month containing aware datetime ``value``."""
+    value = value.astimezone(dt_timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    from .models import ActivityLog
+
+    return f"{ActivityLog._meta.db_table}_p{month:%Y_%m}"
+
+
+def is_partitioned() -> bool:
+    from .models import ActivityLog
+
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            [ActivityLog._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def monthly_partitions() -> dict:
+    """``{month: partition table}`` of the monthly partitions (PostgreSQL)."""
+    from .models import ActivityLog
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [ActivityLog._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = _PARTITION_RE.search(name)
+        if match:
+            month = datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)
+            partitions[month] = name
+    return partitions
+
+
+def ensure_partitions(months_ahead=ACTIVITY_PARTITIONS_AHEAD, now=None) -> list:
+    """Create the partitions of this month and the next ``months_ahead``.
+
+    Returns the names created; a no-op unless the table is partitioned.
+    """
+    from .models import ActivityLog
+
+    if not is_partitioned():
+        return []
+    existing = monthly_partitions()
+    current = month_start(now or timezone.now())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {connection.ops.quote_name(name)} PARTITION OF "
+                f"{connection.ops.quote_name(ActivityLog._meta.db_table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+        created.append(name)
+    return created
+
+
+def archive_cutoff(keep_months, now=None):
+    """Start of the oldest month kept in the database.
+
+    That is ``keep_months`` before the current month, but never later than
+    the first month not fully folded into the daily rollups; ``None`` while
+    nothing has been folded yet.
+    """
+    from .rollups import day_start, rollup_watermark
+
+    watermark = rollup_watermark()
+    if watermark is None:
+        return None
+    cutoff = add_months(month_start(now or timezone.now()), -max(keep_months, 0))
+    # The first month not fully folded stays
+    folded_until = month_start(day_start(watermark + timedelta(days=1)))
+    return min(cutoff, folded_until)
+
+
+def _months_before(cutoff) -> list:
+    from django.db.models.functions import TruncMonth
+
+    from .models import ActivityLog
+
+    months = set(
+        month_start(value)
+        for value in ActivityLog.objects.filter(created_at__lt=cutoff)
+        .annotate(month=TruncMonth("created_at", tzinfo=dt_timezone.utc))
+        .values_list("month", flat=True)
+        .distinct()
+        .order_by()
+    )
+    if is_partitioned():
+        months.update(month for month in monthly_partitions() if month < cutoff)
+    return sorted(months)
+
+
+def _write_archive(rows, path: Path) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".part")
+    count = 0
+    with gzip.open(partial, "wt", encoding="utf-8") as fh:
+        for row in rows:
+            fh.write(json.dumps(dict(zip(ARCHIVE_FIELDS, row)), cls=DjangoJSONEncoder))
+            fh.write("\n")
+            count += 1
+    os.replace(partial, path)
+    return count
+
+
+def archive_month(month, dest) -> tuple:
+    """Write one month to ``dest/activity_log_YYYY-MM.jsonl.gz`` and remove it.
+
+    Returns ``(path, rows)``; ``path`` is ``None`` for an empty month.
+    """
+    from .models import ActivityLog
+
+    end = add_months(month, 1)
+    rows = (
+        ActivityLog.objects.filter(created_at__gte=month, created_at__lt=end)
+        .order_by("id")
+        .values_list(*ARCHIVE_FIELDS)
+        .iterator(chunk_size=ACTIVITY_FLUSH_BATCH)
+    )
+    path = Path(dest) / f"activity_log_{month:%Y-%m}.jsonl.gz"
+    # Re-running after a failure rewrites the file from the rows still present
+    count = _write_archive(rows, path)
+    if not count:
+        os.remove(path)
+        path = None
+
+    partition = monthly_partitions().get(month) if is_partitioned() else None
+    with transaction.atomic():
+        if partition:
+            table = connection.ops.quote_name(ActivityLog._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"ALTER TABLE {table} DETACH PARTITION {connection.ops.quote_name(partition)}"
+                )
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(partition)}")
+        # Rows outside the monthly partitions (default partition, other databases)
+        ActivityLog.objects.filter(created_at__gte=month, created_at__lt=end).delete()
+    return path, count
+
+
+def archive_activity_log(keep_months=None, dest=None, dry_run=False, now=None) -> list:
+    """Archive every month older than ``keep_months``; returns ``[(month, path, rows)]``."""
+    if keep_months is None:
+        keep_months = settings.ACTIVITY_LOG_RETENTION_MONTHS
+    dest = dest or settings.ACTIVITY_LOG_ARCHIVE_DIR
+    cutoff = archive_cutoff(keep_months, now=now)
+    if cutoff is None:
+        logger.warning("Daily rollups have not run yet; not archiving activity log")
+        return []
+    from .models import ActivityLog
+
+    done = []
+    for month in _months_before(cutoff):
+        if dry_run:
+            rows = ActivityLog.objects.filter(created_at__gte=month, created_at__lt=add_months(month, 1))
+            done.append((month, None, rows.count()))
+            continue
+        path, count = archive_month(month, dest)
+        done.append((month, path, count))
+    return done
@@ -22,25 +22,23 @@ from .models import (
     ReviewImage,
     ReviewFlag,
     DataExport,
+    OutboundMessage,
+    ImageAsset,
+)
+from .cache_utils import (
+    CATEGORIES_TAG,
+    COMPANY_DIRECTORY_TAG,
+    COMPANY_LIST_TAG,
+    clear_public_cache,
+    invalidate_tags,
 )
-from .cache_utils import clear_public_cache
 from pathlib import Path
 
 
 @admin.action(description="Clear public cache (emergency refresh)")
 def clear_public_cache_action(modeladmin, request, queryset):
-    deleted = clear_public_cache()
-    if deleted == -1:
-        modeladmin.message_user(
-            request,
-            "Public cache tozalandi (backend fallback orqali).",
-            level="warning",
-        )
-    else:
-        modeladmin.message_user(
-            request,
-            f"Public cache tozalandi. O'chirilgan keylar: {deleted}",
-        )
+    clear_public_cache()
+    modeladmin.message_user(request, "Public cache tozalandi.")
 
 
 class CompanyActivityLogInline(admin.TabularInline):
@@ -166,10 +164,7 @@ class BusinessCategoryAdmin(admin.ModelAdmin):
     actions = ["toggle_visibility", clear_public_cache_action]
 
     def _bust_category_caches(self):
-        from django.core.cache import cache
-        for lang in ("uz", "ru", "en"):
-            cache.delete(f"business_list:filters:{lang}")
-        clear_public_cache()
+        invalidate_tags(CATEGORIES_TAG, COMPANY_DIRECTORY_TAG, COMPANY_LIST_TAG)
 
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
@@ -387,41 +382,9 @@ class CompanyAdmin(admin.ModelAdmin):
 
     def export_to_csv(self, request, queryset):
         """Bulk action to export companies to CSV"""
-        import csv
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="companies.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(
-            [
-                "ID",
-                "Name",
-                "Category",
-                "City",
-                "Rating",
-                "Reviews",
-                "Verified",
-                "Active",
-            ]
-        )
+        from .exports import COMPANY_EXPORT_COLUMNS, csv_response
 
-        for company in queryset:
-            writer.writerow(
-                [
-                    company.id,
-                    company.name,
-                    company.category_fk.name if company.category_fk else "",
-                    company.city,
-                    company.rating or 0,
-                    company.review_count or 0,
-                    "Ha" if company.is_verified else "Yo'q",
-                    "Faol" if company.is_active else "Nofaol",
-                ]
-            )
-
-        return response
+        return csv_response(queryset, COMPANY_EXPORT_COLUMNS, "companies.csv")
 
     export_to_csv.short_description = "Tanlangan bizneslarni CSV ga export qilish"
 
@@ -502,7 +465,7 @@ class ReviewAdmin(admin.ModelAdmin):
     def toggle_verified_purchase(self, request, queryset):
         for review in queryset:
             review.verified_purchase = not review.verified_purchase
-            review.save(update_fields=["verified_purchase"])
+            review.save(update_fields=["verified_purchase", "updated_at"])
         self.message_user(
             request, f"{queryset.count()} ta sharh xarid tasdiqlanishi o'zgartirildi."
         )
@@ -510,78 +473,27 @@ class ReviewAdmin(admin.ModelAdmin):
     toggle_verified_purchase.short_description = "Xaridni tasdiqlash/bekor qilish"
 
     def approve_reviews(self, request, queryset):
-        # Get affected company IDs before update
-        company_ids = list(queryset.values_list("company_id", flat=True).distinct())
-        updated = queryset.update(is_approved=True)
-
-        # Recalculate stats for affected companies
-        from .utils import recalculate_company_stats
-
-        for cid in company_ids:
-            recalculate_company_stats(cid)
+        from .utils import set_reviews_approval
 
+        updated = set_reviews_approval(queryset, approved=True)
         self.message_user(request, f"{updated} ta sharh tasdiqlandi.")
 
     approve_reviews.short_description = "Tanlangan sharhlarni tasdiqlash"
 
     def bulk_reject_reviews(self, request, queryset):
         """Bulk reject/unapprove reviews"""
-        company_ids = list(queryset.values_list("company_id", flat=True).distinct())
-        updated = queryset.update(is_approved=False)
-
-        # Recalculate stats
-        from .models import Company
-        from django.db.models import Avg, Count
-
-        for company_id in company_ids:
-            company = Company.objects.get(pk=company_id)
-            approved_reviews = Review.objects.filter(company=company, is_approved=True)
-            company.rating = approved_reviews.aggregate(Avg("rating"))["rating__avg"]
-            company.review_count = approved_reviews.count()
-            company.save(update_fields=["rating", "review_count"])
+        from .utils import set_reviews_approval
 
+        updated = set_reviews_approval(queryset, approved=False)
         self.message_user(request, f"{updated} sharh rad etildi (is_approved=False).")
 
     bulk_reject_reviews.short_description = "Tanlangan sharhlarni rad etish"
 
     def export_reviews_csv(self, request, queryset):
         """Export reviews to CSV"""
-        import csv
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="reviews.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(
-            [
-                "ID",
-                "Company",
-                "User",
-                "Rating",
-                "Text",
-                "Approved",
-                "Verified Purchase",
-                "Created",
-            ]
-        )
-
-        for review in queryset:
-            writer.writerow(
-                [
-                    review.id,
-                    review.company.name,
-                    review.user_name
-                    or (review.author.username if review.author else ""),
-                    review.rating,
-                    review.text[:100],  # Truncate long text
-                    "Ha" if review.is_approved else "Yo'q",
-                    "Ha" if review.verified_purchase else "Yo'q",
-                    review.created_at.strftime("%Y-%m-%d %H:%M"),
-                ]
-            )
+        from .exports import ADMIN_REVIEW_EXPORT_COLUMNS, csv_response
 
-        return response
+        return csv_response(queryset, ADMIN_REVIEW_EXPORT_COLUMNS, "reviews.csv")
 
     export_reviews_csv.short_description = "Tanlangan sharhlarni CSV ga export qilish"
 
@@ -684,31 +596,9 @@ class ActivityLogAdmin(admin.ModelAdmin):
     short_details.short_description = "Details"
 
     def export_csv(self, request, queryset):
-        import csv
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = "attachment; filename=activity_logs.csv"
-        writer = csv.writer(response)
-        writer.writerow(
-            ["created_at", "action", "actor", "company", "review", "details"]
-        )
-        for obj in queryset.select_related("actor", "company", "review"):
-            writer.writerow(
-                [
-                    obj.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    (
-                        obj.get_action_display()
-                        if hasattr(obj, "get_action_display")
-                        else obj.action
-                    ),
-                    getattr(obj.actor, "username", ""),
-                    getattr(obj.company, "name", "") if obj.company_id else "",
-                    f"#{obj.review_id}" if obj.review_id else "",
-                    (obj.details or "").replace("\n", " ").replace("\r", " "),
-                ]
-            )
-        return response
+        from .exports import ACTIVITY_LOG_EXPORT_COLUMNS, csv_response
+
+        return csv_response(queryset, ACTIVITY_LOG_EXPORT_COLUMNS, "activity_logs.csv")
 
     export_csv.short_description = "Export selected logs to CSV"
 
@@ -1039,6 +929,41 @@ class DataExportAdmin(admin.ModelAdmin):
     delete_expired_exports.short_description = "Muddati o'tgan exportlarni o'chirish"
 
 
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "channel", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("channel", "status", "created_at")
+    readonly_fields = ("created_at", "sent_at", "last_error")
+    actions = ["retry_now"]
+
+    def retry_now(self, request, queryset):
+        """Bulk action: Make selected messages due again"""
+        from django.utils import timezone
+
+        count = queryset.exclude(status="sent").update(
+            status="pending", attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{count} ta xabar qayta navbatga qo'yildi")
+
+    retry_now.short_description = "Qayta yuborish"
+
+
+@admin.register(ImageAsset)
+class ImageAssetAdmin(admin.ModelAdmin):
+    list_display = ("id", "source", "profile", "status", "width", "height", "attempts", "updated_at")
+    list_filter = ("profile", "status")
+    search_fields = ("source", "content_hash")
+    readonly_fields = ("content_hash", "width", "height", "error", "created_at", "updated_at")
+    actions = ["requeue"]
+
+    def requeue(self, request, queryset):
+        """Bulk action: Queue for processing again (only missing variants are encoded)"""
+        count = queryset.update(status="pending", attempts=0, error="")
+        self.message_user(request, f"{count} ta rasm qayta navbatga qo'yildi")
+
+    requeue.short_description = "Qayta navbatga qo'yish"
+
+
 # Override admin index with custom dashboard
 from .admin_dashboard import admin_dashboard
 
@@ -3,11 +3,13 @@ Custom admin dashboard with statistics and quick actions.
 """
 
 from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
 from django.shortcuts import render
 from django.db.models import Count, Avg, Q
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from datetime import timedelta
+from frontend.analytics import platform_series
 from frontend.models import (
     Company,
     Review,
@@ -20,40 +22,64 @@ from frontend.models import (
 
 User = get_user_model()
 
+SITE_STATS_CACHE_KEY = "admin:site_stats"
+SITE_STATS_TIMEOUT = 60  # seconds; saves invalidate it sooner (see signals.py)
+SITE_STATS_ACTIVE_DAYS = 7
 
-@staff_member_required
-def admin_dashboard(request):
-    """Custom admin index with statistics."""
 
-    # Date ranges
-    now = timezone.now()
-    last_7_days = now - timedelta(days=7)
-    last_30_days = now - timedelta(days=30)
+def site_stats() -> dict:
+    """
+    Site-wide counts for the admin index and its ``admin_stats`` tags.
 
-    # User statistics
-    total_users = User.objects.count()
-    active_users_7d = User.objects.filter(last_login__gte=last_7_days).count()
-    new_users_30d = User.objects.filter(date_joined__gte=last_30_days).count()
+    One conditional-aggregate query per table, cached for
+    ``SITE_STATS_TIMEOUT`` seconds and dropped after any User, UserProfile,
+    Company or Review save or delete commits.
+    """
+    stats = cache.get(SITE_STATS_CACHE_KEY)
+    if stats is not None:
+        return stats
+
+    now = timezone.now()
+    users = User.objects.aggregate(
+        total=Count("id"),
+        active_7d=Count("id", filter=Q(last_login__gte=now - timedelta(days=SITE_STATS_ACTIVE_DAYS))),
+        new_30d=Count("id", filter=Q(date_joined__gte=now - timedelta(days=30))),
+    )
     # Note: UserProfile does not have `email_verified` field; use admin approval flag instead
-    verified_users = UserProfile.objects.filter(is_approved=True).count()
-
-    # Company statistics
-    total_companies = Company.objects.count()
-    active_companies = Company.objects.filter(is_active=True).count()
-    verified_companies = Company.objects.filter(is_verified=True).count()
-    pending_verifications = Company.objects.filter(
-        verification_requested_at__isnull=False, is_verified=False
-    ).count()
-
-    # Review statistics
-    total_reviews = Review.objects.count()
-    approved_reviews = Review.objects.filter(is_approved=True).count()
-    pending_reviews = Review.objects.filter(is_approved=False).count()
-    verified_purchase_reviews = Review.objects.filter(verified_purchase=True).count()
-    avg_rating = (
-        Review.objects.filter(is_approved=True).aggregate(Avg("rating"))["rating__avg"]
-        or 0
+    users["verified"] = UserProfile.objects.filter(is_approved=True).count()
+    companies = Company.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(is_active=True)),
+        verified=Count("id", filter=Q(is_verified=True)),
+        pending_verifications=Count(
+            "id", filter=Q(verification_requested_at__isnull=False, is_verified=False)
+        ),
+    )
+    reviews = Review.objects.aggregate(
+        total=Count("id"),
+        approved=Count("id", filter=Q(is_approved=True)),
+        verified_purchase=Count("id", filter=Q(verified_purchase=True)),
+        avg_rating=Avg("rating", filter=Q(is_approved=True)),
     )
+    reviews["pending"] = reviews["total"] - reviews["approved"]
+    stats = {"users": users, "companies": companies, "reviews": reviews}
+    cache.set(SITE_STATS_CACHE_KEY, stats, SITE_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_site_stats() -> None:
+    cache.delete(SITE_STATS_CACHE_KEY)
+
+
+@staff_member_required
+def admin_dashboard(request):
+    """Custom admin index with statistics."""
+
+    stats = site_stats()
+    user_stats = stats["users"]
+    company_stats = stats["companies"]
+    review_stats = stats["reviews"]
+    avg_rating = review_stats["avg_rating"] or 0
 
     # Recent activity
     # Use 'user' FK (Review.user) - 'author' does not exist on Review model
@@ -78,43 +104,34 @@ def admin_dashboard(request):
         "-rating", "-review_count"
     )[:5]
 
-    # Growth data (last 7 days)
-    growth_data = []
-    for i in range(6, -1, -1):
-        day = now - timedelta(days=i)
-        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-
-        day_stats = {
-            "date": day_start.strftime("%Y-%m-%d"),
-            "users": User.objects.filter(
-                date_joined__range=(day_start, day_end)
-            ).count(),
-            "reviews": Review.objects.filter(
-                created_at__range=(day_start, day_end)
-            ).count(),
-            "companies": Company.objects.filter(
-                id__isnull=False
-            ).count(),  # Placeholder
+    # Growth data (last 7 days): closed days from DailyPlatformStats
+    growth = platform_series(7)
+    growth_data = [
+        {
+            "date": day.strftime("%Y-%m-%d"),
+            "users": growth["new_users"][i],
+            "reviews": growth["reviews"][i],
+            "companies": growth["new_companies"][i],
         }
-        growth_data.append(day_stats)
+        for i, day in enumerate(growth["dates"])
+    ]
 
     context = {
         # User stats
-        "total_users": total_users,
-        "active_users_7d": active_users_7d,
-        "new_users_30d": new_users_30d,
-        "verified_users": verified_users,
+        "total_users": user_stats["total"],
+        "active_users_7d": user_stats["active_7d"],
+        "new_users_30d": user_stats["new_30d"],
+        "verified_users": user_stats["verified"],
         # Company stats
-        "total_companies": total_companies,
-        "active_companies": active_companies,
-        "verified_companies": verified_companies,
-        "pending_verifications": pending_verifications,
+        "total_companies": company_stats["total"],
+        "active_companies": company_stats["active"],
+        "verified_companies": company_stats["verified"],
+        "pending_verifications": company_stats["pending_verifications"],
         # Review stats
-        "total_reviews": total_reviews,
-        "approved_reviews": approved_reviews,
-        "pending_reviews": pending_reviews,
-        "verified_purchase_reviews": verified_purchase_reviews,
+        "total_reviews": review_stats["total"],
+        "approved_reviews": review_stats["approved"],
+        "pending_reviews": review_stats["pending"],
+        "verified_purchase_reviews": review_stats["verified_purchase"],
         "avg_rating": round(avg_rating, 2),
         # Pending actions
         "pending_reports": pending_reports,
@@ -5,9 +5,10 @@ Advanced features views: Analytics, Gamification, 2FA
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from django.db.models import Count, Avg, Q, F
+from django.db.models import Avg, Q, F
 from django.utils import timezone
 from datetime import timedelta
+from .analytics import clamp_days, daily_series
 from .models import Company, Review, UserGamification, Badge, ReviewImage, BusinessCategory
 from .visibility import public_companies_queryset
 import json
@@ -19,7 +20,7 @@ def analytics_dashboard(request, company_id):
     company = get_object_or_404(Company, id=company_id, manager=request.user)
 
     # Date range filter
-    days = int(request.GET.get("days", 30))
+    days = clamp_days(request.GET.get("days"))
     start_date = timezone.now() - timedelta(days=days)
 
     # Reviews in period
@@ -36,18 +37,25 @@ def analytics_dashboard(request, company_id):
         "helpful_reviews": reviews.filter(helpful_count__gte=5).count(),
     }
 
-    # Rating distribution
-    rating_distribution = list(
-        reviews.values("rating").annotate(count=Count("id")).order_by("rating")
-    )
+    # Rating distribution (all approved reviews, from the stored histogram)
+    rating_distribution = [
+        {"rating": star, "count": count}
+        for star, count in company.rating_counts.items()
+    ]
 
-    # Reviews over time (daily)
-    reviews_over_time = []
-    for i in range(days):
-        date = timezone.now() - timedelta(days=i)
-        count = reviews.filter(created_at__date=date.date()).count()
-        reviews_over_time.append({"date": date.strftime("%Y-%m-%d"), "count": count})
-    reviews_over_time.reverse()
+    # Daily series: rollups up to the watermark, raw rows only after it
+    series = daily_series([company.pk], days)
+    reviews_over_time = [
+        {
+            "date": day.strftime("%Y-%m-%d"),
+            "count": series["reviews"][i],
+            "rating": series["ratings"][i],
+            "contact_reveals": series["contact_reveals"][i],
+            "likes": series["likes"][i],
+            "views": series["views"][i],
+        }
+        for i, day in enumerate(series["dates"])
+    ]
 
     # Top reviews (most helpful)
     top_reviews = reviews.order_by("-helpful_count")[:5]
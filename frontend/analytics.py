@@ -0,0 +1,146 @@
+"""
+Per-day time series for the owner and admin dashboards.
+
+Days up to the rollup watermark come from ``DailyCompanyStats`` /
+``DailyPlatformStats`` (see ``frontend.rollups``) in one query; only the
+days after it (normally just today) are grouped from the raw tables, one
+``TruncDay`` GROUP BY per table, however many days are asked for. Days
+without rows are filled in Python.
+
+Company series:
+
+- ``reviews``: approved reviews created that day
+- ``ratings``: their average rating (``None`` on days without reviews)
+- ``contact_reveals``: phone/e-mail reveals (``ActivityLog``)
+- ``likes``: company likes
+- ``views``: counted page views (rollups only, added by the view flush)
+"""
+
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .rollups import (
+    COMPANY_FIELDS,
+    PLATFORM_FIELDS,
+    company_activity,
+    platform_activity,
+    rollup_watermark,
+)
+
+ANALYTICS_MAX_DAYS = 365
+SERIES = ("reviews", "ratings", "contact_reveals", "likes", "views")
+
+
+def clamp_days(value, default=30) -> int:
+    """``days`` from a query string, limited to 1..``ANALYTICS_MAX_DAYS``."""
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        days = default
+    return min(max(days, 1), ANALYTICS_MAX_DAYS)
+
+
+def _merge(rollup_rows, raw, fields, watermark) -> dict:
+    """``{date: {field: value}}`` from rollups up to ``watermark`` and ``raw`` after it.
+
+    ``views`` exist only in the rollups, so they are taken for every day.
+    """
+    values = {}
+    for entry in rollup_rows:
+        day = entry.pop("date")
+        closed = watermark is not None and day <= watermark
+        values[day] = {k: v for k, v in entry.items() if closed or k == "views"}
+    for day, entry in raw.items():
+        values.setdefault(day, {}).update(entry)
+    return values
+
+
+def _raw_since(start, watermark):
+    return max(start, watermark + timedelta(days=1)) if watermark else start
+
+
+def daily_series(company_ids, days) -> dict:
+    """
+    Daily values of every company series for the last ``days`` days, today
+    included, summed over ``company_ids``.
+
+    Returns ``{"dates": [date, ...], "<series>": [value, ...], ...}`` with one
+    entry per day, oldest first.
+    """
+    from .models import DailyCompanyStats
+
+    company_ids = sorted(set(company_ids))
+    days = clamp_days(days)
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    dates = [start + timedelta(days=i) for i in range(days)]
+
+    values = {}
+    if company_ids:
+        watermark = rollup_watermark()
+        fields = (*COMPANY_FIELDS, "views")
+        rollup_rows = (
+            DailyCompanyStats.objects.filter(company_id__in=company_ids, date__range=(start, today))
+            .values("date")
+            .annotate(**{name: Sum(name) for name in fields})
+            .order_by()
+        )
+        raw = company_activity(_raw_since(start, watermark), today, company_ids)
+        values = _merge(rollup_rows, raw, fields, watermark)
+
+    series = {"dates": dates, **{name: [] for name in SERIES}}
+    for day in dates:
+        entry = values.get(day, {})
+        reviews = entry.get("reviews", 0)
+        series["reviews"].append(reviews)
+        series["ratings"].append(round(entry.get("rating_sum", 0) / reviews, 2) if reviews else None)
+        for name in ("contact_reveals", "likes", "views"):
+            series[name].append(entry.get(name, 0))
+    return series
+
+
+def company_totals(company_ids) -> dict:
+    """All-time sums of ``COMPANY_FIELDS`` and views over ``company_ids``."""
+    from .models import DailyCompanyStats
+
+    company_ids = sorted(set(company_ids))
+    fields = (*COMPANY_FIELDS, "views")
+    totals = dict.fromkeys(fields, 0)
+    if not company_ids:
+        return totals
+    watermark = rollup_watermark()
+    raw_from = None
+    if watermark is not None:
+        rolled = DailyCompanyStats.objects.filter(
+            company_id__in=company_ids, date__lte=watermark
+        ).aggregate(**{name: Sum(name) for name in fields})
+        totals.update({name: value or 0 for name, value in rolled.items()})
+        raw_from = watermark + timedelta(days=1)
+    for entry in company_activity(raw_from, timezone.localdate(), company_ids).values():
+        for name, value in entry.items():
+            totals[name] += value
+    return totals
+
+
+def platform_series(days) -> dict:
+    """Site-wide daily series (``PLATFORM_FIELDS`` and views) for the last ``days`` days."""
+    from .models import DailyPlatformStats
+
+    days = clamp_days(days)
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    watermark = rollup_watermark()
+    fields = (*PLATFORM_FIELDS, "views")
+    rollup_rows = DailyPlatformStats.objects.filter(date__range=(start, today)).values(
+        "date", *fields
+    )
+    raw = platform_activity(_raw_since(start, watermark), today)
+    values = _merge(rollup_rows, raw, fields, watermark)
+
+    dates = [start + timedelta(days=i) for i in range(days)]
+    series = {"dates": dates}
+    for name in fields:
+        series[name] = [values.get(day, {}).get(name, 0) for day in dates]
+    return series
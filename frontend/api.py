@@ -4,11 +4,21 @@ from django.db import models
 from django.db.models import Q
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.csrf import csrf_exempt
 from django.db.models import Avg, Count
 from frontend.models import Company, BusinessCategory, Review
 from frontend.visibility import public_companies_queryset, visible_business_categories
-from frontend.cache_utils import get_safe_limit_param, get_safe_pagination_param
+from frontend.cache_utils import (
+    CATEGORIES_TAG,
+    COMPANY_DIRECTORY_TAG,
+    COMPANY_LIST_TAG,
+    company_tag,
+    get_safe_limit_param,
+    get_safe_pagination_param,
+)
+from frontend.http_cache import public_cache
+from frontend.pagination import approximate_count, keyset_paginate
 
 
 API_VERSIONS = {
@@ -19,6 +29,9 @@ API_VERSIONS = {
     },
 }
 
+# Default Company ordering (-review_count, -rating, name) made total for cursors
+V1_COMPANIES_KEYSET = ("-review_count", "-rating", "-id")
+
 ALLOWED_ORIGINS = [
     "https://fikrly.uz",
     "https://www.fikrly.uz",
@@ -35,6 +48,8 @@ def add_cors_headers(response, request):
     response["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
     response["Access-Control-Allow-Headers"] = "Content-Type, Authorization, Accept-Language"
     response["Access-Control-Max-Age"] = "3600"
+    # Responses are HTTP-cached; the allowed origin differs per caller
+    patch_vary_headers(response, ("Origin",))
     return response
 
 
@@ -74,24 +89,46 @@ def api_root(request):
 
 
 @require_http_methods(["GET", "OPTIONS"])
+@public_cache(lambda request: [COMPANY_LIST_TAG, CATEGORIES_TAG])
 def v1_companies(request):
     """List companies with basic info."""
     if request.method == "OPTIONS":
         return options_handler(request)
     
     limit = get_safe_limit_param(request, "limit", 20, 50)
-    page = get_safe_pagination_param(request)
-    page = get_safe_pagination_param(request)
     
     companies = (
         public_companies_queryset()
         .select_related("category_fk")
         .only("id", "name", "slug", "city", "rating", "review_count", "is_verified", "category_fk__name", "category_fk__slug", "image_400", "image_url")
     )
+    total_count = approximate_count(companies, [COMPANY_LIST_TAG])
     
-    from django.core.paginator import Paginator
-    paginator = Paginator(companies, limit)
-    page_obj = paginator.get_page(page)
+    if "cursor" in request.GET:
+        # Keyset mode: pass back next_cursor/prev_cursor tokens verbatim
+        page_obj = keyset_paginate(
+            companies, V1_COMPANIES_KEYSET, limit, request.GET.get("cursor")
+        )
+        pagination = {
+            "next_cursor": page_obj.next_cursor,
+            "prev_cursor": page_obj.previous_cursor,
+            "total_count": total_count,
+            "total_count_approximate": True,
+            "has_next": page_obj.has_next(),
+            "has_prev": page_obj.has_previous(),
+        }
+    else:
+        from django.core.paginator import Paginator
+        paginator = Paginator(companies, limit)
+        paginator.count = total_count
+        page_obj = paginator.get_page(get_safe_pagination_param(request))
+        pagination = {
+            "page": page_obj.number,
+            "total_pages": paginator.num_pages,
+            "total_count": total_count,
+            "has_next": page_obj.has_next(),
+            "has_prev": page_obj.has_previous(),
+        }
     
     response = JsonResponse({
         "companies": [
@@ -108,18 +145,13 @@ def v1_companies(request):
             }
             for c in page_obj
         ],
-        "pagination": {
-            "page": page_obj.number,
-            "total_pages": paginator.num_pages,
-            "total_count": paginator.count,
-            "has_next": page_obj.has_next(),
-            "has_prev": page_obj.has_previous(),
-        },
+        "pagination": pagination,
     })
     return add_cors_headers(response, request)
 
 
 @require_http_methods(["GET", "OPTIONS"])
+@public_cache(lambda request: [CATEGORIES_TAG, COMPANY_DIRECTORY_TAG])
 def v1_categories(request):
     """List business categories."""
     if request.method == "OPTIONS":
@@ -146,7 +178,13 @@ def v1_categories(request):
     return add_cors_headers(response, request)
 
 
+def _v1_company_detail_tags(request, slug):
+    pk = public_companies_queryset().filter(slug=slug).values_list("pk", flat=True).first()
+    return None if pk is None else [company_tag(pk), CATEGORIES_TAG]
+
+
 @require_http_methods(["GET", "OPTIONS"])
+@public_cache(_v1_company_detail_tags)
 def v1_company_detail(request, slug):
     """Get company detail with reviews."""
     if request.method == "OPTIONS":
@@ -170,6 +208,9 @@ def v1_company_detail(request, slug):
             "website": company.website,
             "rating": float(company.rating) if company.rating else None,
             "review_count": company.review_count,
+            "rating_distribution": {
+                str(star): count for star, count in company.rating_counts.items()
+            },
             "is_verified": company.is_verified,
             "is_claimed": company.is_claimed,
             "category": company.category_fk.name if company.category_fk else None,
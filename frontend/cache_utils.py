@@ -5,6 +5,9 @@ from django.core.cache import cache
 from django.http import JsonResponse
 import hashlib
 import json
+import math
+import random
+import time
 
 
 MAX_PAGINATION_LIMIT = 50
@@ -65,13 +68,15 @@ def cache_per_user(timeout=60 * 5, key_prefix="view"):
     return decorator
 
 
-def cache_api_response(timeout=60 * 5, vary_on=None):
+def cache_api_response(timeout=60 * 5, vary_on=None, tags=None):
     """
     Cache decorator specifically for API endpoints returning JSON.
 
     Args:
         timeout: Cache timeout in seconds
         vary_on: List of request parameter names to include in cache key
+        tags: Invalidation tags the response depends on
+              (defaults to the company listing tag)
     """
 
     def decorator(view_func):
@@ -97,7 +102,7 @@ def cache_api_response(timeout=60 * 5, vary_on=None):
 
             # Create hash for cleaner key
             cache_key = hashlib.md5(":".join(key_parts).encode()).hexdigest()
-            cache_key = f"api:{cache_key}"
+            cache_key = tagged_cache_key(f"api:{cache_key}", tags or [COMPANY_LIST_TAG])
 
             # Try cache
             cached = cache.get(cache_key)
@@ -181,28 +186,187 @@ class CachedProperty:
         return getattr(instance, attr_name)
 
 
-def clear_public_cache() -> int:
-    """Clear public-facing cache keys.
+# ---------------------------------------------------------------------------
+# Tag-based invalidation
+# ---------------------------------------------------------------------------
+#
+# Every tag owns a version counter stored under ``tagver:<tag>``. A cached
+# entry's key embeds the current versions of the tags it depends on, so
+# bumping a tag makes all dependent keys unreachable without scanning Redis.
+# Orphaned entries age out through their normal TTL.
 
-    Returns:
-        Number of deleted keys when pattern deletion is available,
-        -1 when fallback `cache.clear()` is used.
+PUBLIC_CACHE_TAG = "public"
+# Any change that can alter ordering/contents of company listings
+COMPANY_LIST_TAG = "companies"
+# Company set membership: creation, deletion, activation, category or city moves
+COMPANY_DIRECTORY_TAG = "company_directory"
+CATEGORIES_TAG = "categories"
+
+TAG_VERSION_PREFIX = "tagver:"
+
+
+def company_tag(company_id) -> str:
+    return f"company:{company_id}"
+
+
+def category_tag(category_id) -> str:
+    return f"category:{category_id}"
+
+
+def city_tag(city: str) -> str:
+    normalized = (city or "").strip().lower()
+    return f"city:{hashlib.md5(normalized.encode()).hexdigest()[:12]}"
+
+
+def company_cache_tags(company_id, category_id=None, city="") -> list[str]:
+    """Tags touched by a change to a single company."""
+    tags = [company_tag(company_id), COMPANY_LIST_TAG]
+    if category_id:
+        tags.append(category_tag(category_id))
+    if city:
+        tags.append(city_tag(city))
+    return tags
+
+
+def _new_tag_version() -> int:
+    # Time-based seed: if a version key is evicted, the fresh value can never
+    # collide with a version embedded in a still-cached entry.
+    return time.time_ns() // 1000
+
+
+def get_tag_versions(tags) -> dict:
+    """Return ``{tag: version}``, initialising missing versions."""
+    keys = {f"{TAG_VERSION_PREFIX}{tag}": tag for tag in tags}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, tag in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _new_tag_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        versions[tag] = version
+    return versions
+
+
+def tags_signature(tags) -> str:
+    """Short digest of the current versions of ``tags`` (plus the public tag)."""
+    tags = sorted(set(tags) | {PUBLIC_CACHE_TAG})
+    versions = get_tag_versions(tags)
+    signature = ";".join(f"{tag}={versions[tag]}" for tag in tags)
+    return hashlib.md5(signature.encode()).hexdigest()[:16]
+
+
+def tagged_cache_key(base_key: str, tags) -> str:
+    """Build a cache key that becomes stale as soon as any tag is invalidated."""
+    return f"{base_key}:t{tags_signature(tags)}"
+
+
+def invalidate_tags(*tags) -> None:
+    """Bump tag versions in two round trips — no key scanning.
+
+    A new version is the current time in microseconds (and always above the
+    old one), so the newest version of a page's tags doubles as its
+    ``Last-Modified`` (see ``http_cache``).
     """
-    patterns = ["*business_list:*", "*api:*", "*visible_business_categories*"]
-    deleted = 0
+    keys = [f"{TAG_VERSION_PREFIX}{tag}" for tag in set(tags)]
+    if not keys:
+        return
+    current = cache.get_many(keys)
+    now = _new_tag_version()
+    cache.set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, None)
 
-    try:
-        from django_redis import get_redis_connection
 
-        conn = get_redis_connection("default")
-        for pattern in patterns:
-            keys = conn.keys(pattern)
-            if keys:
-                deleted += conn.delete(*keys)
-        return deleted
-    except Exception:
+def company_fragment_versions(company_ids) -> dict:
+    """``{company_id: version}`` for keying cached company card fragments.
+
+    The version changes whenever the company's tag (or the public tag) is
+    invalidated: edits, review approvals, new image variants. One
+    ``get_many`` for the whole page.
+    """
+    company_ids = list(company_ids)
+    versions = get_tag_versions(
+        [company_tag(pk) for pk in company_ids] + [PUBLIC_CACHE_TAG]
+    )
+    public = versions[PUBLIC_CACHE_TAG]
+    return {pk: f"{versions[company_tag(pk)]}.{public}" for pk in company_ids}
+
+
+def clear_public_cache() -> None:
+    """Invalidate every public-facing cache entry (emergency refresh).
+
+    All tagged entries depend on ``PUBLIC_CACHE_TAG``, so this is a single
+    version bump; stale entries simply expire on their own TTL.
+    """
+    invalidate_tags(PUBLIC_CACHE_TAG)
+
+
+# ---------------------------------------------------------------------------
+# Stampede-protected fill
+# ---------------------------------------------------------------------------
+
+STAMPEDE_LOCK_TIMEOUT = 30  # seconds a worker may hold the recompute lock
+STALE_GRACE = 60 * 10  # how long an expired value may still be served
+EARLY_REFRESH_BETA = 1.0  # >1 refreshes earlier, <1 later
+COLD_MISS_WAIT = 2.0  # seconds to wait for another worker on a cold key
+
+
+def _store_computed(key, compute, timeout, version, stale_grace):
+    started = time.monotonic()
+    value = compute()
+    entry = {
+        "value": value,
+        "version": version,
+        "expires": time.time() + timeout,
+        "delta": time.monotonic() - started,
+    }
+    cache.set(key, entry, timeout + stale_grace)
+    return value
+
+
+def get_or_compute(
+    key,
+    compute,
+    timeout,
+    tags=None,
+    stale_grace=STALE_GRACE,
+    beta=EARLY_REFRESH_BETA,
+):
+    """Return the cached value for ``key``, recomputing it at most once at a time.
+
+    - Only the worker that wins ``cache.add`` on ``<key>:lock`` recomputes;
+      the others keep serving the previous value (expired or from an older
+      tag version) instead of piling onto the database.
+    - Hot keys are refreshed early with a probability that rises as expiry
+      nears and with how long the value took to compute (XFetch).
+    - On a cold key, losers wait up to ``COLD_MISS_WAIT`` for the winner.
+
+    ``tags`` works like :func:`tagged_cache_key`, but the version signature is
+    stored inside the entry so stale content stays available after
+    invalidation.
+    """
+    version = tags_signature(tags) if tags else ""
+    entry = cache.get(key)
+    if entry is not None and entry["version"] == version:
+        jitter = entry["delta"] * beta * -math.log(1.0 - random.random())
+        if time.time() + jitter < entry["expires"]:
+            return entry["value"]
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, STAMPEDE_LOCK_TIMEOUT):
         try:
-            cache.clear()
-            return -1
-        except Exception:
-            return 0
+            return _store_computed(key, compute, timeout, version, stale_grace)
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        return entry["value"]
+
+    deadline = time.monotonic() + COLD_MISS_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None and entry["version"] == version:
+            return entry["value"]
+    # Lock holder is slow or died; compute without blocking the request further
+    return _store_computed(key, compute, timeout, version, stale_grace)
@@ -0,0 +1,173 @@
+"""
+Purging the nginx micro-cache.
+
+nginx keeps anonymous GET responses marked by ``http_cache.public_cache``
+for their ``s-maxage`` (see ``nginx/nginx.conf``). That is short, but an
+edited company or a freshly approved review should not wait for it, so:
+
+- every time a public response is rendered, its path is recorded under the
+  company/category tags it depends on (a bounded list per tag in the
+  default cache),
+- the Company, Review and BusinessCategory signals call :func:`purge_tags`;
+  after the transaction commits, the recorded paths are popped and
+  re-requested through nginx's internal purge listener, which always goes
+  to Django and stores the new response over the old one. Those requests
+  carry ``X-Edge-Refresh: 1`` (:func:`is_edge_refresh`), so they are not
+  counted as page views.
+
+Broad tags (all companies, all categories, a city's listing) are not
+tracked: one company edit would otherwise re-render every listing page.
+Those pages expire on their own ``s-maxage``.
+
+Without ``EDGE_CACHE_PURGE_URL`` (development, tests) nothing is recorded
+or sent.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+EDGE_URLS_PREFIX = "edgeurls:"
+EDGE_URLS_PER_TAG = 200  # most recently rendered paths kept per tag
+EDGE_URLS_TIMEOUT = 60 * 60 * 24  # longer than nginx keeps an unused entry
+EDGE_TRACKED_TAG_PREFIXES = ("company:", "category:")
+EDGE_PURGE_TIMEOUT = 10  # seconds per refresh request
+EDGE_PURGE_WORKERS = 2
+EDGE_REFRESH_HEADER = "X-Edge-Refresh"  # also set by nginx's purge listener
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def edge_cache_enabled() -> bool:
+    return bool(getattr(settings, "EDGE_CACHE_PURGE_URL", ""))
+
+
+def is_edge_refresh(request) -> bool:
+    """Whether ``request`` is a purge refresh rather than a visitor."""
+    return request.headers.get(EDGE_REFRESH_HEADER) == "1"
+
+
+def _tracked_keys(tags) -> list:
+    return [
+        f"{EDGE_URLS_PREFIX}{tag}"
+        for tag in sorted(set(tags))
+        if tag.startswith(EDGE_TRACKED_TAG_PREFIXES)
+    ]
+
+
+def track_url(path: str, tags) -> None:
+    """Remember that the cached response for ``path`` depends on ``tags``."""
+    keys = _tracked_keys(tags)
+    if not keys or not edge_cache_enabled():
+        return
+    found = cache.get_many(keys)
+    updates = {}
+    for key in keys:
+        paths = found.get(key, [])
+        if path not in paths:
+            updates[key] = (paths + [path])[-EDGE_URLS_PER_TAG:]
+    if updates:
+        cache.set_many(updates, EDGE_URLS_TIMEOUT)
+
+
+def pop_urls(tags) -> list:
+    """Paths recorded under ``tags``, forgetting them (they re-register on render)."""
+    keys = _tracked_keys(tags)
+    if not keys:
+        return []
+    found = cache.get_many(keys)
+    if found:
+        cache.delete_many(list(found))
+    paths = []
+    for key in keys:
+        paths.extend(p for p in found.get(key, []) if p not in paths)
+    return paths
+
+
+def _language_cookie(path: str) -> str:
+    # Same rule as UzbekDefaultLocaleMiddleware. A matching cookie keeps the
+    # response free of Set-Cookie, which nginx would refuse to store.
+    lang = "ru" if (path.startswith("/ru/") or path == "/ru") else "uz"
+    return f"{settings.LANGUAGE_COOKIE_NAME}={lang}"
+
+
+def purge_urls(paths, base_url=None, hosts=None, timeout=EDGE_PURGE_TIMEOUT) -> dict:
+    """
+    Refresh ``paths`` in the nginx cache for each of ``hosts``.
+
+    ``base_url`` is nginx's purge listener (``EDGE_CACHE_PURGE_URL``); the
+    ``Host`` header selects the cache key. Returns counts of refreshed and
+    failed requests; failures are logged, the entry then simply expires.
+    """
+    base_url = base_url or getattr(settings, "EDGE_CACHE_PURGE_URL", "")
+    hosts = hosts or getattr(settings, "EDGE_CACHE_HOSTS", [])
+    stats = {"purged": 0, "failed": 0}
+    if not base_url:
+        return stats
+    with requests.Session() as session:
+        for path in paths:
+            for host in hosts:
+                try:
+                    response = session.get(
+                        urljoin(base_url, path),
+                        headers={
+                            "Host": host,
+                            "Cookie": _language_cookie(path),
+                            EDGE_REFRESH_HEADER: "1",
+                        },
+                        timeout=timeout,
+                        allow_redirects=False,
+                        stream=True,  # the body is for nginx, not for us
+                    )
+                    response.close()
+                    ok = response.status_code < 500
+                except requests.RequestException as e:
+                    logger.warning("Edge cache purge of %s%s failed: %s", host, path, e)
+                    ok = False
+                stats["purged" if ok else "failed"] += 1
+    return stats
+
+
+def _submit(paths) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=EDGE_PURGE_WORKERS, thread_name_prefix="edge-purge"
+            )
+        future = _executor.submit(purge_urls, paths)
+        _pending.add(future)
+    future.add_done_callback(_pending.discard)
+
+
+def purge_tags(*tags) -> None:
+    """After the current transaction commits, refresh every URL tracked under ``tags``.
+
+    Requests are sent from a small background thread pool so the save that
+    triggered them does not wait on nginx.
+    """
+    if not edge_cache_enabled() or not _tracked_keys(tags):
+        return
+
+    def send():
+        paths = pop_urls(tags)
+        if paths:
+            _submit(paths)
+
+    transaction.on_commit(send)
+
+
+def wait_for_purges(timeout=None) -> None:
+    """Block until queued purges are sent (tests, management commands)."""
+    for future in list(_pending):
+        future.result(timeout=timeout)
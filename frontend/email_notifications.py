@@ -1,6 +1,5 @@
 """Email notification system for user engagement."""
 
-from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
@@ -18,24 +17,25 @@ class EmailNotificationService:
 
     @staticmethod
     def send_html_email(subject, template_name, context, to_email):
-        """Send HTML email with fallback to plain text."""
+        """Queue an HTML email (with plain-text fallback) for the outbox worker."""
+        from .outbox import enqueue_email
+
         try:
             html_content = render_to_string(template_name, context)
             text_content = strip_tags(html_content)
 
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
+            enqueue_email(
+                subject,
+                text_content,
+                [to_email],
+                html=html_content,
                 from_email=EmailNotificationService.FROM_EMAIL,
-                to=[to_email],
             )
-            email.attach_alternative(html_content, "text/html")
-            email.send(fail_silently=False)
 
-            logger.info(f"Email sent to {to_email}: {subject}")
+            logger.info(f"Email queued for {to_email}: {subject}")
             return True
         except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {e}")
+            logger.error(f"Failed to queue email to {to_email}: {e}")
             return False
 
     @classmethod
@@ -151,6 +151,28 @@ class EmailNotificationService:
             to_email=company.manager.email,
         )
 
+    @classmethod
+    def send_data_export_ready(cls, export):
+        """Tell the requester their data export can be downloaded."""
+        from django.urls import reverse
+
+        if not export.user.email:
+            return False
+
+        context = {
+            "user_name": export.user.get_full_name() or export.user.username,
+            "export_type": export.get_export_type_display(),
+            "expires_at": export.expires_at,
+            "download_url": f"{settings.SITE_URL}{reverse('download_data_export', args=[export.pk])}",
+        }
+
+        return cls.send_html_email(
+            subject="Ma'lumotlaringiz yuklashga tayyor",
+            template_name="frontend/emails/data_export_ready.html",
+            context=context,
+            to_email=export.user.email,
+        )
+
     @classmethod
     def send_weekly_digest(cls, user, stats):
         """Send weekly activity digest to user."""
@@ -0,0 +1,248 @@
+"""
+Background runner for ``DataExport`` jobs.
+
+``request_data_export`` only records what was asked for. ``manage.py
+process_data_exports`` claims pending rows with ``SELECT ... FOR UPDATE SKIP
+LOCKED`` (so several threads or worker processes can drain the queue at
+once), writes the file with the streaming writers from ``exports`` into a
+spooled temporary file, stores it in ``DataExport.file`` and emails the
+requester a download link.
+
+A running job keeps ``started_at`` fresh while it reports progress, so a
+``processing`` row whose ``started_at`` is older than ``EXPORT_STALE_AFTER``
+has lost its worker. Such a job is queued again, or marked failed once it
+has been claimed ``EXPORT_MAX_ATTEMPTS`` times (an export that kills its
+worker would otherwise be retried forever).
+"""
+
+import logging
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .exports import (
+    BUSINESS_DATA_EXPORT_COLUMNS,
+    REVIEW_EXPORT_COLUMNS,
+    SPOOL_SIZE,
+    write_csv,
+    write_reviews_pdf,
+    write_user_data_json,
+    write_xlsx,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TTL = timedelta(days=7)
+EXPORT_STALE_AFTER = timedelta(hours=1)  # a processing job silent this long is assumed dead
+EXPORT_HEARTBEAT = timedelta(minutes=5)  # longest gap between started_at refreshes
+EXPORT_MAX_ATTEMPTS = 3
+
+
+class ExportDenied(Exception):
+    """The requester may not export what the filters ask for."""
+
+
+def _company(export):
+    from .models import Company
+
+    company_id = str(export.filters.get("company_id", ""))
+    company = Company.objects.filter(pk=company_id).first() if company_id.isdigit() else None
+    if company is None:
+        raise ExportDenied("Kompaniya topilmadi")
+    if not (export.user.is_staff or company.manager_id == export.user_id):
+        raise ExportDenied("Bu kompaniya ma'lumotlarini yuklashga ruxsat yo'q")
+    return company
+
+
+def _approved_reviews(companies):
+    from .models import Review
+
+    return Review.objects.filter(company__in=companies, is_approved=True).order_by(
+        "company_id", "-created_at"
+    )
+
+
+def _progress_reporter(export):
+    """``progress(done, total)`` callback that stores whole-percent steps on the row.
+
+    Each write also refreshes ``started_at`` (at least every
+    ``EXPORT_HEARTBEAT``), so a long job is never taken for a dead one.
+    """
+    from .models import DataExport
+
+    last = {"percent": export.progress, "at": timezone.now()}
+
+    def report(done, total):
+        percent = min(99, done * 100 // total) if total else 99
+        now = timezone.now()
+        if percent > last["percent"] or now - last["at"] >= EXPORT_HEARTBEAT:
+            last.update(percent=max(percent, last["percent"]), at=now)
+            DataExport.objects.filter(pk=export.pk).update(progress=last["percent"], started_at=now)
+
+    return report
+
+
+def _build_reviews_pdf(export, fileobj):
+    company = _company(export)
+    write_reviews_pdf(
+        fileobj, company, _approved_reviews([company]), progress=_progress_reporter(export)
+    )
+
+
+def _build_reviews_excel(export, fileobj):
+    company = _company(export)
+    write_xlsx(fileobj, _approved_reviews([company]), REVIEW_EXPORT_COLUMNS, title="Reviews")
+
+
+def _build_user_data(export, fileobj):
+    write_user_data_json(fileobj, export.user)
+
+
+def _build_business_data(export, fileobj):
+    from .models import Company
+
+    if export.filters.get("company_id"):
+        companies = [_company(export)]
+    else:
+        companies = Company.objects.filter(manager=export.user)
+    write_csv(fileobj, _approved_reviews(companies), BUSINESS_DATA_EXPORT_COLUMNS)
+
+
+EXPORT_BUILDERS = {
+    "reviews_pdf": _build_reviews_pdf,
+    "reviews_excel": _build_reviews_excel,
+    "user_data": _build_user_data,
+    "business_data": _build_business_data,
+}
+
+
+def validate_export_request(user, export_type, filters):
+    """Raise :class:`ExportDenied` if ``user`` may not request this export."""
+    from .models import DataExport
+
+    if export_type not in EXPORT_BUILDERS:
+        raise ExportDenied("Noma'lum eksport turi")
+    if export_type in ("reviews_pdf", "reviews_excel") or filters.get("company_id"):
+        _company(DataExport(user=user, export_type=export_type, filters=filters))
+
+
+def requeue_stale_exports() -> int:
+    """Return jobs whose worker died mid-run to the queue; returns the number requeued.
+
+    Jobs already tried ``EXPORT_MAX_ATTEMPTS`` times are marked failed instead.
+    """
+    from .models import DataExport
+
+    now = timezone.now()
+    stale = DataExport.objects.filter(status="processing", started_at__lt=now - EXPORT_STALE_AFTER)
+    given_up = stale.filter(attempts__gte=EXPORT_MAX_ATTEMPTS).update(
+        status="failed",
+        error_message="Eksport tayyorlanmadi: ishlov berish bir necha bor to'xtab qoldi",
+        completed_at=now,
+        expires_at=now + EXPORT_TTL,
+    )
+    if given_up:
+        logger.warning(
+            "Gave up on %s data exports after %s attempts", given_up, EXPORT_MAX_ATTEMPTS
+        )
+    return stale.update(status="pending", started_at=None)
+
+
+def claim_export():
+    """Mark the oldest pending job as processing and return it (or None)."""
+    from .models import DataExport
+
+    with transaction.atomic():
+        qs = DataExport.objects.filter(status="pending").order_by("created_at")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True, of=("self",))
+        export = qs.select_related("user").first()
+        if export is None:
+            return None
+        export.status = "processing"
+        export.started_at = timezone.now()
+        export.progress = 0
+        export.attempts += 1
+        export.save(update_fields=["status", "started_at", "progress", "attempts"])
+    return export
+
+
+def run_export(export) -> bool:
+    """Build and store the file for a claimed job; returns True on success."""
+    now = timezone.now()
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+            EXPORT_BUILDERS[export.export_type](export, spool)
+            spool.seek(0)
+            name = f"{export.export_type}_{uuid.uuid4().hex}.{export.format}"
+            export.file.save(name, File(spool), save=False)
+    except Exception as exc:
+        if not isinstance(exc, ExportDenied):
+            logger.exception("Data export #%s failed", export.pk)
+        export.status = "failed"
+        export.error_message = str(exc)[:500]
+        export.completed_at = now
+        export.expires_at = now + EXPORT_TTL
+        export.save(update_fields=["status", "error_message", "completed_at", "expires_at"])
+        return False
+
+    now = timezone.now()
+    export.status = "completed"
+    export.error_message = ""
+    export.progress = 100
+    export.completed_at = now
+    export.expires_at = now + EXPORT_TTL
+    export.save(
+        update_fields=["status", "error_message", "progress", "file", "completed_at", "expires_at"]
+    )
+    try:
+        from .email_notifications import EmailNotificationService
+
+        EmailNotificationService.send_data_export_ready(export)
+    except Exception:
+        logger.warning("Could not queue export-ready email for #%s", export.pk)
+    return True
+
+
+def _drain(results, lock, max_jobs):
+    try:
+        while True:
+            with lock:
+                if max_jobs is not None and results["claimed"] >= max_jobs:
+                    return
+                results["claimed"] += 1
+            export = claim_export()
+            if export is None:
+                with lock:
+                    results["claimed"] -= 1
+                return
+            ok = run_export(export)
+            with lock:
+                results["completed" if ok else "failed"] += 1
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def process_data_exports(concurrency=2, max_jobs=None) -> dict:
+    """Run pending jobs on ``concurrency`` threads until the queue is empty."""
+    requeue_stale_exports()
+    results = {"claimed": 0, "completed": 0, "failed": 0}
+    lock = threading.Lock()
+    if concurrency <= 1:
+        _drain(results, lock, max_jobs)
+    else:
+        threads = [
+            threading.Thread(target=_drain, args=(results, lock, max_jobs), name=f"export-{i}")
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return {"completed": results["completed"], "failed": results["failed"]}
@@ -0,0 +1,391 @@
+"""
+Streaming CSV / XLSX / JSON / PDF exports.
+
+Every exporter describes its output as a tuple of :class:`ExportColumn`.
+:func:`iter_rows` fetches only the database fields those columns declare
+(``queryset.values(...)``, no model instances or ``select_related``) and
+walks the result with ``.iterator(chunk_size=...)``, so memory stays flat
+however many rows are exported:
+
+- CSV is streamed to the client as it is produced (``StreamingHttpResponse``).
+- XLSX uses openpyxl's write-only mode and is saved to a spooled temporary
+  file that is then streamed back with ``FileResponse``.
+- PDF is laid out one page-sized table at a time (:func:`build_incrementally`)
+  into a spooled temporary file; big reports run as ``DataExport`` jobs.
+
+The ``write_*`` functions target any binary file object and are shared by
+the request-time views and the ``DataExport`` job runner (``export_jobs``).
+"""
+
+import csv
+import io
+import itertools
+import json
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+EXPORT_CHUNK_SIZE = 2000
+SPOOL_SIZE = 8 * 1024 * 1024  # keep small files in memory, spill bigger ones to disk
+PDF_ROWS_PER_CHUNK = 40  # about one A4 page of review rows
+PDF_INLINE_MAX_ROWS = 2000  # bigger PDF reports are built by the DataExport worker
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """One output column: its header, the ``values()`` paths it reads and how to render them."""
+
+    header: str
+    fields: tuple
+    render: Callable[[dict], Any]
+    width: int = 15
+
+
+def column(header, field, render=None, width=15) -> ExportColumn:
+    """Column showing a single field, optionally passed through ``render``."""
+    return ExportColumn(
+        header,
+        (field,),
+        (lambda row: render(row[field])) if render else (lambda row: row[field]),
+        width,
+    )
+
+
+def _yes_no(value) -> str:
+    return "Ha" if value else "Yo'q"
+
+
+def _datetime(fmt):
+    return lambda value: value.strftime(fmt) if value else ""
+
+
+def _review_author(row) -> str:
+    return row["user_name"] or row["user__username"] or ""
+
+
+def _full_name(row) -> str:
+    if not row["user_id"]:
+        return "Anonymous"
+    return f"{row['user__first_name'] or ''} {row['user__last_name'] or ''}".strip()
+
+
+# Company reviews as seen by the business owner (moderation export)
+REVIEW_EXPORT_COLUMNS = (
+    column("Date", "created_at", _datetime("%Y-%m-%d %H:%M"), width=18),
+    ExportColumn(
+        "User", ("user_id", "user__first_name", "user__last_name"), _full_name, width=20
+    ),
+    column("Rating", "rating", width=10),
+    column("Review", "text", width=50),
+    column("Helpful Votes", "helpful_count", width=12),
+    column("Response", "owner_response_text", lambda v: v or "", width=50),
+)
+
+# Reviews across a manager's companies (DataExport "business_data")
+BUSINESS_DATA_EXPORT_COLUMNS = (column("Company", "company__name"),) + REVIEW_EXPORT_COLUMNS
+
+# Company reviews in the PDF report
+PDF_REVIEW_EXPORT_COLUMNS = (
+    column("Date", "created_at", _datetime("%Y-%m-%d")),
+    ExportColumn("User", ("user_id", "user__first_name", "user__last_name"), _full_name),
+    column("Rating", "rating", lambda v: f"{v}/5"),
+    column("Review", "text", lambda v: v[:200] + "..." if len(v) > 200 else v),
+)
+
+# Admin "export reviews" action
+ADMIN_REVIEW_EXPORT_COLUMNS = (
+    column("ID", "id"),
+    column("Company", "company__name"),
+    ExportColumn("User", ("user_name", "user__username"), _review_author),
+    column("Rating", "rating"),
+    column("Text", "text", lambda v: v[:100]),  # Truncate long text
+    column("Approved", "is_approved", _yes_no),
+    column("Verified Purchase", "verified_purchase", _yes_no),
+    column("Created", "created_at", _datetime("%Y-%m-%d %H:%M")),
+)
+
+COMPANY_EXPORT_COLUMNS = (
+    column("ID", "id"),
+    column("Name", "name"),
+    column("Category", "category_fk__name", lambda v: v or ""),
+    column("City", "city"),
+    column("Rating", "rating", lambda v: v or 0),
+    column("Reviews", "review_count", lambda v: v or 0),
+    column("Verified", "is_verified", _yes_no),
+    column("Active", "is_active", lambda v: "Faol" if v else "Nofaol"),
+)
+
+
+def _action_label(value) -> str:
+    from .models import ActivityLog
+
+    return dict(ActivityLog.ACTION_CHOICES).get(value, value)
+
+
+ACTIVITY_LOG_EXPORT_COLUMNS = (
+    column("created_at", "created_at", _datetime("%Y-%m-%d %H:%M:%S")),
+    column("action", "action", _action_label),
+    column("actor", "actor__username", lambda v: v or ""),
+    column("company", "company__name", lambda v: v or ""),
+    column("review", "review_id", lambda v: f"#{v}" if v else ""),
+    column("details", "details", lambda v: (v or "").replace("\n", " ").replace("\r", " ")),
+)
+
+
+def projected_fields(columns) -> list:
+    fields = []
+    for col in columns:
+        fields.extend(f for f in col.fields if f not in fields)
+    return fields
+
+
+def iter_rows(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield one rendered list per row, fetching only the columns' fields."""
+    for row in queryset.values(*projected_fields(columns)).iterator(chunk_size=chunk_size):
+        yield [col.render(row) for col in columns]
+
+
+class _Echo:
+    """File-like whose ``write`` hands the CSV line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([col.header for col in columns])
+    for row in iter_rows(queryset, columns, chunk_size):
+        yield writer.writerow(row)
+
+
+def write_csv(fileobj, queryset, columns) -> None:
+    """Write ``queryset`` as UTF-8 CSV to the binary ``fileobj``."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+    for line in iter_csv(queryset, columns):
+        text.write(line)
+    text.flush()
+    text.detach()
+
+
+def csv_response(queryset, columns, filename) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(iter_csv(queryset, columns), content_type="text/csv")
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    return response
+
+
+def write_xlsx(fileobj, queryset, columns, title="Sheet", header_style=True) -> None:
+    """Write ``queryset`` to ``fileobj`` as a single-sheet workbook in write-only mode."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+    for i, col in enumerate(columns, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = col.width
+
+    header = []
+    for col in columns:
+        cell = WriteOnlyCell(ws, value=col.header)
+        if header_style:
+            cell.fill = PatternFill(start_color="00D68B", end_color="00D68B", fill_type="solid")
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+        header.append(cell)
+    ws.append(header)
+    for row in iter_rows(queryset, columns):
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def xlsx_response(queryset, columns, filename, title="Sheet") -> FileResponse:
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    write_xlsx(spool, queryset, columns, title)
+    spool.seek(0)
+    return FileResponse(
+        spool, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE
+    )
+
+
+def _dump(value) -> str:
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def _iter_json_array(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    yield "["
+    for i, row in enumerate(queryset.values(*fields).iterator(chunk_size=chunk_size)):
+        yield ("," if i else "") + _dump(row)
+    yield "]"
+
+
+def iter_user_data_json(user):
+    """The user's personal data (GDPR export) as JSON text chunks, lists streamed row by row."""
+    from .models import Badge, Company, Review, UserProfile
+
+    profile = UserProfile.objects.filter(user=user).values("bio").first() or {}
+    yield "{" + _dump("personal_info") + ":" + _dump(
+        {
+            "username": user.username,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "date_joined": user.date_joined,
+            "last_login": user.last_login,
+        }
+    )
+    yield "," + _dump("profile") + ":" + _dump(profile)
+    sections = (
+        ("reviews", Review.objects.filter(user=user).order_by("created_at"),
+         ("company__name", "rating", "text", "created_at")),
+        ("companies", Company.objects.filter(manager=user).order_by("pk"),
+         ("name", "category_fk__name", "rating", "review_count")),
+        ("badges", Badge.objects.filter(user=user).order_by("earned_at"),
+         ("name", "description", "earned_at")),
+    )
+    for key, queryset, fields in sections:
+        yield "," + _dump(key) + ":"
+        yield from _iter_json_array(queryset, fields)
+    yield "}"
+
+
+def write_user_data_json(fileobj, user) -> None:
+    for chunk in iter_user_data_json(user):
+        fileobj.write(chunk.encode("utf-8"))
+
+
+def _pdf_table_style():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 10),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+            ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ("FONTSIZE", (0, 1), (-1, -1), 8),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]
+    )
+
+
+def iter_chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_reviews_pdf(fileobj, company, queryset, progress=None) -> None:
+    """Company review report: summary header plus a table of every review.
+
+    One ``Table`` over thousands of rows is laid out (and re-split at every
+    page break) as a whole, which is what made the old export slow enough to
+    be capped at 100 rows. Rows are instead read ``PDF_ROWS_PER_CHUNK`` at a
+    time, each chunk becomes its own page-sized table and is laid out onto
+    the canvas before the next chunk is fetched. ``progress(done, total)`` is
+    called after every chunk.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+    total = queryset.count()
+    doc = SimpleDocTemplate(fileobj, pagesize=A4)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        "CustomTitle",
+        parent=styles["Heading1"],
+        fontSize=24,
+        textColor=colors.HexColor("#00d68b"),
+        spaceAfter=30,
+    )
+    info_style = styles["Normal"]
+    header = [
+        Paragraph(f"Reviews - {company.name}", title_style),
+        Spacer(1, 0.2 * inch),
+        Paragraph(f"<b>Total Reviews:</b> {total}", info_style),
+        Paragraph(f"<b>Average Rating:</b> {company.rating}/5.0", info_style),
+        Paragraph(
+            f"<b>Generated:</b> {timezone.now().strftime('%Y-%m-%d %H:%M')}", info_style
+        ),
+        Spacer(1, 0.3 * inch),
+    ]
+
+    header_row = [col.header for col in PDF_REVIEW_EXPORT_COLUMNS]
+    col_widths = [1.2 * inch, 1.5 * inch, 0.8 * inch, 4 * inch]
+    style = _pdf_table_style()
+
+    def tables():
+        done = 0
+        rows = iter_rows(queryset, PDF_REVIEW_EXPORT_COLUMNS)
+        for chunk in iter_chunks(rows, PDF_ROWS_PER_CHUNK):
+            table = Table([header_row] + chunk, colWidths=col_widths, repeatRows=1)
+            table.setStyle(style)
+            yield table
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+        if not total:
+            table = Table([header_row], colWidths=col_widths)
+            table.setStyle(style)
+            yield table
+
+    build_incrementally(doc, header, tables())
+
+
+def pdf_response(company, queryset, filename) -> FileResponse:
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    write_reviews_pdf(spool, company, queryset)
+    spool.seek(0)
+    return FileResponse(
+        spool, as_attachment=True, filename=filename, content_type="application/pdf"
+    )
+
+
+def build_incrementally(doc, story, flowables):
+    """``SimpleDocTemplate.build`` for a lazily produced story.
+
+    ``build`` wants the whole story as a list up front. This lays out
+    ``story`` and then each flowable from the ``flowables`` iterable as it
+    is produced, so a long report never holds more than one chunk of rows.
+    """
+    from reportlab.platypus import Frame, PageTemplate
+
+    doc._calc()
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id="normal")
+    doc.addPageTemplates(
+        [
+            PageTemplate(id="First", frames=frame, pagesize=doc.pagesize),
+            PageTemplate(id="Later", frames=frame, pagesize=doc.pagesize),
+        ]
+    )
+    doc._startBuild()
+    doc.canv._doctemplate = doc
+    try:
+        for flowable in itertools.chain(story, flowables):
+            pending = [flowable]  # split remainders are pushed back onto this list
+            while pending:
+                doc.clean_hanging()
+                doc.handle_flowable(pending)
+    finally:
+        del doc.canv._doctemplate
+    doc._endBuild()
@@ -0,0 +1,166 @@
+"""
+Gamification engine: XP, levels, counters, streaks and badges.
+
+Events (a review approved, a helpful vote received) are applied to the
+user's ``UserGamification`` row with a single ``UPDATE ... RETURNING``:
+XP and the counters move by deltas, the level is derived from the new XP
+(``xp // XP_PER_LEVEL + 1``) and the streak is advanced from
+``last_activity_date``, all in SQL, so concurrent events never lose
+updates and nothing is recounted.
+
+Badge thresholds are checked against the returned counters: a badge is
+awarded when an event moves a counter across its threshold, with one
+``INSERT`` only when that happens.
+"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+XP_PER_LEVEL = 100
+XP_REVIEW = 10
+XP_HELPFUL_VOTE = 2
+
+COUNTERS = ("total_reviews", "helpful_votes_received", "companies_reviewed")
+
+# (badge_type, counter, threshold, name, description, icon)
+BADGE_RULES = (
+    ("first_review", "total_reviews", 1, "Birinchi sharh", "Birinchi sharhingizni yozdingiz!", "🎉"),
+    ("reviews_10", "total_reviews", 10, "10 sharh", "10 ta sharh yozdingiz", "📝"),
+    ("reviews_50", "total_reviews", 50, "50 sharh", "50 ta sharh yozdingiz", "✍️"),
+    ("reviews_100", "total_reviews", 100, "100 sharh", "100 ta sharh yozdingiz!", "🏆"),
+    ("helpful_10", "helpful_votes_received", 10, "10 foydali ovoz",
+     "Sharhlaringiz 10 ta foydali ovoz oldi", "👍"),
+    ("helpful_50", "helpful_votes_received", 50, "50 foydali ovoz",
+     "Sharhlaringiz 50 ta foydali ovoz oldi", "🌟"),
+    ("helpful_100", "helpful_votes_received", 100, "100 foydali ovoz",
+     "Sharhlaringiz 100 ta foydali ovoz oldi!", "💎"),
+    ("streak_7", "current_streak", 7, "7 kunlik seriya", "7 kun ketma-ket faol bo'ldingiz", "🔥"),
+    ("streak_30", "current_streak", 30, "30 kunlik seriya", "30 kun ketma-ket faol bo'ldingiz", "⚡"),
+    *(
+        (f"level_{n}", "level", n, f"Level {n} Master", f"Reached level {n}", "🎯")
+        for n in (5, 10, 25, 50, 100)
+    ),
+)
+
+_RETURNING = ("xp", "level", *COUNTERS, "current_streak", "longest_streak")
+
+
+def level_for_xp(xp: int) -> int:
+    return xp // XP_PER_LEVEL + 1
+
+
+def _delta(column, delta, params) -> str:
+    # Counters are unsigned: a decrement stops at zero
+    if delta >= 0:
+        params.append(delta)
+        return f"{column} = {column} + %s"
+    params.extend([-delta, -delta])
+    return f"{column} = CASE WHEN {column} < %s THEN 0 ELSE {column} - %s END"
+
+
+def _update(user_id, xp, counters, active, today) -> dict:
+    from .models import UserGamification
+
+    ops = connection.ops
+    params = []
+    assignments = [_delta(name, delta, params) for name, delta in counters.items() if delta]
+    if xp:
+        assignments.append("xp = xp + %s")
+        assignments.append(f"level = (xp + %s) / {XP_PER_LEVEL} + 1")
+        params.extend([xp, xp])
+    if active:
+        day = ops.adapt_datefield_value(today)
+        yesterday = ops.adapt_datefield_value(today - timedelta(days=1))
+        streak = (
+            "CASE WHEN last_activity_date = %s THEN current_streak "
+            "WHEN last_activity_date = %s THEN current_streak + 1 ELSE 1 END"
+        )
+        assignments.append(f"current_streak = {streak}")
+        assignments.append(
+            f"longest_streak = CASE WHEN {streak} > longest_streak THEN {streak} ELSE longest_streak END"
+        )
+        assignments.append("last_activity_date = %s")
+        params.extend([day, yesterday, day, yesterday, day, yesterday, day])
+    assignments.append("updated_at = %s")
+    params.append(ops.adapt_datetimefield_value(timezone.now()))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {UserGamification._meta.db_table} SET {', '.join(assignments)} "
+            f"WHERE user_id = %s RETURNING {', '.join(_RETURNING)}",
+            [*params, user_id],
+        )
+        row = cursor.fetchone()
+    return dict(zip(_RETURNING, row)) if row else None
+
+
+def _crossed(before, after) -> list:
+    return [rule for rule in BADGE_RULES if before[rule[1]] < rule[2] <= after[rule[1]]]
+
+
+def award_badges(user_id, rules) -> None:
+    from .models import Badge
+
+    if rules:
+        Badge.objects.bulk_create(
+            [
+                Badge(user_id=user_id, badge_type=badge_type, name=name, description=description, icon=icon)
+                for badge_type, _, _, name, description, icon in rules
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def apply_progress(user_id, xp=0, active=False, today=None, **counters) -> dict:
+    """Apply XP and counter deltas to ``user_id`` and award crossed badges.
+
+    ``counters`` are deltas of ``COUNTERS`` (negative ones stop at zero);
+    ``active`` advances the daily streak. Returns the updated values.
+    """
+    from .models import UserGamification
+
+    if xp < 0:
+        raise ValueError("XP is never taken away")
+    unknown = set(counters) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown gamification counters: {', '.join(sorted(unknown))}")
+    today = today or timezone.localdate()
+    after = _update(user_id, xp, counters, active, today)
+    if after is None:
+        # Users created before the gamification row existed
+        UserGamification.objects.get_or_create(user_id=user_id)
+        after = _update(user_id, xp, counters, active, today)
+
+    before = {name: after[name] - counters.get(name, 0) for name in COUNTERS}
+    before["level"] = level_for_xp(after["xp"] - xp)
+    # A streak moves by one a day; repeating the threshold on the same day is
+    # absorbed by the (user, badge_type) unique constraint
+    before["current_streak"] = after["current_streak"] - 1 if active else after["current_streak"]
+    award_badges(user_id, _crossed(before, after))
+    return after
+
+
+def record_review_written(user_id) -> dict:
+    """The user wrote a review: the streak follows the author, not moderation."""
+    return apply_progress(user_id, active=True)
+
+
+def record_review_approved(user_id, reviews=1) -> dict:
+    # One review per user per company, so every approved review is a new company
+    return apply_progress(
+        user_id, xp=XP_REVIEW * reviews, total_reviews=reviews, companies_reviewed=reviews
+    )
+
+
+def record_review_withdrawn(user_id, reviews=1) -> dict:
+    """``reviews`` approved reviews were unapproved or deleted; earned XP is kept."""
+    return apply_progress(user_id, total_reviews=-reviews, companies_reviewed=-reviews)
+
+
+def record_helpful_votes(user_id, delta, new_vote=False) -> dict:
+    """``delta`` helpful votes on the user's reviews; XP only for a new vote."""
+    return apply_progress(
+        user_id, xp=XP_HELPFUL_VOTE if new_vote and delta > 0 else 0, helpful_votes_received=delta
+    )
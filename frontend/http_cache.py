@@ -0,0 +1,122 @@
+"""
+Per-view HTTP caching for public pages.
+
+``NoCacheMiddleware`` sends ``no-store`` on HTML and JSON unless the view
+chose its own ``Cache-Control``. Views whose output is the same for every
+anonymous visitor opt in with :func:`public_cache`, naming the invalidation
+tags (see ``cache_utils``) their content depends on:
+
+- the tag versions, language, URL and ``HTTP_CACHE_VERSION`` make a weak
+  ``ETag``; the newest tag version is the ``Last-Modified`` time,
+- a request whose ``If-None-Match``/``If-Modified-Since`` still matches gets
+  a 304 without the view running,
+- the response is ``public, max-age=0, s-maxage=N``: browsers revalidate on
+  every visit while the nginx ``proxy_cache`` may serve it for N seconds
+  (``X-Accel-Expires``; nginx would otherwise honour ``max-age=0``),
+- its path is recorded against the tags so saves can purge it from nginx
+  early (see ``edge_cache``).
+
+Signed-in users, other methods, error responses and responses that set
+cookies, changed the session or embed a CSRF token keep ``no-store``.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.translation import get_language
+
+from .cache_utils import PUBLIC_CACHE_TAG, get_tag_versions
+from .edge_cache import track_url
+
+HTTP_CACHE_S_MAXAGE = 60
+HTTP_CACHE_STALE_WHILE_REVALIDATE = 30
+
+
+def http_validators(request, tags):
+    """``(etag, last_modified)`` for the current request and ``tags``.
+
+    ``last_modified`` is a Unix timestamp. One cache ``get_many``.
+    """
+    tags = sorted(set(tags) | {PUBLIC_CACHE_TAG})
+    versions = get_tag_versions(tags)
+    signature = "|".join(
+        [
+            str(getattr(settings, "HTTP_CACHE_VERSION", "")),
+            get_language() or "",
+            request.get_full_path(),
+        ]
+        + [f"{tag}={versions[tag]}" for tag in tags]
+    )
+    etag = f'W/"{hashlib.md5(signature.encode()).hexdigest()}"'
+    # Versions are microsecond timestamps (see cache_utils.invalidate_tags)
+    return etag, max(versions.values()) // 1_000_000
+
+
+def is_shareable(request, response) -> bool:
+    """True when ``response`` holds nothing specific to this visitor."""
+    session = getattr(request, "session", None)
+    return (
+        response.status_code == 200
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        and not (session is not None and session.modified)
+    )
+
+
+def mark_public(response, etag, last_modified, s_maxage=HTTP_CACHE_S_MAXAGE):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = (
+        f"public, max-age=0, s-maxage={s_maxage}, "
+        f"stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+    )
+    # nginx reads this before Cache-Control and strips it from the response
+    response["X-Accel-Expires"] = str(s_maxage)
+    # Signed-in visitors get a different page from the same URL
+    patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def public_cache(tags_for, s_maxage=HTTP_CACHE_S_MAXAGE, on_not_modified=None):
+    """
+    Make a view's anonymous GET/HEAD responses cacheable by browsers and nginx.
+
+    ``tags_for(request, *args, **kwargs)`` returns the tags the page depends
+    on, or ``None`` when it must not be cached (e.g. the object is hidden and
+    the view will 404). ``on_not_modified`` is called with the same arguments
+    when a 304 is sent instead of running the view.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+            tags = tags_for(request, *args, **kwargs)
+            if tags is None:
+                return view_func(request, *args, **kwargs)
+
+            etag, last_modified = http_validators(request, tags)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                if not_modified.status_code != 304:  # 412 from If-Match
+                    return not_modified
+                if on_not_modified is not None:
+                    on_not_modified(request, *args, **kwargs)
+                track_url(request.get_full_path(), tags)
+                return mark_public(not_modified, etag, last_modified, s_maxage)
+
+            response = view_func(request, *args, **kwargs)
+            if is_shareable(request, response):
+                track_url(request.get_full_path(), tags)
+                mark_public(response, etag, last_modified, s_maxage)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,114 +1,146 @@
-"""Image optimization utilities for better performance."""
+"""
+Image optimization utilities for better performance.
+
+Every entry point decodes the upload once through :func:`open_image`, which
+- refuses decompression bombs before any pixel data is read,
+- asks the JPEG decoder for a reduced-size decode (``Image.draft``) when
+  only a smaller image is needed, so a 24 MP photo is never expanded to
+  full resolution to make a 1200 px variant,
+- applies the EXIF orientation and drops EXIF/XMP metadata (camera
+  details, GPS) so it is not copied into the stored files.
+
+Several sizes are then derived as a ladder, each from the next larger one,
+instead of resizing the full image once per size.
+"""
 
 import logging
-import sys
+import math
+import warnings
 from io import BytesIO
 
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from PIL import Image
+from PIL import Image, ImageOps
 
 logger = logging.getLogger(__name__)
 
+# 40 MP is above any phone camera; larger files are rejected unread
+MAX_IMAGE_PIXELS = 40_000_000
+
+_ROTATED_ORIENTATIONS = (5, 6, 7, 8)  # EXIF orientations that swap width and height
+
+
+class ImageTooLarge(ValueError):
+    """The image declares more pixels than ``MAX_IMAGE_PIXELS``."""
+
 
-def optimize_image(image_field, max_width=1200, max_height=1200, quality=85):
+def open_image(fp, max_size=None, max_pixels=None):
     """
-    Optimize uploaded images by:
-    - Resizing to max dimensions while maintaining aspect ratio
-    - Converting to RGB if necessary
-    - Compressing with specified quality
-    - Converting to JPEG for smaller file sizes
+    Open and decode an image once, upright and without EXIF.
 
     Args:
-        image_field: Django ImageField
-        max_width: Maximum width in pixels
-        max_height: Maximum height in pixels
-        quality: JPEG quality (1-100)
+        fp: Path, file object or Django file
+        max_size: ``(width, height)`` the caller will shrink the image to
+            fit in; JPEGs are then decoded at the smallest 1/2, 1/4 or 1/8
+            scale that is still at least that large
+        max_pixels: Decompression bomb limit (default ``MAX_IMAGE_PIXELS``)
 
     Returns:
-        InMemoryUploadedFile or None
+        A loaded PIL image with orientation applied
     """
-    if not image_field:
-        return None
-
-    try:
-        # Open image
-        img = Image.open(image_field)
-
-        # Convert RGBA to RGB if necessary
-        if img.mode in ("RGBA", "LA", "P"):
-            background = Image.new("RGB", img.size, (255, 255, 255))
-            if img.mode == "P":
-                img = img.convert("RGBA")
-            background.paste(img, mask=img.split()[-1] if img.mode == "RGBA" else None)
-            img = background
-        elif img.mode != "RGB":
-            img = img.convert("RGB")
-
-        # Calculate new dimensions maintaining aspect ratio
-        img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-
-        # Save to BytesIO
-        output = BytesIO()
-        img.save(output, format="JPEG", quality=quality, optimize=True)
-        output.seek(0)
-
-        # Create InMemoryUploadedFile
-        return InMemoryUploadedFile(
-            output,
-            "ImageField",
-            f"{image_field.name.split('.')[0]}.jpg",
-            "image/jpeg",
-            sys.getsizeof(output),
-            None,
+    with warnings.catch_warnings():
+        # Pillow only warns between MAX_IMAGE_PIXELS and twice that; make it fatal
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        try:
+            img = Image.open(fp)
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+            raise ImageTooLarge(str(e)) from e
+    max_pixels = max_pixels or MAX_IMAGE_PIXELS
+    if img.width * img.height > max_pixels:
+        raise ImageTooLarge(
+            f"Image is {img.width}x{img.height}, more than {max_pixels} pixels"
         )
-    except Exception as e:
-        logger.warning("Image optimization failed: %s", e)
-        return None
 
+    orientation = img.getexif().get(0x0112, 1)
+    if max_size and img.format == "JPEG":
+        box = max_size[::-1] if orientation in _ROTATED_ORIENTATIONS else max_size
+        # draft() keeps the decoded size >= the requested one, so fit the box first
+        scale = min(box[0] / img.width, box[1] / img.height)
+        if scale < 1:
+            img.draft(
+                img.mode if img.mode in ("RGB", "L") else "RGB",
+                (math.ceil(img.width * scale), math.ceil(img.height * scale)),
+            )
 
-def create_thumbnail(image_field, size=(300, 300)):
+    img = ImageOps.exif_transpose(img)  # also loads the pixel data
+    for key in ("exif", "xmp", "XML:com.adobe.xmp"):
+        img.info.pop(key, None)
+    return img
+
+
+def _web_mode(img):
+    """RGB, or RGBA if the image has transparency (WebP/AVIF keep alpha)."""
+    if img.mode in ("RGBA", "LA", "P"):
+        return img.convert("RGBA")
+    return img if img.mode == "RGB" else img.convert("RGB")
+
+
+def resize_ladder(img, widths):
     """
-    Create a thumbnail version of an image.
+    Yield ``(width, image)`` for each width, widest first, never upscaling.
 
-    Args:
-        image_field: Django ImageField
-        size: Tuple of (width, height)
+    Each step is resized from the previous (larger) one rather than from the
+    original, so the expensive full-resolution pass happens once.
+    """
+    current = img
+    for width in sorted(set(widths), reverse=True):
+        if width < current.width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize(
+                (width, height), Image.Resampling.LANCZOS, reducing_gap=3.0
+            )
+        yield width, current
+
+
+try:  # AVIF needs the optional pillow-avif-plugin on Pillow < 11.3
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+VARIANT_FORMATS = ("webp", "avif") if "AVIF" in Image.SAVE else ("webp",)
+VARIANT_QUALITY = {"webp": 80, "avif": 60}
+
+
+def variant_widths(original_width, widths):
+    """Widths actually produced for an original: never upscaled, at least one."""
+    return sorted({w for w in widths if w <= original_width}) or [original_width]
+
+
+def render_variants(data, widths, formats=VARIANT_FORMATS):
+    """
+    Encode the image in ``data`` at each of ``widths`` in each of ``formats``.
+
+    Widths are filtered through :func:`variant_widths`. The image is decoded
+    once (reduced-size for JPEGs) and the sizes derived with
+    :func:`resize_ladder`. Runs in the image worker's process pool, so it
+    only deals in bytes.
 
     Returns:
-        InMemoryUploadedFile or None
+        ``(width, height, [(format, width, height, bytes), ...])`` where the
+        first two are the upright original's dimensions
     """
-    if not image_field:
-        return None
-
-    try:
-        img = Image.open(image_field)
-
-        # Convert to RGB if needed
-        if img.mode in ("RGBA", "LA", "P"):
-            background = Image.new("RGB", img.size, (255, 255, 255))
-            if img.mode == "P":
-                img = img.convert("RGBA")
-            background.paste(img, mask=img.split()[-1] if img.mode == "RGBA" else None)
-            img = background
-        elif img.mode != "RGB":
-            img = img.convert("RGB")
-
-        # Create thumbnail
-        img.thumbnail(size, Image.Resampling.LANCZOS)
-
-        # Save
-        output = BytesIO()
-        img.save(output, format="JPEG", quality=85, optimize=True)
-        output.seek(0)
-
-        return InMemoryUploadedFile(
-            output,
-            "ImageField",
-            f"thumb_{image_field.name.split('.')[0]}.jpg",
-            "image/jpeg",
-            sys.getsizeof(output),
-            None,
-        )
-    except Exception as e:
-        logger.warning("Thumbnail creation failed: %s", e)
-        return None
+    with Image.open(BytesIO(data)) as probe:
+        rotated = probe.getexif().get(0x0112, 1) in _ROTATED_ORIENTATIONS
+        width, height = probe.size[::-1] if rotated else probe.size
+
+    targets = variant_widths(width, widths)
+    widest = targets[-1]
+    img = _web_mode(
+        open_image(BytesIO(data), max_size=(widest, math.ceil(height * widest / width)))
+    )
+
+    variants = []
+    for target, resized in resize_ladder(img, targets):
+        for fmt in formats:
+            output = BytesIO()
+            resized.save(output, format=fmt.upper(), quality=VARIANT_QUALITY.get(fmt, 80))
+            variants.append((fmt, resized.width, resized.height, output.getvalue()))
+    return width, height, variants
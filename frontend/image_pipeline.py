@@ -0,0 +1,383 @@
+"""
+Image derivative pipeline.
+
+Uploading a company image, logo, avatar or review photo only stores the
+original and queues an ``ImageAsset`` row (see ``signals``); nothing is
+decoded or re-encoded inside the request. ``manage.py process_images``
+claims queued rows (``SELECT ... FOR UPDATE SKIP LOCKED``), hashes the
+original and encodes the widths its profile needs as WebP (plus AVIF when
+Pillow can write it) on a process pool. Variants are stored once per
+content hash, so the same picture uploaded again costs nothing.
+
+Until an asset is ready :func:`image_variants` returns nothing and
+:func:`best_variant_url` falls back to the original file.
+"""
+
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .image_optimization import VARIANT_FORMATS, render_variants, variant_widths
+
+logger = logging.getLogger(__name__)
+
+# Target widths per kind of image
+IMAGE_PROFILES = {
+    "company": (400, 800, 1200),
+    "logo": (96, 192, 400),
+    "avatar": (64, 128, 256),
+    "review": (320, 640, 1200),
+}
+IMAGE_MAX_ATTEMPTS = 3
+IMAGE_STALE_AFTER = timedelta(minutes=30)  # a processing asset older than this is assumed dead
+VARIANT_CACHE_TTL = 60 * 60 * 24
+VARIANT_MISS_TTL = 60  # not ready yet: look again soon
+
+
+# ---------------------------------------------------------------------------
+# Enqueueing and lookup
+# ---------------------------------------------------------------------------
+
+
+def _cache_key(source) -> str:
+    return "img_variants:" + hashlib.md5(source.encode("utf-8")).hexdigest()
+
+
+def enqueue_image(source, profile):
+    """Queue derivative generation for the stored original ``source``."""
+    from .models import ImageAsset
+
+    if not source or profile not in IMAGE_PROFILES:
+        return None
+    asset, _ = ImageAsset.objects.update_or_create(
+        source=source,
+        defaults={
+            "profile": profile,
+            "status": "pending",
+            "content_hash": "",
+            "attempts": 0,
+            "error": "",
+        },
+    )
+    cache.delete(_cache_key(source))
+    return asset
+
+
+def image_variants(source) -> list:
+    """Variants of a stored original as dicts (format, width, height, url), narrowest first.
+
+    Empty until the original has been processed. Cached per source.
+    """
+    from .models import ImageAsset, ImageVariant
+
+    if not source:
+        return []
+    key = _cache_key(source)
+    variants = cache.get(key)
+    if variants is not None:
+        return variants
+
+    content_hash = (
+        ImageAsset.objects.filter(source=source, status="ready")
+        .values_list("content_hash", flat=True)
+        .first()
+    )
+    variants = []
+    if content_hash:
+        variants = [
+            {"format": v.format, "width": v.width, "height": v.height, "url": v.file.url}
+            for v in ImageVariant.objects.filter(content_hash=content_hash).order_by("width")
+        ]
+    cache.set(key, variants, VARIANT_CACHE_TTL if variants else VARIANT_MISS_TTL)
+    return variants
+
+
+def best_variant_url(field_file, width, fmt="webp") -> str:
+    """URL of the narrowest ``fmt`` variant at least ``width`` px wide.
+
+    Falls back to the widest variant, then to the original file's URL.
+    """
+    if not field_file:
+        return ""
+    candidates = [v for v in image_variants(field_file.name) if v["format"] == fmt]
+    for variant in candidates:
+        if variant["width"] >= width:
+            return variant["url"]
+    if candidates:
+        return candidates[-1]["url"]
+    try:
+        return field_file.url
+    except ValueError:
+        return ""
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+
+def requeue_stale_images() -> int:
+    """Return assets whose worker died mid-run to the queue."""
+    from .models import ImageAsset
+
+    cutoff = timezone.now() - IMAGE_STALE_AFTER
+    return ImageAsset.objects.filter(status="processing", updated_at__lt=cutoff).update(
+        status="pending", updated_at=timezone.now()
+    )
+
+
+def claim_images(limit):
+    """Mark up to ``limit`` pending assets as processing and return them."""
+    from .models import ImageAsset
+
+    now = timezone.now()
+    with transaction.atomic():
+        qs = ImageAsset.objects.filter(status="pending").order_by("created_at")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        assets = list(qs[:limit])
+        if assets:
+            ImageAsset.objects.filter(pk__in=[a.pk for a in assets]).update(
+                status="processing", attempts=F("attempts") + 1, updated_at=now
+            )
+    for asset in assets:
+        asset.status = "processing"
+        asset.attempts += 1
+    return assets
+
+
+def _missing_widths(asset):
+    """Widths still to encode for ``asset`` (hash already set), or None if all exist."""
+    from .models import ImageAsset, ImageVariant
+
+    widths = IMAGE_PROFILES[asset.profile]
+    known = (
+        ImageAsset.objects.filter(content_hash=asset.content_hash, width__isnull=False)
+        .exclude(pk=asset.pk)
+        .values("width", "height")
+        .first()
+    )
+    if known is None:
+        return widths, None
+    existing = set(
+        ImageVariant.objects.filter(content_hash=asset.content_hash).values_list(
+            "format", "width"
+        )
+    )
+    missing = [
+        w
+        for w in variant_widths(known["width"], widths)
+        if any((fmt, w) not in existing for fmt in VARIANT_FORMATS)
+    ]
+    return missing or None, (known["width"], known["height"])
+
+
+def _store_variants(asset, variants):
+    from .models import ImageVariant
+
+    existing = set(
+        ImageVariant.objects.filter(content_hash=asset.content_hash).values_list(
+            "format", "width"
+        )
+    )
+    rows = []
+    for fmt, width, height, data in variants:
+        if (fmt, width) in existing:
+            continue
+        name = default_storage.save(
+            f"image_variants/{asset.content_hash[:2]}/{asset.content_hash}_{width}.{fmt}",
+            ContentFile(data),
+        )
+        rows.append(
+            ImageVariant(
+                content_hash=asset.content_hash,
+                format=fmt,
+                width=width,
+                height=height,
+                file=name,
+                size=len(data),
+            )
+        )
+    # Another worker may have stored the same content meanwhile
+    ImageVariant.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def _sync_company_fields(asset):
+    """Point the legacy ``Company.image_400/800/1200`` fields at the new WebP variants."""
+    from .cache_utils import company_cache_tags, invalidate_tags
+    from .models import Company, ImageVariant
+
+    variants = list(
+        ImageVariant.objects.filter(content_hash=asset.content_hash, format="webp").order_by(
+            "width"
+        )
+    )
+    if not variants:
+        return
+
+    def pick(size):
+        fitting = [v for v in variants if v.width <= size]
+        return (fitting[-1] if fitting else variants[0]).file.name
+
+    companies = list(
+        Company.objects.filter(image=asset.source).values_list("pk", "category_fk_id", "city")
+    )
+    if not companies:
+        return
+    Company.objects.filter(pk__in=[c[0] for c in companies]).update(
+        image_400=pick(400), image_800=pick(800), image_1200=pick(1200)
+    )
+    for pk, category_id, city in companies:
+        invalidate_tags(*company_cache_tags(pk, category_id, city))
+
+
+def _finish(asset, width, height):
+    from .models import ImageAsset
+
+    ImageAsset.objects.filter(pk=asset.pk).update(
+        status="ready",
+        content_hash=asset.content_hash,
+        width=width,
+        height=height,
+        error="",
+        updated_at=timezone.now(),
+    )
+    cache.delete(_cache_key(asset.source))
+    if asset.profile == "company":
+        _sync_company_fields(asset)
+
+
+def _fail(asset, error):
+    from .models import ImageAsset
+
+    status = "failed" if asset.attempts >= IMAGE_MAX_ATTEMPTS else "pending"
+    logger.warning("Image variants for %s failed (%s): %s", asset.source, status, error)
+    ImageAsset.objects.filter(pk=asset.pk).update(
+        status=status,
+        content_hash=asset.content_hash,
+        error=str(error)[:2000],
+        updated_at=timezone.now(),
+    )
+
+
+class _InlineFuture:
+    def __init__(self, fn, *args):
+        try:
+            self._result, self._error = fn(*args), None
+        except Exception as exc:
+            self._result, self._error = None, exc
+
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+_pool = None
+_pool_size = 0
+
+
+def _get_pool(size):
+    global _pool, _pool_size
+    if _pool is None or _pool_size != size:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool, _pool_size = ProcessPoolExecutor(max_workers=size), size
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+def process_images(batch_size=20, concurrency=2) -> dict:
+    """Generate variants for one batch of queued assets.
+
+    Encoding runs on a pool of ``concurrency`` processes (in-line when 1).
+    Returns counts: ``ready`` (encoded), ``deduplicated`` (variants already
+    existed for the content), ``failed``.
+    """
+    requeue_stale_images()
+    counts = {"ready": 0, "deduplicated": 0, "failed": 0}
+    assets = claim_images(batch_size)
+    if not assets:
+        return counts
+
+    jobs = []
+    for asset in assets:
+        try:
+            with default_storage.open(asset.source, "rb") as fh:
+                data = fh.read()
+        except Exception as exc:
+            _fail(asset, exc)
+            counts["failed"] += 1
+            continue
+        asset.content_hash = hashlib.sha256(data).hexdigest()
+        widths, known_size = _missing_widths(asset)
+        if widths is None:
+            _finish(asset, *known_size)
+            counts["deduplicated"] += 1
+            continue
+        jobs.append((asset, data, widths))
+
+    if concurrency > 1 and len(jobs) > 1:
+        pool = _get_pool(concurrency)
+        futures = [pool.submit(render_variants, data, widths) for _, data, widths in jobs]
+    else:
+        futures = [_InlineFuture(render_variants, data, widths) for _, data, widths in jobs]
+
+    for (asset, _, _), future in zip(jobs, futures):
+        try:
+            width, height, variants = future.result()
+            _store_variants(asset, variants)
+        except BrokenProcessPool as exc:
+            shutdown_pool()
+            _fail(asset, exc)
+            counts["failed"] += 1
+            continue
+        except Exception as exc:
+            _fail(asset, exc)
+            counts["failed"] += 1
+            continue
+        _finish(asset, width, height)
+        counts["ready"] += 1
+    return counts
+
+
+def enqueue_missing_images() -> int:
+    """Queue every stored image that has no ``ImageAsset`` yet (backfill)."""
+    from .models import Company, ImageAsset, ReviewImage, UserProfile
+
+    sources = [
+        (Company, "image", "company"),
+        (Company, "logo", "logo"),
+        (UserProfile, "avatar", "avatar"),
+        (ReviewImage, "image", "review"),
+    ]
+    known = set(ImageAsset.objects.values_list("source", flat=True))
+    queued = 0
+    for model, field, profile in sources:
+        names = (
+            model.objects.exclude(**{f"{field}__isnull": True})
+            .exclude(**{field: ""})
+            .values_list(field, flat=True)
+            .iterator()
+        )
+        for name in names:
+            if name not in known:
+                enqueue_image(name, profile)
+                known.add(name)
+                queued += 1
+    return queued
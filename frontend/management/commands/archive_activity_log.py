@@ -0,0 +1,60 @@
+"""
+Management command for ActivityLog retention. Run it daily: it creates the
+coming months' partitions (PostgreSQL) and moves every month older than the
+retention window to a gzip JSON-lines file, then drops the month's
+partition (or deletes its rows elsewhere). See frontend/activity_log.py.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from frontend.activity_log import (
+    ACTIVITY_PARTITIONS_AHEAD,
+    archive_activity_log,
+    ensure_partitions,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Create upcoming ActivityLog partitions and archive months past the retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            default=settings.ACTIVITY_LOG_RETENTION_MONTHS,
+            help="Full months kept in the database besides the current one "
+            f"(default: {settings.ACTIVITY_LOG_RETENTION_MONTHS})",
+        )
+        parser.add_argument(
+            "--dest",
+            default=str(settings.ACTIVITY_LOG_ARCHIVE_DIR),
+            help="Directory for the archive files (default: ACTIVITY_LOG_ARCHIVE_DIR)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the months that would be archived without touching them",
+        )
+
+    def handle(self, *args, **options):
+        if not options["dry_run"]:
+            for name in ensure_partitions(ACTIVITY_PARTITIONS_AHEAD):
+                self.stdout.write(f"Created partition {name}")
+                logger.info(f"Created activity log partition {name}")
+
+        archived = archive_activity_log(
+            keep_months=options["keep_months"],
+            dest=options["dest"],
+            dry_run=options["dry_run"],
+        )
+        verb = "Would archive" if options["dry_run"] else "Archived"
+        total = 0
+        for month, path, rows in archived:
+            total += rows
+            self.stdout.write(f"{verb} {month:%Y-%m}: {rows} rows" + (f" -> {path}" if path else ""))
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(archived)} months ({total} rows)"))
+        if archived and not options["dry_run"]:
+            logger.info(f"Archived {len(archived)} months ({total} rows) of activity log")
@@ -1,9 +1,12 @@
 """
 Management command to clean up expired data exports.
-Deletes export files older than 7 days.
+Deletes finished (completed or failed) exports past their expires_at, which
+process_data_exports sets when a job finishes; rows without one fall back
+to --days after completion.
 """
 
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 from frontend.models import DataExport
@@ -13,14 +16,14 @@ logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = "Clean up expired data export files (older than 7 days)"
+    help = "Clean up expired data export files"
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--days",
             type=int,
             default=7,
-            help="Number of days to keep exports (default: 7)",
+            help="Days to keep exports that have no expires_at (default: 7)",
         )
         parser.add_argument(
             "--dry-run",
@@ -31,18 +34,22 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         days = options["days"]
         dry_run = options["dry_run"]
-        cutoff_date = timezone.now() - timedelta(days=days)
+        now = timezone.now()
+        cutoff_date = now - timedelta(days=days)
 
-        # Find expired exports
+        # Only finished jobs; pending/processing rows belong to the worker
         expired_exports = DataExport.objects.filter(
-            completed_at__lt=cutoff_date, status="completed"
+            status__in=("completed", "failed")
+        ).filter(
+            Q(expires_at__lt=now)
+            | Q(expires_at__isnull=True, completed_at__lt=cutoff_date)
         )
 
         count = expired_exports.count()
 
         if count == 0:
             self.stdout.write(
-                self.style.SUCCESS(f"No expired exports found (older than {days} days)")
+                self.style.SUCCESS("No expired exports found")
             )
             return
 
@@ -72,7 +79,7 @@ class Command(BaseCommand):
 
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Successfully deleted {deleted_count} exports and {deleted_files} files (older than {days} days)"
+                    f"Successfully deleted {deleted_count} exports and {deleted_files} files"
                 )
             )
             logger.info(f"Cleaned up {deleted_count} expired exports")
@@ -0,0 +1,21 @@
+"""
+Management command to write buffered activity log entries to the database.
+Run it every minute from cron/systemd; views and signals push entries to
+Redis (frontend/activity_log.py) and they are inserted here in batches.
+"""
+
+from django.core.management.base import BaseCommand
+from frontend.activity_log import flush_activity_log
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Flush buffered activity log entries into ActivityLog"
+
+    def handle(self, *args, **options):
+        written = flush_activity_log()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {written} buffered activity log entries"))
+        if written:
+            logger.info(f"Flushed {written} buffered activity log entries")
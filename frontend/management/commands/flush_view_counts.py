@@ -0,0 +1,21 @@
+"""
+Management command to write buffered company view counts to the database.
+Run it every minute from cron/systemd; views are counted in Redis by
+company_detail and applied here in a single bulk UPDATE.
+"""
+
+from django.core.management.base import BaseCommand
+from frontend.view_counts import flush_view_counts
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Flush buffered company view counts into Company.view_count"
+
+    def handle(self, *args, **options):
+        written = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {written} buffered views"))
+        if written:
+            logger.info(f"Flushed {written} buffered company views")
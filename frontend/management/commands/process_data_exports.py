@@ -0,0 +1,64 @@
+"""
+Management command to run queued DataExport jobs.
+Run it continuously (``--loop``, as the ``export_worker`` compose service
+does) or from cron; several instances may run at once on PostgreSQL.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from frontend.export_jobs import process_data_exports
+import logging
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Generate files for pending data export requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=2,
+            help="Export jobs run in parallel (default: 2)",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling until stopped instead of draining once",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when the queue is empty in --loop mode (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        if options["loop"]:
+            signal.signal(signal.SIGTERM, self._stop)
+            signal.signal(signal.SIGINT, self._stop)
+
+        completed = failed = 0
+        while not self._stopping:
+            counts = process_data_exports(concurrency=max(1, options["concurrency"]))
+            completed += counts["completed"]
+            failed += counts["failed"]
+            if counts["completed"] or counts["failed"]:
+                logger.info(
+                    f"Data exports: {counts['completed']} completed, {counts['failed']} failed"
+                )
+            if not options["loop"]:
+                break
+            close_old_connections()
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Completed {completed} exports, {failed} failed")
+        )
+
+    def _stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,88 @@
+"""
+Management command to generate image variants for queued uploads.
+Run it continuously (``--loop``, as the ``image_worker`` compose service
+does) or from cron; several instances may run at once on PostgreSQL.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from frontend.image_pipeline import enqueue_missing_images, process_images, shutdown_pool
+import logging
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Generate WebP/AVIF variants for uploaded images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Images claimed per batch (default: 20)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=2,
+            help="Encoder processes (default: 2)",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling until stopped instead of draining once",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty in --loop mode (default: 2)",
+        )
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="First queue every stored image that has never been processed",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        concurrency = max(1, options["concurrency"])
+        self._stopping = False
+        if options["loop"]:
+            signal.signal(signal.SIGTERM, self._stop)
+            signal.signal(signal.SIGINT, self._stop)
+
+        if options["backfill"]:
+            self.stdout.write(f"Queued {enqueue_missing_images()} existing images")
+
+        totals = {"ready": 0, "deduplicated": 0, "failed": 0}
+        try:
+            while not self._stopping:
+                counts = process_images(batch_size, concurrency)
+                for status, n in counts.items():
+                    totals[status] += n
+                if any(counts.values()):
+                    logger.info(
+                        f"Image batch: {counts['ready']} encoded, "
+                        f"{counts['deduplicated']} deduplicated, {counts['failed']} failed"
+                    )
+                    continue
+                if not options["loop"]:
+                    break
+                close_old_connections()
+                time.sleep(options["interval"])
+        finally:
+            shutdown_pool()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Encoded {totals['ready']}, deduplicated {totals['deduplicated']}, "
+                f"failed {totals['failed']}"
+            )
+        )
+
+    def _stop(self, signum, frame):
+        self._stopping = True
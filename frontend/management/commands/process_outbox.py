@@ -0,0 +1,89 @@
+"""
+Management command to deliver queued Telegram/email notifications.
+Run it continuously (``--loop``, as the ``worker`` compose service does) or
+from cron; several instances may run at once on PostgreSQL.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from frontend.outbox import process_outbox, purge_sent_messages
+import logging
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbound notifications with retries and backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Messages claimed per batch (default: 100)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Messages delivered in parallel (default: 4)",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling until stopped instead of draining once",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty in --loop mode (default: 2)",
+        )
+        parser.add_argument(
+            "--purge-days",
+            type=int,
+            default=14,
+            help="Delete sent messages older than this many days (default: 14)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        concurrency = max(1, options["concurrency"])
+        self._stopping = False
+        if options["loop"]:
+            signal.signal(signal.SIGTERM, self._stop)
+            signal.signal(signal.SIGINT, self._stop)
+
+        totals = {"sent": 0, "pending": 0, "failed": 0}
+        purged_at = 0.0
+        while not self._stopping:
+            if time.monotonic() - purged_at > 3600:
+                purged = purge_sent_messages(options["purge_days"])
+                if purged:
+                    logger.info(f"Purged {purged} delivered outbox messages")
+                purged_at = time.monotonic()
+
+            counts = process_outbox(batch_size, concurrency)
+            for status, n in counts.items():
+                totals[status] += n
+            if any(counts.values()):
+                logger.info(
+                    f"Outbox batch: {counts['sent']} sent, "
+                    f"{counts['pending']} retrying, {counts['failed']} failed"
+                )
+                continue
+            if not options["loop"]:
+                break
+            close_old_connections()
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {totals['sent']}, retrying {totals['pending']}, failed {totals['failed']}"
+            )
+        )
+
+    def _stop(self, signum, frame):
+        self._stopping = True
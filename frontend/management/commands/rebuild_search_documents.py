@@ -0,0 +1,34 @@
+"""
+Management command to (re)build Company.search_document.
+Documents are maintained on save; run this after bulk imports, raw SQL
+edits or changes to the normalization rules in frontend.search.
+"""
+
+from django.core.management.base import BaseCommand
+from frontend.models import Company
+from frontend.search import refresh_search_documents
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized company search documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows written per bulk update (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        total = Company.objects.count()
+        updated = refresh_search_documents(Company.objects.order_by("pk"), batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {updated} of {total} company search documents")
+        )
+        logger.info(f"Rebuilt {updated} company search documents")
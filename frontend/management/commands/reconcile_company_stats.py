@@ -0,0 +1,87 @@
+"""
+Management command to reconcile denormalized company rating aggregates.
+Review signals keep them up to date incrementally; this rescans approved
+reviews in batches and repairs any drift (e.g. after raw SQL or restores).
+"""
+
+from django.core.management.base import BaseCommand
+from frontend.cache_utils import COMPANY_LIST_TAG, invalidate_tags
+from frontend.models import Company
+from frontend.utils import company_stats_from_reviews
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Recompute company rating/review aggregates and fix drifted rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Companies processed per batch (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted companies without writing changes",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        dry_run = options["dry_run"]
+
+        fields = None
+        checked = 0
+        drifted = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Company.objects.filter(pk__gt=last_pk).order_by("pk")[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            checked += len(batch)
+
+            stats = company_stats_from_reviews([c.pk for c in batch])
+            fields = fields or list(next(iter(stats.values())))
+            to_update = []
+            for company in batch:
+                values = stats[company.pk]
+                if all(
+                    float(getattr(company, field)) == float(value)
+                    for field, value in values.items()
+                ):
+                    continue
+                if dry_run:
+                    self.stdout.write(
+                        f"  - Company #{company.pk} ({company.name}): "
+                        f"{company.review_count} reviews / {company.rating} -> "
+                        f"{values['review_count']} reviews / {values['rating']}"
+                    )
+                for field, value in values.items():
+                    setattr(company, field, value)
+                to_update.append(company)
+
+            drifted += len(to_update)
+            if to_update and not dry_run:
+                # bulk_update skips save() and signals: no webp regeneration
+                Company.objects.bulk_update(to_update, fields)
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"DRY RUN: {drifted} of {checked} companies have drifted aggregates"
+                )
+            )
+            return
+
+        if drifted:
+            invalidate_tags(COMPANY_LIST_TAG)
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} companies, fixed {drifted}")
+        )
+        logger.info(f"Reconciled company stats: {drifted}/{checked} fixed")
@@ -4,13 +4,11 @@ Usage:
     python manage.py register_telegram_webhook
     python manage.py register_telegram_webhook --site-url https://fikrly.uz
 """
-import urllib.request
-import urllib.parse
-import json
-
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
+from frontend.telegram import TelegramError, get_telegram_client
+
 
 class Command(BaseCommand):
     help = "Register this server's /api/tg/webhook/ URL with the Telegram Bot API"
@@ -41,29 +39,17 @@ class Command(BaseCommand):
         # Use bot token as secret to verify incoming requests
         secret = getattr(settings, "TELEGRAM_WEBHOOK_SECRET", token)
 
-        payload = {
-            "url": webhook_url,
-            "allowed_updates": json.dumps(["callback_query", "message"]),
-            "secret_token": secret,
-            "drop_pending_updates": "true",
-        }
-
-        api_url = f"https://api.telegram.org/bot{token}/setWebhook"
-        data = urllib.parse.urlencode(payload).encode("utf-8")
-        req = urllib.request.Request(api_url, data=data)
-
         try:
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                result = json.loads(resp.read())
-        except Exception as exc:
-            self.stderr.write(self.style.ERROR(f"Request failed: {exc}"))
+            get_telegram_client(token).set_webhook(
+                webhook_url,
+                allowed_updates=["callback_query", "message"],
+                secret_token=secret,
+                drop_pending_updates="true",
+            )
+        except TelegramError as exc:
+            self.stderr.write(self.style.ERROR(f"❌ Telegram error: {exc}"))
             return
 
-        if result.get("ok"):
-            self.stdout.write(self.style.SUCCESS(
-                f"✅ Webhook registered: {webhook_url}"
-            ))
-        else:
-            self.stderr.write(self.style.ERROR(
-                f"❌ Telegram error: {result.get('description', result)}"
-            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Webhook registered: {webhook_url}"
+        ))
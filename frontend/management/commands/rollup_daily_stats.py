@@ -0,0 +1,46 @@
+"""
+Management command to fold raw activity into the daily rollup tables.
+Run it shortly after midnight (and hourly, it is cheap when there is
+nothing new): each run folds the closed days after the watermark,
+re-folds the last few before it and any older day changed by late
+moderation. See frontend/rollups.py.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from frontend.rollups import ROLLUP_REFOLD_DAYS, rollup_daily_stats, rollup_watermark
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Fold closed days of reviews, reveals, likes, users and companies into daily rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Refold from this day (YYYY-MM-DD) instead of the watermark",
+        )
+        parser.add_argument(
+            "--refold-days",
+            type=int,
+            default=ROLLUP_REFOLD_DAYS,
+            help=f"Closed days before the watermark folded again (default: {ROLLUP_REFOLD_DAYS})",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be a date like 2025-01-31")
+
+        folded = rollup_daily_stats(since=since, refold_days=max(0, options["refold_days"]))
+        self.stdout.write(
+            self.style.SUCCESS(f"Folded {folded} days; watermark is {rollup_watermark()}")
+        )
+        if folded:
+            logger.info(f"Rolled up {folded} days of activity")
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
 
+from frontend.analytics import platform_series
 from frontend.models import UserProfile, Review
 from frontend.utils import send_telegram_message
 
@@ -23,16 +25,24 @@ class Command(BaseCommand):
         verified_users = UserProfile.objects.filter(is_approved=True).count()
         unverified_users = max(total_users - verified_users, 0)
 
-        total_reviews = Review.objects.count()
-        verified_reviews = Review.objects.filter(is_approved=True).count()
+        reviews = Review.objects.aggregate(
+            total=Count("id"), verified=Count("id", filter=Q(is_approved=True))
+        )
+        total_reviews = reviews["total"]
+        verified_reviews = reviews["verified"]
         unverified_reviews = max(total_reviews - verified_reviews, 0)
 
+        # The report covers three days: new rows from the daily rollups
+        recent = platform_series(3)
+        new_users = sum(recent["new_users"])
+        new_reviews = sum(recent["reviews"])
+
         message = (
             "<b>📊 3-kunlik holat hisoboti</b>\n"
-            f"👤 Foydalanuvchilar: jami <b>{total_users}</b>\n"
+            f"👤 Foydalanuvchilar: jami <b>{total_users}</b> (+{new_users})\n"
             f"✅ Tasdiqlangan: <b>{verified_users}</b>\n"
             f"⏳ Tasdiqlanmagan: <b>{unverified_users}</b>\n\n"
-            f"📝 Sharhlar: jami <b>{total_reviews}</b>\n"
+            f"📝 Sharhlar: jami <b>{total_reviews}</b> (+{new_reviews})\n"
             f"✅ Tasdiqlangan: <b>{verified_reviews}</b>\n"
             f"⏳ Tasdiqlanmagan: <b>{unverified_reviews}</b>"
         )
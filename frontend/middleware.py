@@ -32,7 +32,11 @@ class UzbekDefaultLocaleMiddleware:
         response = self.get_response(request)
 
         # Keep the language cookie in sync so Django's set_language view and
-        # other per-request helpers see the correct value.
+        # other per-request helpers see the correct value. Only when it
+        # changes: a Set-Cookie makes the response unstorable for nginx.
+        if request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME) == lang:
+            translation.deactivate()
+            return response
         response.set_cookie(
             settings.LANGUAGE_COOKIE_NAME,
             lang,
@@ -49,7 +53,11 @@ class UzbekDefaultLocaleMiddleware:
 
 
 class NoCacheMiddleware(MiddlewareMixin):
-    """Disable client-side caching for HTML/JSON responses."""
+    """Disable client-side caching for HTML/JSON responses.
+
+    Views may set their own ``Cache-Control`` (see ``frontend.http_cache``);
+    that is kept, except under /accounts/ and for signed-in users.
+    """
 
     def process_response(self, request, response):
         if request.path.startswith("/accounts/"):
@@ -60,6 +68,10 @@ class NoCacheMiddleware(MiddlewareMixin):
             response["Expires"] = "0"
             return response
 
+        user = getattr(request, "user", None)
+        if response.has_header("Cache-Control") and not (user and user.is_authenticated):
+            return response
+
         content_type = response.get("Content-Type", "")
         if content_type.startswith("text/html") or content_type.startswith(
             "application/json"
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:03
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Company = apps.get_model("frontend", "Company")
+    Review = apps.get_model("frontend", "Review")
+    db_alias = schema_editor.connection.alias
+
+    buckets = defaultdict(dict)
+    rows = (
+        Review.objects.using(db_alias)
+        .filter(is_approved=True, rating__gte=1, rating__lte=5)
+        .values("company_id", "rating")
+        .annotate(n=Count("id"))
+    )
+    for row in rows:
+        buckets[row["company_id"]][row["rating"]] = row["n"]
+
+    fields = ["review_count", "rating", "rating_sum"] + [f"rating_{star}_count" for star in range(1, 6)]
+    batch = []
+    for company in Company.objects.using(db_alias).filter(pk__in=buckets).only("pk").iterator(chunk_size=500):
+        hist = buckets[company.pk]
+        company.review_count = sum(hist.values())
+        company.rating_sum = sum(star * n for star, n in hist.items())
+        company.rating = round(company.rating_sum / company.review_count, 2)
+        for star in range(1, 6):
+            setattr(company, f"rating_{star}_count", hist.get(star, 0))
+        batch.append(company)
+        if len(batch) >= 500:
+            Company.objects.using(db_alias).bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Company.objects.using(db_alias).bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0051_company_slug"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="rating_1_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="rating_2_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="rating_3_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="rating_4_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="rating_5_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
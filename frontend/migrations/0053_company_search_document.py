@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+
+def backfill_search_documents(apps, schema_editor):
+    from frontend.search import company_search_document
+
+    Company = apps.get_model("frontend", "Company")
+    db_alias = schema_editor.connection.alias
+
+    batch = []
+    companies = Company.objects.using(db_alias).select_related("category_fk")
+    for company in companies.iterator(chunk_size=500):
+        company.search_document = company_search_document(company)
+        batch.append(company)
+        if len(batch) >= 500:
+            Company.objects.using(db_alias).bulk_update(batch, ["search_document"])
+            batch = []
+    if batch:
+        Company.objects.using(db_alias).bulk_update(batch, ["search_document"])
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS frontend_company_search_trgm "
+        "ON frontend_company USING gin (search_document gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS frontend_company_search_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0052_company_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0053_company_search_document"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                fields=["is_active", "-rating", "-review_count", "-id"],
+                name="frontend_co_is_acti_542c57_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                fields=["is_active", "-created_at", "-id"],
+                name="frontend_co_is_acti_93966e_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0054_company_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["company", "is_approved", "-like_count", "-created_at", "-id"],
+                name="frontend_re_company_c275d5_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["company", "is_approved", "-rating", "-created_at", "-id"],
+                name="frontend_re_company_366283_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["company", "is_approved", "rating", "-created_at", "-id"],
+                name="frontend_re_company_70997a_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0056_outbound_message"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataexport",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="dataexport",
+            index=models.Index(
+                fields=["status", "created_at"], name="frontend_export_queue_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0057_data_export_worker"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataexport",
+            name="progress",
+            field=models.PositiveSmallIntegerField(default=0, help_text="Percent done"),
+        ),
+    ]
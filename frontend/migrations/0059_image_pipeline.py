@@ -0,0 +1,112 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0058_data_export_progress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageAsset",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        help_text="Storage name of the original",
+                        max_length=255,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "profile",
+                    models.CharField(
+                        choices=[
+                            ("company", "Company image"),
+                            ("logo", "Company logo"),
+                            ("avatar", "Avatar"),
+                            ("review", "Review image"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(blank=True, db_index=True, max_length=64),
+                ),
+                ("width", models.PositiveIntegerField(blank=True, null=True)),
+                ("height", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processing", "Processing"),
+                            ("ready", "Ready"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Image Asset",
+                "verbose_name_plural": "Image Assets",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"], name="frontend_image_queue_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ImageVariant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("content_hash", models.CharField(max_length=64)),
+                ("format", models.CharField(max_length=10)),
+                ("width", models.PositiveIntegerField()),
+                ("height", models.PositiveIntegerField()),
+                ("file", models.FileField(max_length=255, upload_to="image_variants/")),
+                ("size", models.PositiveIntegerField(help_text="Bytes")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Image Variant",
+                "verbose_name_plural": "Image Variants",
+                "ordering": ["content_hash", "format", "width"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("content_hash", "format", "width"),
+                        name="frontend_image_variant_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0059_image_pipeline"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0060_review_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyPlatformStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("new_users", models.PositiveIntegerField(default=0)),
+                ("new_companies", models.PositiveIntegerField(default=0)),
+                (
+                    "reviews",
+                    models.PositiveIntegerField(
+                        default=0, help_text="All reviews created that day"
+                    ),
+                ),
+                ("approved_reviews", models.PositiveIntegerField(default=0)),
+                ("contact_reveals", models.PositiveIntegerField(default=0)),
+                ("likes", models.PositiveIntegerField(default=0)),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("rolled_up_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Daily Platform Stats",
+                "verbose_name_plural": "Daily Platform Stats",
+                "ordering": ["-date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyCompanyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "reviews",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Approved reviews created that day"
+                    ),
+                ),
+                (
+                    "rating_sum",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Sum of their ratings"
+                    ),
+                ),
+                ("contact_reveals", models.PositiveIntegerField(default=0)),
+                ("likes", models.PositiveIntegerField(default=0)),
+                ("views", models.PositiveIntegerField(default=0)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="frontend.company",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Company Stats",
+                "verbose_name_plural": "Daily Company Stats",
+                "ordering": ["-date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("company", "date"), name="frontend_daily_company_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:01
+
+from datetime import datetime, timezone as dt_timezone
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = "frontend_activitylog"
+OLD = "frontend_activitylog_unpartitioned"
+MONTHS_AHEAD = 2  # frontend.activity_log.ACTIVITY_PARTITIONS_AHEAD
+
+
+def _month(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_by_month(apps, schema_editor):
+    """
+    PostgreSQL only: rebuild the table as ``PARTITION BY RANGE (created_at)``
+    with one partition per UTC month (from the oldest row to two months
+    ahead) and a default partition. The primary key becomes
+    ``(id, created_at)``, as a partitioned table requires; Django still
+    treats ``id`` as the key. Indexes and foreign keys keep their names.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        if cursor.fetchone()[0] == "p":
+            return
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, f"{TABLE}_pkey"],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+
+        # Move the old table and everything named after it out of the way
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD}")
+        cursor.execute(f"ALTER TABLE {OLD} RENAME CONSTRAINT {TABLE}_pkey TO {OLD}_pkey")
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE {OLD} DROP CONSTRAINT "{name}"')
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+        cursor.execute(f"ALTER TABLE {OLD} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {OLD} ALTER COLUMN id DROP DEFAULT")
+        cursor.execute(f"DROP SEQUENCE IF EXISTS {TABLE}_id_seq")
+
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {OLD} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, created_at)")
+
+        cursor.execute(f"SELECT MIN(created_at), NOW() FROM {OLD}")
+        first, now = cursor.fetchone()
+        month, last = _month(first or now), _add_months(_month(now), MONTHS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y_%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, _add_months(month, 1)],
+            )
+            month = _add_months(month, 1)
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD}")
+        cursor.execute(
+            f"SELECT setval('{TABLE}_id_seq', COALESCE((SELECT MAX(id) FROM {TABLE}), 0) + 1, false)"
+        )
+        # Created on the parent, so every partition (present and future) gets them
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+        cursor.execute(f"DROP TABLE {OLD}")
+
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0061_daily_stats_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activitylog",
+            index=models.Index(
+                fields=["company", "action", "created_at"],
+                name="frontend_ac_company_b5fa26_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="activitylog",
+            name="company",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="activity_logs",
+                to="frontend.company",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="activitylog",
+            name="created_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now, editable=False
+            ),
+        ),
+        # The partitioned table works with the earlier schema too, so
+        # unapplying leaves it in place
+        migrations.RunPython(partition_by_month, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("frontend", "0062_activitylog_partitioning"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataexport",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(
+                default=0, help_text="Times a worker claimed it"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dataexport",
+            name="started_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Claimed at; refreshed while the job reports progress",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import get_language
 from django.utils.functional import cached_property
@@ -82,7 +83,7 @@ class Company(models.Model):
     description = models.TextField(blank=True)
     image_url = models.URLField(blank=True)
     image = models.ImageField(upload_to="company_images/", blank=True, null=True)
-    # Generated optimized images (WEBP) in multiple sizes
+    # WEBP variants of `image`, filled in by the image worker (frontend/image_pipeline.py)
     image_400 = models.ImageField(
         upload_to="company_images/variants/", blank=True, null=True
     )
@@ -179,6 +180,14 @@ class Company(models.Model):
     )
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
     review_count = models.PositiveIntegerField(default=0)
+    # Running aggregates over approved reviews, maintained with F() deltas
+    # (see utils.apply_review_stats_change); rating = rating_sum / review_count
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
     like_count = models.PositiveIntegerField(default=0)
     view_count = models.PositiveIntegerField(default=0)
     slug = models.SlugField(
@@ -187,6 +196,9 @@ class Company(models.Model):
         blank=True,
         help_text=_("SEO-friendly URL segment, avto-yaratiladi"),
     )
+    # Normalized uz/ru names, descriptions, city and category names; trigram
+    # GIN-indexed on PostgreSQL (see frontend.search)
+    search_document = models.TextField(blank=True, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -202,6 +214,9 @@ class Company(models.Model):
             models.Index(fields=["city", "is_active"]),
             # Verified filtering
             models.Index(fields=["is_verified", "is_active"]),
+            # Keyset pagination sort keys (see views.company.BUSINESS_LIST_KEYSETS)
+            models.Index(fields=["is_active", "-rating", "-review_count", "-id"]),
+            models.Index(fields=["is_active", "-created_at", "-id"]),
         ]
 
     def __str__(self) -> str:
@@ -241,47 +256,15 @@ class Company(models.Model):
         if self.logo_url:
             self.logo_url_backup = self.logo_url
 
-        # If a new image file was uploaded, generate WEBP variants.
-        try:
-            # detect new upload by checking if `image` has a file-like object
-            new_image = (
-                getattr(self, "image")
-                and hasattr(self.image, "file")
-                and getattr(self.image.file, "closed", False) is False
-            )
-        except Exception:
-            new_image = False
+        from .search import SEARCH_SOURCE_FIELDS, company_search_document
 
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or set(update_fields) & set(SEARCH_SOURCE_FIELDS):
+            self.search_document = company_search_document(self)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "search_document"}
 
-        # Post-save: generate variants only when an image exists
-        if self.image and new_image:
-            try:
-                from .utils.images import generate_webp_versions
-
-                files = generate_webp_versions(self.image)
-                changed = False
-                if 400 in files:
-                    fname = f"{self.pk}_400.webp"
-                    self.image_400.save(fname, files[400], save=False)
-                    changed = True
-                if 800 in files:
-                    fname = f"{self.pk}_800.webp"
-                    self.image_800.save(fname, files[800], save=False)
-                    changed = True
-                if 1200 in files:
-                    fname = f"{self.pk}_1200.webp"
-                    self.image_1200.save(fname, files[1200], save=False)
-                    changed = True
-
-                if changed:
-                    # Avoid recursion by using update_fields on file fields
-                    super(Company, self).save(
-                        update_fields=["image_400", "image_800", "image_1200"]
-                    )
-            except Exception:
-                # Fail silently — preserve original upload if generation fails
-                pass
+        super().save(*args, **kwargs)
 
     def _generate_unique_slug(self):
         from django.utils.text import slugify
@@ -305,6 +288,21 @@ class Company(models.Model):
                 qs = qs.exclude(pk=self.pk)
         return slug
 
+    @property
+    def rating_counts(self) -> dict:
+        """Approved reviews per star ``{1: n, ..., 5: n}`` from the stored histogram."""
+        return {star: getattr(self, f"rating_{star}_count") for star in range(1, 6)}
+
+    @property
+    def rating_distribution(self) -> list:
+        """Histogram rows from 5 down to 1 star with rounded percentages."""
+        counts = self.rating_counts
+        total = sum(counts.values()) or 1
+        return [
+            {"star": star, "count": counts[star], "percent": round(counts[star] / total * 100)}
+            for star in range(5, 0, -1)
+        ]
+
     @property
     def display_description(self):
         lang = get_language()
@@ -372,6 +370,8 @@ class Review(models.Model):
     owner_response_text = models.TextField(blank=True)
     owner_response_at = models.DateTimeField(null=True, blank=True)
     like_count = models.PositiveIntegerField(default=0)
+    # Keys the cached review card fragment; counter updates (likes, votes) skip it
+    updated_at = models.DateTimeField(auto_now=True)
     # Helpful votes
     helpful_count = models.PositiveIntegerField(default=0, db_index=True)
     not_helpful_count = models.PositiveIntegerField(default=0)
@@ -382,6 +382,10 @@ class Review(models.Model):
             models.Index(fields=["company", "is_approved", "-created_at"]),
             models.Index(fields=["user", "is_approved", "-created_at"]),
             models.Index(fields=["company", "is_approved", "-helpful_count"]),
+            # Review feed sort keys (see review_feed.REVIEW_FEED_SORTS)
+            models.Index(fields=["company", "is_approved", "-like_count", "-created_at", "-id"]),
+            models.Index(fields=["company", "is_approved", "-rating", "-created_at", "-id"]),
+            models.Index(fields=["company", "is_approved", "rating", "-created_at", "-id"]),
         ]
         constraints = [
             # One review per authenticated user per company (NULLs are excluded by the DB)
@@ -494,6 +498,13 @@ class ReviewHelpfulVote(models.Model):
     def __str__(self):
         return f"{self.user_id} -> Review {self.review_id} ({self.vote_type})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the gamification signal turn a changed vote into a delta
+        instance._loaded_vote_type = instance.__dict__.get("vote_type")
+        return instance
+
 
 class UserProfile(models.Model):
     user = models.OneToOneField(
@@ -543,6 +554,7 @@ class ActivityLog(models.Model):
         blank=True,
         on_delete=models.SET_NULL,
         related_name="activity_logs",
+        db_index=False,  # leading column of the (company, action, created_at) index
     )
     review = models.ForeignKey(
         Review,
@@ -552,10 +564,13 @@ class ActivityLog(models.Model):
         related_name="activity_logs",
     )
     details = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Not auto_now_add: buffered rows keep the time of the action
+    # (frontend.activity_log). On PostgreSQL the table is partitioned by it.
+    created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["company", "action", "created_at"])]
 
     def __str__(self) -> str:
         return f"{self.created_at:%Y-%m-%d %H:%M} {self.action} by {getattr(self.actor, 'username', 'system')}"
@@ -729,59 +744,31 @@ class UserGamification(models.Model):
     @property
     def next_level_xp(self):
         """Calculate XP needed for next level"""
-        return self.level * 100  # 100 XP per level
+        from .gamification import XP_PER_LEVEL
+
+        return self.level * XP_PER_LEVEL
 
     @property
     def xp_progress(self):
         """Calculate progress to next level (0-100)"""
-        current_level_xp = (self.level - 1) * 100
-        xp_in_level = self.xp - current_level_xp
-        return min(100, (xp_in_level / 100) * 100)
+        from .gamification import XP_PER_LEVEL
 
-    def add_xp(self, amount, reason=""):
-        """Add XP and level up if needed"""
-        self.xp += amount
-
-        # Check for level up
-        while self.xp >= self.next_level_xp:
-            self.level += 1
-            # Award badge for level milestones
-            if self.level in [5, 10, 25, 50, 100]:
-                Badge.objects.get_or_create(
-                    user=self.user,
-                    badge_type=f"level_{self.level}",
-                    defaults={
-                        "name": f"Level {self.level} Master",
-                        "description": f"Reached level {self.level}",
-                        "icon": "🎯",
-                    },
-                )
-
-        self.save()
-
-    def update_streak(self):
-        """Update activity streak"""
-        from datetime import date, timedelta
+        xp_in_level = self.xp - (self.level - 1) * XP_PER_LEVEL
+        return min(100, xp_in_level * 100 / XP_PER_LEVEL)
 
-        today = date.today()
+    def _apply(self, **deltas):
+        from .gamification import apply_progress
 
-        if self.last_activity_date:
-            days_diff = (today - self.last_activity_date).days
+        for name, value in apply_progress(self.user_id, **deltas).items():
+            setattr(self, name, value)
 
-            if days_diff == 1:
-                # Consecutive day
-                self.current_streak += 1
-                if self.current_streak > self.longest_streak:
-                    self.longest_streak = self.current_streak
-            elif days_diff > 1:
-                # Streak broken
-                self.current_streak = 1
-            # Same day - no change
-        else:
-            self.current_streak = 1
+    def add_xp(self, amount, reason=""):
+        """Add XP; the level follows in the same UPDATE (see frontend.gamification)"""
+        self._apply(xp=amount)
 
-        self.last_activity_date = today
-        self.save()
+    def update_streak(self):
+        """Record activity today for the streak"""
+        self._apply(active=True)
 
 
 class Badge(models.Model):
@@ -919,7 +906,12 @@ class DataExport(models.Model):
         default=dict, help_text="Export filters (company_id, date_range, etc.)"
     )
     error_message = models.TextField(blank=True)
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent done")
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Times a worker claimed it")
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(
+        null=True, blank=True, help_text="Claimed at; refreshed while the job reports progress"
+    )
     completed_at = models.DateTimeField(null=True, blank=True)
     expires_at = models.DateTimeField(
         null=True, blank=True, help_text="File auto-deletes after this date (7 days)"
@@ -929,6 +921,186 @@ class DataExport(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Data Export"
         verbose_name_plural = "Data Exports"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="frontend_export_queue_idx"),
+        ]
+
+    EXPORT_FORMATS = {
+        "reviews_pdf": "pdf",
+        "reviews_excel": "xlsx",
+        "user_data": "json",
+        "business_data": "csv",
+    }
 
     def __str__(self):
         return f"{self.user.username} - {self.export_type} - {self.status}"
+
+    @property
+    def format(self) -> str:
+        return self.EXPORT_FORMATS.get(self.export_type, "")
+
+
+class OutboundMessage(models.Model):
+    """Outbox row for a Telegram or email notification awaiting delivery.
+
+    Written in the same transaction as the change that triggers it and
+    delivered by ``manage.py process_outbox`` (see ``frontend/outbox.py``).
+    """
+
+    CHANNEL_CHOICES = [
+        ("telegram", "Telegram"),
+        ("email", "Email"),
+    ]
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=8)
+    # Due time for pending rows; also serves as the lease while a worker holds the row
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Outbound Message"
+        verbose_name_plural = "Outbound Messages"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="frontend_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} #{self.pk} - {self.status}"
+
+
+class ImageAsset(models.Model):
+    """An uploaded image file and the state of its derivative generation.
+
+    Queued by the upload signals and processed by ``manage.py process_images``
+    (see ``frontend/image_pipeline.py``). Variants are keyed by the content
+    hash, so the same picture uploaded twice is only encoded once.
+    """
+
+    PROFILE_CHOICES = [
+        ("company", "Company image"),
+        ("logo", "Company logo"),
+        ("avatar", "Avatar"),
+        ("review", "Review image"),
+    ]
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    ]
+
+    source = models.CharField(max_length=255, unique=True, help_text="Storage name of the original")
+    profile = models.CharField(max_length=20, choices=PROFILE_CHOICES)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Image Asset"
+        verbose_name_plural = "Image Assets"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="frontend_image_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.source} - {self.status}"
+
+
+class ImageVariant(models.Model):
+    """One encoded size/format of an original, shared by every asset with the same content."""
+
+    content_hash = models.CharField(max_length=64)
+    format = models.CharField(max_length=10)  # "webp" or "avif"
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.FileField(upload_to="image_variants/", max_length=255)
+    size = models.PositiveIntegerField(help_text="Bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["content_hash", "format", "width"]
+        verbose_name = "Image Variant"
+        verbose_name_plural = "Image Variants"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_hash", "format", "width"], name="frontend_image_variant_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} {self.width}w {self.format}"
+
+
+class DailyCompanyStats(models.Model):
+    """One company's activity on one day (local time).
+
+    Folded in from the raw tables by ``manage.py rollup_daily_stats`` (see
+    ``frontend/rollups.py``), except ``views``, which the view-count flush
+    adds as it writes ``Company.view_count``.
+    """
+
+    company = models.ForeignKey(Company, related_name="daily_stats", on_delete=models.CASCADE)
+    date = models.DateField()
+    reviews = models.PositiveIntegerField(default=0, help_text="Approved reviews created that day")
+    rating_sum = models.PositiveIntegerField(default=0, help_text="Sum of their ratings")
+    contact_reveals = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name = "Daily Company Stats"
+        verbose_name_plural = "Daily Company Stats"
+        constraints = [
+            models.UniqueConstraint(fields=["company", "date"], name="frontend_daily_company_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id} {self.date}"
+
+
+class DailyPlatformStats(models.Model):
+    """Site-wide activity on one day (local time); see ``DailyCompanyStats``.
+
+    ``rolled_up_at`` is set once the rollup command has folded in the whole
+    day; the newest such row is the watermark. Rows without it hold views
+    of the current day, or are older days marked to be folded again.
+    """
+
+    date = models.DateField(unique=True)
+    new_users = models.PositiveIntegerField(default=0)
+    new_companies = models.PositiveIntegerField(default=0)
+    reviews = models.PositiveIntegerField(default=0, help_text="All reviews created that day")
+    approved_reviews = models.PositiveIntegerField(default=0)
+    contact_reveals = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+    rolled_up_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name = "Daily Platform Stats"
+        verbose_name_plural = "Daily Platform Stats"
+
+    def __str__(self):
+        return str(self.date)
@@ -4,16 +4,22 @@ Admin moderation dashboard, verification system, and data export utilities
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse, HttpResponse, FileResponse
+from django.contrib import messages
+from django.http import (
+    JsonResponse,
+    HttpResponse,
+    HttpResponseForbidden,
+    FileResponse,
+    Http404,
+)
 from django.db.models import Q, Count
 from django.utils import timezone
 from django.conf import settings
-from datetime import timedelta
 from .models import Review, Company, ReviewFlag, DataExport, UserProfile
 import re
-import io
 from pathlib import Path
 
 
@@ -118,13 +124,10 @@ def bulk_moderate_reviews(request):
         reviews = Review.objects.filter(id__in=review_ids)
 
         if action == "approve":
-            company_ids = list(reviews.values_list("company_id", flat=True).distinct())
-            approved_reviews = list(reviews.select_related("user", "company"))
-            count = reviews.update(is_approved=True)
-            from .utils import recalculate_company_stats
+            approved_reviews = list(reviews.filter(is_approved=False).select_related("user", "company"))
+            from .utils import set_reviews_approval
             from .email_notifications import EmailNotificationService
-            for cid in company_ids:
-                recalculate_company_stats(cid)
+            count = set_reviews_approval(reviews, approved=True)
             for r in approved_reviews:
                 try:
                     EmailNotificationService.send_review_approved_notification(r)
@@ -139,19 +142,16 @@ def bulk_moderate_reviews(request):
             )
 
         elif action == "reject":
-            company_ids = list(reviews.values_list("company_id", flat=True).distinct())
             rejected_reviews = list(reviews.select_related("user", "company"))
             count = reviews.count()
-            from .utils import recalculate_company_stats
             from .email_notifications import EmailNotificationService
             for r in rejected_reviews:
                 try:
                     EmailNotificationService.send_review_rejected_notification(r)
                 except Exception:
                     pass
+            # post_delete signals fold each deletion into company aggregates
             reviews.delete()
-            for cid in company_ids:
-                recalculate_company_stats(cid)
             return JsonResponse(
                 {
                     "success": True,
@@ -161,12 +161,8 @@ def bulk_moderate_reviews(request):
             )
 
         elif action == "spam":
-            company_ids = list(reviews.values_list("company_id", flat=True).distinct())
             count = reviews.count()
             reviews.delete()
-            from .utils import recalculate_company_stats
-            for cid in company_ids:
-                recalculate_company_stats(cid)
             return JsonResponse(
                 {
                     "success": True,
@@ -321,116 +317,41 @@ def approve_verification(request, company_id):
 
 @login_required
 def export_reviews_pdf(request, company_id):
-    """Export company reviews to PDF"""
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import (
-            SimpleDocTemplate,
-            Table,
-            TableStyle,
-            Paragraph,
-            Spacer,
-        )
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
-
-        company = get_object_or_404(Company, id=company_id)
-        reviews = (
-            Review.objects.filter(company=company, is_approved=True)
-            .select_related("user")
-            .order_by("-created_at")
-        )
-
-        # Create PDF buffer
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-
-        # Container for elements
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Title
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=24,
-            textColor=colors.HexColor("#00d68b"),
-            spaceAfter=30,
-        )
-
-        elements.append(Paragraph(f"Reviews - {company.name}", title_style))
-        elements.append(Spacer(1, 0.2 * inch))
-
-        # Company info
-        info_style = styles["Normal"]
-        elements.append(
-            Paragraph(f"<b>Total Reviews:</b> {reviews.count()}", info_style)
-        )
-        elements.append(
-            Paragraph(
-                f"<b>Average Rating:</b> {company.rating}/5.0", info_style
-            )
-        )
-        elements.append(
-            Paragraph(
-                f"<b>Generated:</b> {timezone.now().strftime('%Y-%m-%d %H:%M')}",
-                info_style,
-            )
-        )
-        elements.append(Spacer(1, 0.3 * inch))
-
-        # Reviews table
-        data = [["Date", "User", "Rating", "Review"]]
-
-        for review in reviews[:100]:  # Limit to 100 reviews
-            user_name = review.user.get_full_name() if review.user else "Anonymous"
-            review_text = (
-                review.text[:200] + "..." if len(review.text) > 200 else review.text
-            )
+    """Export company reviews to PDF (large companies go through the export worker)"""
+    from .export_jobs import ExportDenied, validate_export_request
+    from .exports import PDF_INLINE_MAX_ROWS, pdf_response
 
-            data.append(
-                [
-                    review.created_at.strftime("%Y-%m-%d"),
-                    user_name,
-                    f"{review.rating}/5",
-                    review_text,
-                ]
-            )
+    company = get_object_or_404(Company, id=company_id)
+    filters = {"company_id": str(company.pk)}
+    # Manager/staff check first, whichever way the file is produced
+    try:
+        validate_export_request(request.user, "reviews_pdf", filters)
+    except ExportDenied as e:
+        return HttpResponseForbidden(str(e))
+    reviews = Review.objects.filter(company=company, is_approved=True).order_by(
+        "-created_at"
+    )
 
-        table = Table(data, colWidths=[1.2 * inch, 1.5 * inch, 0.8 * inch, 4 * inch])
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 10),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                    ("FONTSIZE", (0, 1), (-1, -1), 8),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ]
+    if reviews.count() > PDF_INLINE_MAX_ROWS:
+        # Too long to render inside gunicorn's timeout: hand it to process_data_exports
+        queued = DataExport.objects.filter(
+            user=request.user,
+            export_type="reviews_pdf",
+            filters__company_id=filters["company_id"],
+            status__in=("pending", "processing"),
+        ).exists()
+        if not queued:
+            DataExport.objects.create(
+                user=request.user, export_type="reviews_pdf", filters=filters
             )
+        messages.success(
+            request,
+            "Sharhlar ko'p, PDF fonda tayyorlanmoqda. Tayyor bo'lganda email yuboriladi.",
         )
+        return redirect("request_data_export")
 
-        elements.append(table)
-
-        # Build PDF
-        doc.build(elements)
-
-        # Return response
-        buffer.seek(0)
-        response = FileResponse(
-            buffer, as_attachment=True, filename=f"{company.name}_reviews.pdf"
-        )
-        response["Content-Type"] = "application/pdf"
-
-        return response
+    try:
+        return pdf_response(company, reviews, f"{company.name}_reviews.pdf")
 
     except Exception as e:
         return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
@@ -439,213 +360,113 @@ def export_reviews_pdf(request, company_id):
 @login_required
 def export_reviews_excel(request, company_id):
     """Export company reviews to Excel"""
-    try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, PatternFill
-
-        company = get_object_or_404(Company, id=company_id)
-        reviews = (
-            Review.objects.filter(company=company, is_approved=True)
-            .select_related("user")
-            .order_by("-created_at")
-        )
+    from .export_jobs import ExportDenied, validate_export_request
+    from .exports import REVIEW_EXPORT_COLUMNS, xlsx_response
 
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Reviews"
-
-        # Headers
-        headers = [
-            "Date",
-            "User",
-            "Rating",
-            "Title",
-            "Review",
-            "Helpful Votes",
-            "Response",
-        ]
-        ws.append(headers)
-
-        # Style headers
-        header_fill = PatternFill(
-            start_color="00D68B", end_color="00D68B", fill_type="solid"
-        )
-        header_font = Font(bold=True, color="FFFFFF")
-
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        # Add data
-        for review in reviews:
-            user_name = review.user.get_full_name() if review.user else "Anonymous"
-            ws.append(
-                [
-                    review.created_at.strftime("%Y-%m-%d %H:%M"),
-                    user_name,
-                    review.rating,
-                    review.title or "",
-                    review.text,
-                    review.helpful_count,
-                    review.owner_response_text or "",
-                ]
-            )
+    company = get_object_or_404(Company, id=company_id)
+    try:
+        validate_export_request(request.user, "reviews_excel", {"company_id": str(company.pk)})
+    except ExportDenied as e:
+        return HttpResponseForbidden(str(e))
 
-        # Adjust column widths
-        ws.column_dimensions["A"].width = 18
-        ws.column_dimensions["B"].width = 20
-        ws.column_dimensions["C"].width = 10
-        ws.column_dimensions["D"].width = 30
-        ws.column_dimensions["E"].width = 50
-        ws.column_dimensions["F"].width = 12
-        ws.column_dimensions["G"].width = 50
-
-        # Save to buffer
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-
-        response = HttpResponse(
-            buffer.read(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    try:
+        reviews = Review.objects.filter(company=company, is_approved=True).order_by(
+            "-created_at"
         )
-        response["Content-Disposition"] = (
-            f"attachment; filename={company.name}_reviews.xlsx"
+        return xlsx_response(
+            reviews, REVIEW_EXPORT_COLUMNS, f"{company.name}_reviews.xlsx", title="Reviews"
         )
 
-        return response
-
     except Exception as e:
         return HttpResponse(f"Error generating Excel: {str(e)}", status=500)
 
 
 @login_required
 def export_user_data(request):
-    """Export user's personal data (GDPR compliance)"""
-    try:
-        import json
-        from openpyxl import Workbook
-
-        user = request.user
-
-        # Gather user data
-        user_data = {
-            "personal_info": {
-                "username": user.username,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "date_joined": user.date_joined.isoformat(),
-                "last_login": user.last_login.isoformat() if user.last_login else None,
-            },
-            "profile": {},
-            "reviews": [],
-            "companies": [],
-            "badges": [],
-        }
-
-        # Profile data
-        if hasattr(user, "profile"):
-            profile = user.profile
-            user_data["profile"] = {
-                "bio": profile.bio,
-                "phone": profile.phone,
-                "city": profile.city,
-            }
-
-        # Reviews
-        reviews = Review.objects.filter(user=user)
-        user_data["reviews"] = [
-            {
-                "company": r.company.name,
-                "rating": r.rating,
-                "title": r.title,
-                "text": r.text,
-                "date": r.created_at.isoformat(),
-            }
-            for r in reviews
-        ]
-
-        # Managed companies
-        companies = Company.objects.filter(manager=user)
-        user_data["companies"] = [
-            {
-                "name": c.name,
-                "category": c.category_fk.name if c.category_fk else c.category,
-                "rating": float(c.rating),
-                "review_count": c.review_count,
-            }
-            for c in companies
-        ]
-
-        # Gamification badges
-        if hasattr(user, "badges"):
-            user_data["badges"] = [
-                {
-                    "name": b.name,
-                    "description": b.description,
-                    "earned_at": b.earned_at.isoformat(),
-                }
-                for b in user.badges.all()
-            ]
-
-        # Create JSON file
-        buffer = io.BytesIO()
-        json_str = json.dumps(user_data, indent=2, ensure_ascii=False)
-        buffer.write(json_str.encode("utf-8"))
-        buffer.seek(0)
-
-        response = HttpResponse(buffer.read(), content_type="application/json")
-        response["Content-Disposition"] = (
-            f"attachment; filename={user.username}_data.json"
-        )
-
-        return response
-
-    except Exception as e:
-        return HttpResponse(f"Error exporting data: {str(e)}", status=500)
+    """Export user's personal data (GDPR compliance) as a background JSON job"""
+    export = DataExport.objects.filter(
+        user=request.user, export_type="user_data", status__in=("pending", "processing")
+    ).first()
+    if export is None:
+        DataExport.objects.create(user=request.user, export_type="user_data")
+    messages.success(
+        request, "Export yaratilmoqda. Tayyor bo'lganda email yuboriladi."
+    )
+    return redirect("request_data_export")
 
 
 @login_required
 def request_data_export(request):
-    """Request async data export (for large datasets)"""
+    """Request async data export (processed by ``manage.py process_data_exports``)"""
+    from .export_jobs import ExportDenied, validate_export_request
+
     if request.method == "POST":
         export_type = request.POST.get("export_type")
         company_id = request.POST.get("company_id")
+        wants_json = request.headers.get("x-requested-with") == "XMLHttpRequest"
 
         filters = {}
         if company_id:
             filters["company_id"] = company_id
 
-        # Create export request
+        try:
+            validate_export_request(request.user, export_type, filters)
+        except ExportDenied as e:
+            if wants_json:
+                return JsonResponse({"success": False, "error": str(e)}, status=400)
+            messages.error(request, str(e))
+            return redirect("request_data_export")
+
         export = DataExport.objects.create(
             user=request.user,
             export_type=export_type,
             filters=filters,
-            expires_at=timezone.now() + timedelta(days=7),
         )
 
-        # In production, trigger async task with Celery
-        # For now, return success
-
-        return JsonResponse(
-            {
-                "success": True,
-                "message": "Export yaratilmoqda. Tayyor bo'lganda email yuboriladi.",
-                "export_id": export.id,
-            }
-        )
+        message = "Export yaratilmoqda. Tayyor bo'lganda email yuboriladi."
+        if wants_json:
+            return JsonResponse(
+                {"success": True, "message": message, "export_id": export.id}
+            )
+        messages.success(request, message)
+        return redirect("request_data_export")
 
     # Show export options
     exports = DataExport.objects.filter(user=request.user).order_by("-created_at")[:10]
+    companies = Company.objects.filter(manager=request.user).only("id", "name")
 
-    context = {"exports": exports}
+    context = {"exports": exports, "managed_companies": companies}
 
     return render(request, "frontend/request_export.html", context)
 
 
+@login_required
+def download_data_export(request, export_id):
+    """Serve a finished export to the user who requested it"""
+    export = get_object_or_404(
+        DataExport, pk=export_id, user=request.user, status="completed"
+    )
+    if not export.file or (export.expires_at and export.expires_at < timezone.now()):
+        raise Http404
+    return FileResponse(
+        export.file.open("rb"),
+        as_attachment=True,
+        filename=f"fikrly_{export.export_type}_{export.pk}.{export.format}",
+    )
+
+
+@login_required
+def data_export_status(request, export_id):
+    """Status and progress of one of the user's exports (polled by request_export.html)"""
+    export = get_object_or_404(DataExport, pk=export_id, user=request.user)
+    data = {"id": export.pk, "status": export.status, "progress": export.progress}
+    if export.status == "completed" and export.file:
+        data["download_url"] = reverse("download_data_export", args=[export.pk])
+    elif export.status == "failed":
+        data["error"] = export.error_message
+    return JsonResponse(data)
+
+
 # ---------------------------------------------------------------------------
 # Telegram Bot Webhook — handles Approve / Reject button presses
 # ---------------------------------------------------------------------------
@@ -666,7 +487,6 @@ def telegram_webhook(request):
     from django.conf import settings
     from .models import Review
     from .utils import answer_telegram_callback, edit_telegram_message
-    from .cache_utils import clear_public_cache
 
     token = getattr(settings, "TELEGRAM_BOT_TOKEN", "")
     if not token:
@@ -719,10 +539,6 @@ def telegram_webhook(request):
         review.is_approved = True
         review.approval_requested = True
         review.save(update_fields=["is_approved", "approval_requested"])
-        # Recalculate company stats
-        from .utils import recalculate_company_stats
-        recalculate_company_stats(review.company_id)
-        clear_public_cache()
         # Notify author
         try:
             EmailNotificationService.send_review_approved_notification(review)
@@ -748,7 +564,6 @@ def telegram_webhook(request):
         except Exception:
             pass
         review.delete()
-        clear_public_cache()
         answer_telegram_callback(cq_id, "🗑 Sharh o'chirildi.", token)
         new_text = (
             f"❌ <b>O'chirildi</b> — {actor_name}\n\n"
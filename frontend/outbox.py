@@ -0,0 +1,241 @@
+"""
+Transactional outbox for Telegram and email notifications.
+
+Views and signals call :func:`enqueue_telegram` / :func:`enqueue_email`,
+which only INSERT an ``OutboundMessage`` row in the caller's transaction:
+if the triggering write rolls back so does the notification, and the
+request never waits on Telegram or SMTP.
+
+``manage.py process_outbox`` claims due rows (``SELECT ... FOR UPDATE SKIP
+LOCKED`` on PostgreSQL, so several workers can run side by side), delivers
+them on a thread pool and reschedules failures with exponential backoff
+until ``max_attempts`` is reached.
+"""
+
+import logging
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_LEASE = 300  # seconds a claimed row stays hidden from other workers
+OUTBOX_BACKOFF_BASE = 30  # first retry delay, doubled per attempt
+OUTBOX_BACKOFF_MAX = 60 * 60 * 6
+
+
+class PermanentDeliveryError(Exception):
+    """Delivery can never succeed (bad chat id, blocked bot): do not retry."""
+
+
+class RetryAfter(Exception):
+    """The remote side asked us to wait ``seconds`` before trying again."""
+
+    def __init__(self, seconds, message=""):
+        super().__init__(message or f"retry after {seconds}s")
+        self.seconds = seconds
+
+
+# ---------------------------------------------------------------------------
+# Enqueueing
+# ---------------------------------------------------------------------------
+
+
+def enqueue_telegram(chat_id, text, *, reply_markup=None, photo=None):
+    """Queue one Telegram message; ``photo`` is a media storage name sent via sendPhoto."""
+    from .models import OutboundMessage
+
+    if not getattr(settings, "TELEGRAM_BOT_TOKEN", ""):
+        return None
+    return OutboundMessage.objects.create(
+        channel="telegram",
+        payload={
+            "chat_id": str(chat_id),
+            "text": text,
+            "reply_markup": reply_markup,
+            "photo": photo,
+        },
+    )
+
+
+def enqueue_email(subject, body, to, *, html=None, from_email=None):
+    """Queue an email (plain ``body`` with an optional HTML alternative)."""
+    from .models import OutboundMessage
+
+    recipients = [to] if isinstance(to, str) else list(to)
+    if not recipients:
+        return None
+    return OutboundMessage.objects.create(
+        channel="email",
+        payload={
+            "subject": subject,
+            "body": body,
+            "html": html,
+            "to": recipients,
+            "from_email": from_email,
+        },
+    )
+
+
+# ---------------------------------------------------------------------------
+# Delivery
+# ---------------------------------------------------------------------------
+
+
+def _telegram_call(method, *args, **kwargs):
+    """Call a :class:`~frontend.telegram.TelegramClient` method, mapping errors for the worker."""
+    from .telegram import TelegramError, get_telegram_client
+
+    client = get_telegram_client()
+    if client is None:
+        raise PermanentDeliveryError("TELEGRAM_BOT_TOKEN is not configured")
+    try:
+        # Never sleep through a 429 on a worker thread: reschedule instead
+        return getattr(client, method)(*args, max_wait=0, **kwargs)
+    except TelegramError as exc:
+        if exc.retry_after is not None:
+            raise RetryAfter(int(exc.retry_after), str(exc)) from exc
+        if exc.is_permanent:
+            raise PermanentDeliveryError(str(exc)) from exc
+        raise
+
+
+def _deliver_telegram(payload):
+    chat_id, text = payload["chat_id"], payload["text"]
+    reply_markup = payload.get("reply_markup")
+
+    photo = payload.get("photo")
+    if photo:
+        try:
+            with default_storage.open(photo, "rb") as fh:
+                _telegram_call(
+                    "send_photo",
+                    chat_id,
+                    (os.path.basename(photo), fh, default_storage.size(photo)),
+                    caption=text,
+                    reply_markup=reply_markup,
+                )
+            return
+        except RetryAfter:
+            raise
+        except Exception:
+            # Same as before the outbox: fall back to a text-only message
+            logger.warning("Telegram sendPhoto failed for %s; sending text", photo)
+            text += "\n\n📎 <i>Chek fayli yuborishda xatolik</i>"
+
+    _telegram_call("send_message", chat_id, text, reply_markup=reply_markup)
+
+
+def _deliver_email(payload):
+    message = EmailMultiAlternatives(
+        subject=payload["subject"],
+        body=payload["body"],
+        from_email=payload.get("from_email") or settings.DEFAULT_FROM_EMAIL,
+        to=payload["to"],
+    )
+    if payload.get("html"):
+        message.attach_alternative(payload["html"], "text/html")
+    message.send(fail_silently=False)
+
+
+DELIVERERS = {
+    "telegram": _deliver_telegram,
+    "email": _deliver_email,
+}
+
+
+def _attempt(message):
+    """Deliver one message; returns ``(message, error, retry_after)``. Runs on a worker thread."""
+    try:
+        DELIVERERS[message.channel](message.payload)
+        return message, None, None
+    except RetryAfter as exc:
+        return message, exc, exc.seconds
+    except Exception as exc:
+        return message, exc, None
+
+
+def backoff_delay(attempts, retry_after=None) -> float:
+    """Seconds to wait before the next try: exponential with jitter, capped."""
+    delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    delay *= random.uniform(0.8, 1.2)
+    return max(delay, retry_after or 0)
+
+
+def _record(message, error, retry_after, now):
+    from .models import OutboundMessage
+
+    attempts = message.attempts + 1
+    if error is None:
+        OutboundMessage.objects.filter(pk=message.pk).update(
+            status="sent", attempts=attempts, sent_at=now, last_error=""
+        )
+        return "sent"
+
+    permanent = isinstance(error, PermanentDeliveryError)
+    # A rate limit is not the message's fault; it does not use up an attempt
+    if retry_after is not None:
+        attempts = message.attempts
+    if permanent or attempts >= message.max_attempts:
+        status, next_attempt_at = "failed", now
+        logger.error("Outbox message #%s failed permanently: %s", message.pk, error)
+    else:
+        status = "pending"
+        next_attempt_at = now + timedelta(seconds=backoff_delay(attempts, retry_after))
+        logger.warning("Outbox message #%s attempt %s failed: %s", message.pk, attempts, error)
+    OutboundMessage.objects.filter(pk=message.pk).update(
+        status=status,
+        attempts=attempts,
+        next_attempt_at=next_attempt_at,
+        last_error=str(error)[:2000],
+    )
+    return status
+
+
+def claim_due_messages(limit):
+    """Lease up to ``limit`` due messages to this worker."""
+    from .models import OutboundMessage
+
+    now = timezone.now()
+    with transaction.atomic():
+        qs = OutboundMessage.objects.filter(
+            status="pending", next_attempt_at__lte=now
+        ).order_by("next_attempt_at")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        messages = list(qs[:limit])
+        if messages:
+            # Hidden from other workers until delivered or the lease runs out
+            OutboundMessage.objects.filter(pk__in=[m.pk for m in messages]).update(
+                next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE)
+            )
+    return messages
+
+
+def process_outbox(batch_size=100, concurrency=4) -> dict:
+    """Deliver one batch of due messages; returns counts by resulting status."""
+    messages = claim_due_messages(batch_size)
+    counts = {"sent": 0, "pending": 0, "failed": 0}
+    if not messages:
+        return counts
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(_attempt, messages))
+    now = timezone.now()
+    for message, error, retry_after in results:
+        counts[_record(message, error, retry_after, now)] += 1
+    return counts
+
+
+def purge_sent_messages(days=14) -> int:
+    """Delete messages delivered more than ``days`` ago."""
+    from .models import OutboundMessage
+
+    cutoff = timezone.now() - timedelta(days=days)
+    return OutboundMessage.objects.filter(status="sent", sent_at__lt=cutoff).delete()[0]
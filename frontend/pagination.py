@@ -0,0 +1,149 @@
+"""
+Keyset (cursor) pagination and cached approximate counts.
+
+Offset pagination costs a ``COUNT(*)`` plus an ``OFFSET`` scan that grows
+with the page number. Keyset pagination instead filters on the sort key of
+the last row seen, so every page is an index range scan of ``limit + 1``
+rows no matter how deep it is.
+
+Cursors are opaque signed tokens holding the boundary row's key values and
+the direction; a tampered or stale token simply restarts at the first page.
+"""
+
+import hashlib
+import json
+
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.db.models.lookups import (
+    Exact,
+    GreaterThan,
+    GreaterThanOrEqual,
+    LessThan,
+    LessThanOrEqual,
+)
+
+from .cache_utils import get_or_compute
+
+CURSOR_SALT = "frontend.pagination.cursor"
+COUNT_CACHE_TIMEOUT = 60 * 10
+
+
+def _parse_ordering(ordering) -> list[tuple[str, bool]]:
+    """``("-rating", "id")`` -> ``[("rating", True), ("id", False)]``."""
+    return [(f[1:], True) if f.startswith("-") else (f, False) for f in ordering]
+
+
+def encode_cursor(values, backwards=False) -> str:
+    payload = json.dumps({"v": list(values), "b": backwards}, cls=DjangoJSONEncoder)
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """Return ``(values, backwards)`` or ``None`` for a missing/invalid token."""
+    if not token:
+        return None
+    try:
+        payload = json.loads(signing.loads(token, salt=CURSOR_SALT))
+        return payload["v"], bool(payload["b"])
+    except (signing.BadSignature, ValueError, KeyError, TypeError):
+        return None
+
+
+def _after(keys, values) -> Q:
+    """Rows strictly after ``values`` in ``keys`` order.
+
+    Expanded as ``k1 <= v1 AND (k1 < v1 OR (k1 = v1 AND ...))`` (flipped for
+    ascending keys) so the leading key gives the planner an index range.
+    Lookups are built on ``F()`` so translated fields compare the raw column.
+    """
+    condition = None
+    for (field, descending), value in reversed(list(zip(keys, values))):
+        beyond = LessThan if descending else GreaterThan
+        step = Q(beyond(F(field), value))
+        if condition is not None:
+            step |= Q(Exact(F(field), value)) & condition
+        condition = step
+    field, descending = keys[0]
+    bound = LessThanOrEqual if descending else GreaterThanOrEqual
+    return Q(bound(F(field), values[0])) & condition
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset (iterable like a ``Page``)."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+def keyset_paginate(queryset, ordering, limit, cursor=None) -> KeysetPage:
+    """Return the page of ``queryset`` following (or preceding) ``cursor``.
+
+    ``ordering`` must end in a unique field (normally ``id``) so the key is
+    total.
+    """
+    keys = _parse_ordering(ordering)
+    values, backwards = None, False
+    decoded = decode_cursor(cursor)
+    if decoded is not None and len(decoded[0]) == len(keys):
+        try:
+            values = [
+                queryset.model._meta.get_field(f).to_python(v)
+                for (f, _), v in zip(keys, decoded[0])
+            ]
+            backwards = decoded[1]
+        except Exception:
+            values = None
+
+    # Walking backwards is walking forwards over the reversed order
+    scan = [(f, desc != backwards) for f, desc in keys]
+    if values is not None:
+        queryset = queryset.filter(_after(scan, values))
+    annotations = {f"_keyset_{i}": F(f) for i, (f, _) in enumerate(keys)}
+    queryset = queryset.annotate(**annotations).order_by(
+        *[F(f).desc() if desc else F(f).asc() for f, desc in scan]
+    )
+    rows = list(queryset[: limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def key_of(obj):
+        return [getattr(obj, f"_keyset_{i}") for i in range(len(keys))]
+
+    has_next = more if not backwards else values is not None
+    has_previous = values is not None if not backwards else more
+    next_cursor = encode_cursor(key_of(rows[-1])) if rows and has_next else None
+    previous_cursor = (
+        encode_cursor(key_of(rows[0]), backwards=True) if rows and has_previous else None
+    )
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def approximate_count(queryset, tags, timeout=COUNT_CACHE_TIMEOUT) -> int:
+    """``queryset.count()`` cached per distinct query until ``tags`` change.
+
+    Counts may lag behind by up to ``timeout``; they are display figures,
+    not something pagination correctness depends on.
+    """
+    digest = hashlib.md5(str(queryset.order_by().query).encode()).hexdigest()
+    return get_or_compute(f"count:{digest}", queryset.count, timeout, tags=tags)
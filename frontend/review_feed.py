@@ -0,0 +1,94 @@
+"""
+Company review feed: sorting, filtering and keyset paging of approved reviews.
+
+Shared by ``company_detail`` (server-rendered first page and numbered pages)
+and ``company_reviews_feed`` (JSON infinite scroll). Every sort has a total
+key ending in ``id`` backed by a ``(company, is_approved, ...)`` index on
+Review, so any page is an index range scan regardless of depth.
+"""
+
+from django.db.models import Prefetch, Q
+
+from .pagination import encode_cursor, keyset_paginate
+
+REVIEW_FEED_SORTS = {
+    "most_liked": ("-like_count", "-created_at", "-id"),
+    "newest": ("-created_at", "-id"),
+    "highest": ("-rating", "-created_at", "-id"),
+    "lowest": ("rating", "-created_at", "-id"),
+}
+DEFAULT_REVIEW_SORT = "most_liked"
+
+
+def parse_review_feed_params(query_dict) -> dict:
+    """Read sort and filters (``with_text``, ``with_response``, ``stars``)."""
+    sort = query_dict.get("sort", DEFAULT_REVIEW_SORT)
+    if sort not in REVIEW_FEED_SORTS:
+        sort = DEFAULT_REVIEW_SORT
+    stars_list = query_dict.getlist("stars")
+    if len(stars_list) == 1 and "," in stars_list[0]:
+        stars_list = [s.strip() for s in stars_list[0].split(",") if s.strip()]
+    stars = sorted(
+        {int(s) for s in stars_list if str(s).isdigit() and 1 <= int(s) <= 5},
+        reverse=True,
+    )
+    return {
+        "sort": sort,
+        "with_text": query_dict.get("with_text") in ("1", "true", "on"),
+        "with_response": query_dict.get("with_response") in ("1", "true", "on"),
+        "stars": stars,
+    }
+
+
+def review_feed_queryset(company, params, user=None):
+    """Approved reviews of ``company`` filtered and ordered for the feed."""
+    qs = company.reviews.filter(is_approved=True)
+    if params["with_text"]:
+        qs = qs.filter(~Q(text=""))
+    if params["stars"]:
+        qs = qs.filter(rating__in=params["stars"])
+    if params["with_response"]:
+        qs = qs.exclude(owner_response_text="")
+
+    qs = qs.select_related("user").order_by(*REVIEW_FEED_SORTS[params["sort"]])
+    if user is not None and user.is_authenticated:
+        from .models import ReviewLike
+
+        qs = qs.prefetch_related(
+            Prefetch("likes", queryset=ReviewLike.objects.filter(user=user), to_attr="user_likes")
+        )
+    return qs
+
+
+def review_feed_count(company, params, queryset) -> int:
+    """Total for the filters, from the stored histogram when possible."""
+    if params["with_text"] or params["with_response"]:
+        return queryset.count()
+    if params["stars"]:
+        counts = company.rating_counts
+        return sum(counts[star] for star in params["stars"])
+    return company.review_count
+
+
+def mark_liked(reviews, user) -> None:
+    if user is not None and user.is_authenticated:
+        for review in reviews:
+            review.is_liked_by_user = bool(getattr(review, "user_likes", []))
+
+
+def review_feed_page(company, params, limit, cursor=None, user=None):
+    """Keyset page of the feed (see :func:`frontend.pagination.keyset_paginate`)."""
+    page = keyset_paginate(
+        review_feed_queryset(company, params, user),
+        REVIEW_FEED_SORTS[params["sort"]],
+        limit,
+        cursor,
+    )
+    mark_liked(page, user)
+    return page
+
+
+def cursor_after(review, sort) -> str:
+    """Cursor continuing the feed after ``review`` (e.g. the end of an offset page)."""
+    values = [getattr(review, field.lstrip("-")) for field in REVIEW_FEED_SORTS[sort]]
+    return encode_cursor(values)
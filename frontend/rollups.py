@@ -0,0 +1,324 @@
+"""
+Daily rollups of company and platform activity.
+
+``DailyCompanyStats`` and ``DailyPlatformStats`` hold one row per company
+(or for the site) per local day. ``manage.py rollup_daily_stats`` folds the
+raw ``Review``, ``ActivityLog``, ``CompanyLike``, ``User`` and ``Company``
+rows of every closed day after the watermark (the newest day it has folded)
+into them, one grouped query per table per batch of days. The last
+``ROLLUP_REFOLD_DAYS`` days before the watermark are folded again on each
+run to pick up recent moderation and deleted likes.
+
+Older days change too: a review approved, unapproved or deleted weeks
+later, or a like withdrawn, still counts on the day it was created. Those
+writes call :func:`mark_days_for_refold`, which clears the day's
+``rolled_up_at``; the next run folds such days again, except for contact
+reveals, whose raw rows may already be archived.
+
+Views have no raw rows: the view-count flush adds them to today's rows
+directly (:func:`add_daily_views`), and folding never touches them.
+
+Readers (``frontend.analytics``) take closed days up to the watermark from
+the rollups and group only the raw rows after it.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+ROLLUP_REFOLD_DAYS = 3
+ROLLUP_BATCH_DAYS = 31  # days folded per transaction
+
+# Columns written by folding; ``views`` belongs to the view-count flush
+COMPANY_FIELDS = ("reviews", "rating_sum", "contact_reveals", "likes")
+PLATFORM_FIELDS = (
+    "new_users",
+    "new_companies",
+    "reviews",
+    "approved_reviews",
+    "contact_reveals",
+    "likes",
+)
+
+
+def _approved_reviews():
+    from .models import Review
+
+    return Review.objects.filter(is_approved=True)
+
+
+def _contact_reveals():
+    from .models import ActivityLog
+
+    return ActivityLog.objects.filter(action="contact_revealed", company__isnull=False)
+
+
+def _likes():
+    from .models import CompanyLike
+
+    return CompanyLike.objects.all()
+
+
+def _users():
+    from django.contrib.auth import get_user_model
+
+    return get_user_model().objects.all()
+
+
+def _companies():
+    from .models import Company
+
+    return Company.objects.all()
+
+
+def _reviews():
+    from .models import Review
+
+    return Review.objects.all()
+
+
+# (rows, timestamp field, aggregates): one grouped query each
+COMPANY_SOURCES = (
+    (_approved_reviews, "created_at", {"reviews": Count("id"), "rating_sum": Sum("rating")}),
+    (_contact_reveals, "created_at", {"contact_reveals": Count("id")}),
+    (_likes, "created_at", {"likes": Count("id")}),
+)
+PLATFORM_SOURCES = (
+    (_users, "date_joined", {"new_users": Count("id")}),
+    (_companies, "created_at", {"new_companies": Count("id")}),
+    (
+        _reviews,
+        "created_at",
+        {"reviews": Count("id"), "approved_reviews": Count("id", filter=Q(is_approved=True))},
+    ),
+    (_contact_reveals, "created_at", {"contact_reveals": Count("id")}),
+    (_likes, "created_at", {"likes": Count("id")}),
+)
+
+
+# Sources refolded on days marked by late moderation: everything but
+# contact reveals, which are never changed after the fact
+LATE_COMPANY_SOURCES = tuple(
+    source for source in COMPANY_SOURCES if source[0] is not _contact_reveals
+)
+LATE_PLATFORM_SOURCES = tuple(
+    source for source in PLATFORM_SOURCES if source[0] is not _contact_reveals
+)
+
+
+def day_start(day):
+    """Aware datetime of local midnight starting ``day``."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _as_date(value):
+    # TruncDay yields midnight in the current time zone
+    return (timezone.localtime(value) if timezone.is_aware(value) else value).date()
+
+
+def _group(sources, first, last, company_ids=None, by_company=False) -> dict:
+    """
+    Raw activity of local days ``first``..``last`` (``first=None``: from the
+    beginning), one query per source.
+
+    Returns ``{date: {field: value}}``, or ``{(company_id, date): ...}`` with
+    ``by_company``; days and companies without rows are absent.
+    """
+    until = day_start(last + timedelta(days=1))
+    keys = ("company_id", "day") if by_company else ("day",)
+    result = defaultdict(dict)
+    for rows, field, aggregates in sources:
+        queryset = rows().filter(**{f"{field}__lt": until})
+        if first is not None:
+            queryset = queryset.filter(**{f"{field}__gte": day_start(first)})
+        if company_ids is not None:
+            queryset = queryset.filter(company_id__in=company_ids)
+        grouped = (
+            queryset.annotate(day=TruncDay(field))
+            .values(*keys)
+            .annotate(**aggregates)
+            .order_by()
+        )
+        for entry in grouped:
+            day = _as_date(entry["day"])
+            key = (entry["company_id"], day) if by_company else day
+            for name in aggregates:
+                result[key][name] = entry[name] or 0
+    return result
+
+
+def company_activity(first, last, company_ids=None, by_company=False) -> dict:
+    return _group(COMPANY_SOURCES, first, last, company_ids, by_company)
+
+
+def platform_activity(first, last) -> dict:
+    return _group(PLATFORM_SOURCES, first, last)
+
+
+def rollup_watermark():
+    """The newest fully folded day, or ``None`` before the first run."""
+    from .models import DailyPlatformStats
+
+    return DailyPlatformStats.objects.filter(rolled_up_at__isnull=False).aggregate(
+        last=Max("date")
+    )["last"]
+
+
+def _earliest_activity():
+    dates = []
+    for rows, field, _ in PLATFORM_SOURCES:
+        first = rows().aggregate(first=Min(field))["first"]
+        if first is not None:
+            dates.append(timezone.localtime(first).date())
+    return min(dates) if dates else None
+
+
+def _fields(sources) -> list:
+    return [name for _, _, aggregates in sources for name in aggregates]
+
+
+def _fold(first, last, company_sources=COMPANY_SOURCES, platform_sources=PLATFORM_SOURCES) -> None:
+    """Recompute the folded columns of days ``first``..``last`` from raw rows."""
+    from .models import DailyCompanyStats, DailyPlatformStats
+
+    company_fields = _fields(company_sources)
+    platform_fields = _fields(platform_sources)
+    company_rows = _group(company_sources, first, last, by_company=True)
+    platform_rows = _group(platform_sources, first, last)
+    now = timezone.now()
+    with transaction.atomic():
+        # Companies with no activity left on a re-folded day drop to zero
+        DailyCompanyStats.objects.filter(date__range=(first, last)).update(
+            **{name: 0 for name in company_fields}
+        )
+        DailyCompanyStats.objects.bulk_create(
+            [
+                DailyCompanyStats(
+                    company_id=company_id,
+                    date=day,
+                    **{name: values.get(name, 0) for name in company_fields},
+                )
+                for (company_id, day), values in company_rows.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["company", "date"],
+            update_fields=company_fields,
+            batch_size=1000,
+        )
+        days = (last - first).days + 1
+        DailyPlatformStats.objects.bulk_create(
+            [
+                DailyPlatformStats(
+                    date=day,
+                    rolled_up_at=now,
+                    **{name: platform_rows.get(day, {}).get(name, 0) for name in platform_fields},
+                )
+                for day in (first + timedelta(days=i) for i in range(days))
+            ],
+            update_conflicts=True,
+            unique_fields=["date"],
+            update_fields=[*platform_fields, "rolled_up_at"],
+        )
+
+
+def mark_days_for_refold(*timestamps) -> None:
+    """Have the next run fold again the folded days containing ``timestamps``.
+
+    Called where raw rows change behind the watermark (moderation, deletes);
+    one UPDATE whatever the number of rows.
+    """
+    from .models import DailyPlatformStats
+
+    days = {_as_date(value) for value in timestamps if value is not None}
+    if days:
+        DailyPlatformStats.objects.filter(date__in=days, rolled_up_at__isnull=False).update(
+            rolled_up_at=None
+        )
+
+
+def _refold_marked_days(before) -> int:
+    from .models import DailyPlatformStats
+
+    days = (
+        DailyPlatformStats.objects.filter(date__lt=before, rolled_up_at__isnull=True)
+        .order_by("date")
+        .values_list("date", flat=True)
+    )
+    folded = 0
+    for day in days:
+        _fold(day, day, LATE_COMPANY_SOURCES, LATE_PLATFORM_SOURCES)
+        folded += 1
+    return folded
+
+
+def rollup_daily_stats(since=None, refold_days=ROLLUP_REFOLD_DAYS, today=None) -> int:
+    """
+    Fold every closed day after the watermark (less ``refold_days``), or
+    from ``since``, into the rollup tables; without ``since``, older days
+    marked by :func:`mark_days_for_refold` are folded again as well.
+    Returns the number of days folded.
+    """
+    today = today or timezone.localdate()
+    last = today - timedelta(days=1)
+    folded = 0
+    if since is None:
+        watermark = rollup_watermark()
+        if watermark is None:
+            since = _earliest_activity() or last
+        else:
+            since = watermark + timedelta(days=1 - refold_days)
+            folded += _refold_marked_days(since)
+    first = since
+    while first <= last:
+        batch_last = min(first + timedelta(days=ROLLUP_BATCH_DAYS - 1), last)
+        _fold(first, batch_last)
+        folded += (batch_last - first).days + 1
+        first = batch_last + timedelta(days=1)
+    return folded
+
+
+def add_daily_views(counts: dict, day=None) -> None:
+    """Add ``{company_id: views}`` to the day's company and platform rows.
+
+    Two upserts whatever the number of companies; ids of deleted companies
+    are dropped by selecting from the company table.
+    """
+    from .models import Company, DailyCompanyStats, DailyPlatformStats
+
+    if not counts:
+        return
+    # A date object, not a string: PostgreSQL types it as date in INSERT ... SELECT
+    day = day or timezone.localdate()
+    company_table = DailyCompanyStats._meta.db_table
+    platform_table = DailyPlatformStats._meta.db_table
+    zeros = ", ".join(["0"] * len(COMPANY_FIELDS))
+    cases = " ".join(["WHEN %s THEN %s"] * len(counts))
+    ids = ", ".join(["%s"] * len(counts))
+    params = [day, *(x for item in counts.items() for x in item), *counts]
+    platform_zeros = ", ".join(["0"] * len(PLATFORM_FIELDS))
+    # INSERT ... ON CONFLICT works on PostgreSQL and SQLite alike
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {company_table} "
+            f"(company_id, date, {', '.join(COMPANY_FIELDS)}, views) "
+            f"SELECT c.id, %s, {zeros}, CASE c.id {cases} END "
+            f"FROM {Company._meta.db_table} c WHERE c.id IN ({ids}) "
+            f"ON CONFLICT (company_id, date) DO UPDATE "
+            f"SET views = {company_table}.views + excluded.views",
+            params,
+        )
+        if not cursor.rowcount:
+            return
+        cursor.execute(
+            f"INSERT INTO {platform_table} "
+            f"(date, {', '.join(PLATFORM_FIELDS)}, views) "
+            f"SELECT %s, {platform_zeros}, SUM(CASE c.id {cases} END) "
+            f"FROM {Company._meta.db_table} c WHERE c.id IN ({ids}) "
+            f"ON CONFLICT (date) DO UPDATE "
+            f"SET views = {platform_table}.views + excluded.views",
+            params,
+        )
@@ -0,0 +1,370 @@
+"""
+Company search helpers.
+
+Each Company stores a denormalized ``search_document``: the normalized text
+of its Uzbek/Russian names and descriptions, city and category names. On
+PostgreSQL it carries a pg_trgm GIN index (migration 0053), so substring and
+typo-tolerant matches are answered from a single indexed scan instead of
+building a SearchVector per row at query time.
+
+Live suggestions are answered from :data:`autocomplete_index`, an in-process
+sorted prefix index that never touches the database on the hot path.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+# Fields of Company whose change requires rebuilding the document
+SEARCH_SOURCE_FIELDS = (
+    "name",
+    "name_uz",
+    "name_ru",
+    "description",
+    "description_uz",
+    "description_ru",
+    "city",
+    "category_fk",
+)
+
+# Uzbek Latin uses several look-alike apostrophes (o‘, g‘, ʼ); fold them to one
+_APOSTROPHES = re.compile("[‘’ʻʼ`´]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_search_text(text: str) -> str:
+    """Lowercase, unify apostrophes and collapse whitespace."""
+    text = _APOSTROPHES.sub("'", (text or "").lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def build_search_document(*parts) -> str:
+    """Join the non-empty, de-duplicated normalized ``parts``."""
+    seen = []
+    for part in parts:
+        part = normalize_search_text(part)
+        if part and part not in seen:
+            seen.append(part)
+    return " ".join(seen)
+
+
+def company_search_document(company) -> str:
+    category = company.category_fk
+    category_names = (
+        (category.name, getattr(category, "name_uz", ""), getattr(category, "name_ru", ""))
+        if category
+        else ()
+    )
+    return build_search_document(
+        company.name,
+        getattr(company, "name_uz", ""),
+        getattr(company, "name_ru", ""),
+        company.city,
+        *category_names,
+        company.description,
+        getattr(company, "description_uz", ""),
+        getattr(company, "description_ru", ""),
+    )
+
+
+def refresh_search_documents(queryset, batch_size=500) -> int:
+    """Rebuild ``search_document`` for ``queryset``; returns rows changed."""
+    from .models import Company
+
+    changed = []
+    updated = 0
+    for company in queryset.select_related("category_fk").iterator(chunk_size=batch_size):
+        document = company_search_document(company)
+        if document != company.search_document:
+            company.search_document = document
+            changed.append(company)
+        if len(changed) >= batch_size:
+            Company.objects.bulk_update(changed, ["search_document"])
+            updated += len(changed)
+            changed = []
+    if changed:
+        Company.objects.bulk_update(changed, ["search_document"])
+        updated += len(changed)
+    return updated
+
+
+def search_companies(queryset: QuerySet, query: str) -> QuerySet:
+    """Filter ``queryset`` to companies matching ``query``, best matches first.
+
+    PostgreSQL: ``LIKE '%term%'`` OR word-similarity (``%>``), both served by
+    the trigram GIN index, ranked by word similarity. Other backends fall
+    back to a plain substring match.
+    """
+    term = normalize_search_text(query)
+    if not term:
+        return queryset
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        from django.db.models import F, Value
+
+        return (
+            queryset.filter(
+                Q(search_document__contains=term)
+                | Q(TrigramWordSimilar(F("search_document"), Value(term)))
+            )
+            .annotate(rank=TrigramWordSimilarity(Value(term), "search_document"))
+            .order_by("-rank", "-review_count", "-rating")
+        )
+    return queryset.filter(search_document__contains=term).order_by(
+        "-review_count", "-rating", "name"
+    )
+
+
+# ---------------------------------------------------------------------------
+# In-process autocomplete index
+# ---------------------------------------------------------------------------
+
+# Uzbek Cyrillic (and Russian) to Uzbek Latin, so "Ўзбек", "O‘zbek" and
+# "ozbek" all fold to the same key
+_CYRILLIC_TO_LATIN = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "g", "ғ": "g'", "д": "d",
+        "е": "e", "ё": "yo", "ж": "j", "з": "z", "и": "i", "й": "y",
+        "к": "k", "қ": "q", "л": "l", "м": "m", "н": "n", "о": "o",
+        "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ў": "o'",
+        "ф": "f", "х": "x", "ҳ": "h", "ц": "ts", "ч": "ch", "ш": "sh",
+        "щ": "sh", "ъ": "'", "ы": "i", "ь": "", "э": "e", "ю": "yu",
+        "я": "ya",
+    }
+)
+
+AUTOCOMPLETE_TAG = "autocomplete"
+AUTOCOMPLETE_VERSION_CHECK = 5  # seconds between shared-version checks
+AUTOCOMPLETE_MEMO_SIZE = 2048  # memoized short-prefix results
+
+
+def fold_search_text(text: str) -> str:
+    """Script- and apostrophe-insensitive form used for autocomplete keys."""
+    return normalize_search_text(text).translate(_CYRILLIC_TO_LATIN).replace("'", "")
+
+
+def _prefix_keys(*texts) -> set:
+    """Every word-start suffix of each folded text ("besh qozon" -> "qozon")."""
+    keys = set()
+    for text in texts:
+        folded = fold_search_text(text)
+        for match in re.finditer(r"\w+", folded):
+            keys.add(folded[match.start():])
+    return keys
+
+
+class AutocompleteIndex:
+    """Sorted ``(key, company_id)`` array answering prefix lookups by bisection.
+
+    Built lazily from ``public_companies_queryset()``. Signals update this
+    process incrementally and bump ``AUTOCOMPLETE_TAG``; other processes
+    notice the new version within ``AUTOCOMPLETE_VERSION_CHECK`` seconds and
+    rebuild on a background thread while still serving the old index.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+        self._categories = {}
+        self._memo = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._built = False
+        self._rebuilding = False
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    # -- building ---------------------------------------------------------
+
+    @staticmethod
+    def _names(obj) -> dict:
+        names = {}
+        for lang in ("uz", "ru"):
+            with translation.override(lang):
+                names[lang] = getattr(obj, "display_name", None) or obj.name
+        return names
+
+    def _entry(self, company) -> dict:
+        names = self._names(company)
+        category_names = self._categories.get(company.category_fk_id, {})
+        return {
+            "id": company.pk,
+            "slug": company.slug,
+            "names": names,
+            "category_id": company.category_fk_id,
+            "logo": company.display_logo,
+            "image": company.display_image_url,
+            "logo_scale": company.logo_scale,
+            "rating": float(company.rating or 0),
+            "keys": _prefix_keys(*names.values(), *category_names.values()),
+        }
+
+    @staticmethod
+    def _queryset():
+        from .visibility import public_companies_queryset
+
+        return public_companies_queryset().select_related("category_fk").only(
+            "id", "name", "name_uz", "name_ru", "slug", "category_fk",
+            "category_fk__name", "category_fk__name_uz", "category_fk__name_ru",
+            "logo", "logo_url", "logo_url_backup", "logo_scale",
+            "image", "image_url", "library_image_path", "rating",
+        )
+
+    def rebuild(self) -> None:
+        from .models import BusinessCategory
+
+        version = self._shared_version()
+        categories = {c.pk: self._names(c) for c in BusinessCategory.objects.all()}
+        self._categories = categories
+        entries = {}
+        keys = []
+        for company in self._queryset().iterator(chunk_size=2000):
+            entry = self._entry(company)
+            entries[company.pk] = entry
+            keys.extend((key, company.pk) for key in entry["keys"])
+        keys.sort()
+        with self._lock:
+            self._keys, self._entries, self._memo = keys, entries, {}
+            self._version = version
+            self._checked_at = time.monotonic()
+            self._built = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys, self._entries, self._categories, self._memo = [], {}, {}, {}
+            self._built = False
+
+    # -- incremental updates ---------------------------------------------
+
+    def _remove_locked(self, company_id) -> None:
+        entry = self._entries.pop(company_id, None)
+        if not entry:
+            return
+        for key in entry["keys"]:
+            i = bisect_left(self._keys, (key, company_id))
+            if i < len(self._keys) and self._keys[i] == (key, company_id):
+                del self._keys[i]
+
+    def refresh_company(self, company_id) -> None:
+        """Re-read one company and upsert or drop it (e.g. after save/hide).
+
+        Other processes are only told to rebuild when the company's entry
+        actually changed (counter-only saves leave it as it was).
+        """
+        if not self._built:
+            self._publish()
+            return
+        company = self._queryset().filter(pk=company_id).first()
+        with self._lock:
+            if company is not None and company.category_fk_id and company.category_fk_id not in self._categories:
+                self._categories[company.category_fk_id] = self._names(company.category_fk)
+            entry = self._entry(company) if company is not None else None
+            if entry == self._entries.get(company_id):
+                return
+            self._remove_locked(company_id)
+            if entry is not None:
+                self._entries[company_id] = entry
+                for key in entry["keys"]:
+                    insort(self._keys, (key, company_id))
+            self._memo = {}
+        self._publish()
+
+    def remove_company(self, company_id) -> None:
+        with self._lock:
+            if self._built and company_id not in self._entries:
+                return
+            self._remove_locked(company_id)
+            self._memo = {}
+        self._publish()
+
+    def invalidate(self) -> None:
+        """Force every process (this one included) to rebuild on next lookup."""
+        from .cache_utils import invalidate_tags
+
+        invalidate_tags(AUTOCOMPLETE_TAG)
+        self._built = False
+
+    # -- cross-process freshness -----------------------------------------
+
+    @staticmethod
+    def _shared_version():
+        from .cache_utils import get_tag_versions
+
+        return get_tag_versions([AUTOCOMPLETE_TAG])[AUTOCOMPLETE_TAG]
+
+    def _publish(self) -> None:
+        # Tell other processes, but keep our own (already updated) index
+        from .cache_utils import invalidate_tags
+
+        invalidate_tags(AUTOCOMPLETE_TAG)
+        if self._built:
+            self._version = self._shared_version()
+            self._checked_at = time.monotonic()
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Autocomplete index rebuild failed")
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def _ensure_fresh(self) -> None:
+        if not self._built:
+            with self._build_lock:
+                if not self._built:
+                    self.rebuild()
+            return
+        now = time.monotonic()
+        if self._rebuilding or now - self._checked_at < AUTOCOMPLETE_VERSION_CHECK:
+            return
+        self._checked_at = now
+        if self._shared_version() != self._version:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    # -- lookup -----------------------------------------------------------
+
+    def search(self, query: str, limit: int = 8) -> list[dict]:
+        """Companies with a name/category word starting with ``query``, best rated first."""
+        self._ensure_fresh()
+        prefix = fold_search_text(query)
+        if not prefix:
+            return []
+        memo_key = (prefix, limit)
+        ids = self._memo.get(memo_key)
+        if ids is None:
+            keys = self._keys
+            matched = set()
+            i = bisect_left(keys, (prefix,))
+            while i < len(keys) and keys[i][0].startswith(prefix):
+                matched.add(keys[i][1])
+                i += 1
+            entries = self._entries
+            ranked = heapq.nsmallest(
+                limit,
+                (entries[pk] for pk in matched if pk in entries),
+                key=lambda e: (-e["rating"], e["names"]["uz"]),
+            )
+            ids = [e["id"] for e in ranked]
+            if len(self._memo) >= AUTOCOMPLETE_MEMO_SIZE:
+                self._memo = {}
+            self._memo[memo_key] = ids
+        return [self._entries[pk] for pk in ids if pk in self._entries]
+
+    def category_name(self, category_id, lang: str) -> str:
+        return self._categories.get(category_id, {}).get(lang, "")
+
+
+autocomplete_index = AutocompleteIndex()
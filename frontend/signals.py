@@ -1,6 +1,7 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save, pre_save, post_delete
+from django.db.models.signals import post_save, pre_save, post_delete, pre_delete
 from django.contrib.auth import get_user_model
+from django.db import transaction
 import logging
 from allauth.account.signals import user_signed_up
 from django.contrib.auth.signals import user_logged_in
@@ -9,21 +10,42 @@ from .models import (
     UserProfile,
     Review,
     ReviewReport,
-    ActivityLog,
     Company,
     BusinessCategory,
+    BusinessOwnershipClaim,
+    CompanyLike,
     UserGamification,
-    Badge,
     ReviewHelpfulVote,
     ReviewImage,
 )
+from .activity_log import log_activity
 from .utils import send_telegram_message, send_telegram_review_notification
-from .cache_utils import clear_public_cache
+from .cache_utils import (
+    CATEGORIES_TAG,
+    COMPANY_DIRECTORY_TAG,
+    COMPANY_LIST_TAG,
+    category_tag,
+    company_cache_tags,
+    company_tag,
+    invalidate_tags,
+)
+from .edge_cache import purge_tags
+from .rollups import mark_days_for_refold
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+@receiver([post_save, post_delete], sender=Company)
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_admin_site_stats(sender, **kwargs):
+    from .admin_dashboard import invalidate_site_stats
+
+    transaction.on_commit(invalidate_site_stats)
+
+
 @receiver(post_save, sender=User)
 def create_profile_on_user_create(sender, instance, created, **kwargs):
     if kwargs.get("raw", False):
@@ -72,7 +94,7 @@ def handle_user_logged_in(sender, request, user, **kwargs):
 def notify_new_review(sender, instance, created, **kwargs):
     if not created:
         return
-    # Send notification with inline Approve / Reject buttons
+    # Queue notification with inline Approve / Reject buttons (same transaction)
     try:
         send_telegram_review_notification(instance)
     except Exception:
@@ -80,7 +102,7 @@ def notify_new_review(sender, instance, created, **kwargs):
 
     # Log creation
     try:
-        ActivityLog.objects.create(
+        log_activity(
             actor=instance.user,  # may be null
             action="review_created",
             company=instance.company,
@@ -102,7 +124,7 @@ def log_review_approval_change(sender, instance, **kwargs):
     if not old.is_approved and instance.is_approved:
         # Approved now
         try:
-            ActivityLog.objects.create(
+            log_activity(
                 actor=getattr(
                     instance, "_last_actor", None
                 ),  # optional pattern if set by views/admin
@@ -120,7 +142,7 @@ def log_review_reported(sender, instance, created, **kwargs):
     if not created:
         return
     try:
-        ActivityLog.objects.create(
+        log_activity(
             actor=instance.reporter,
             action="review_reported",
             company=instance.review.company,
@@ -131,135 +153,228 @@ def log_review_reported(sender, instance, created, **kwargs):
         pass
 
 
-@receiver([post_save, post_delete], sender=Review)
-def update_company_stats_signal(sender, instance, **kwargs):
-    """
-    Recalculate company stats whenever a review is saved (created/updated) or deleted.
-    This ensures rating and review_count stay in sync.
-    """
-    from .utils import recalculate_company_stats
+@receiver(post_save, sender=Review)
+def update_company_stats_on_review_save(sender, instance, created, **kwargs):
+    """Apply the review's approval/rating change to company aggregates as F() deltas."""
+    from .utils import apply_review_stats_change, review_stats_contribution
+
+    if kwargs.get("raw", False):
+        return
+    old = None if created else getattr(instance, "_old_stats_contribution", None)
+    new = review_stats_contribution(instance.company_id, instance.is_approved, instance.rating)
+    if old != new:
+        apply_review_stats_change(removed=[old], added=[new])
+        if not created:
+            # The daily rollups count the review on the day it was written
+            mark_days_for_refold(instance.created_at)
+    instance._old_stats_contribution = new
+
+
+@receiver(post_delete, sender=Review)
+def update_company_stats_on_review_delete(sender, instance, **kwargs):
+    from .utils import apply_review_stats_change, review_stats_contribution
+
+    old = review_stats_contribution(instance.company_id, instance.is_approved, instance.rating)
+    if old:
+        apply_review_stats_change(removed=[old])
+    mark_days_for_refold(instance.created_at)
 
-    if instance.company_id:
-        recalculate_company_stats(instance.company_id)
+
+@receiver(post_delete, sender=CompanyLike)
+def refold_rollups_on_like_delete(sender, instance, **kwargs):
+    mark_days_for_refold(instance.created_at)
 
 
 @receiver([post_save, post_delete], sender=BusinessCategory)
 def clear_cache_on_category_change(sender, instance, **kwargs):
-    from .visibility import invalidate_categories_cache
-    invalidate_categories_cache()
-    clear_public_cache()
+    # Visibility and labels of a category leak into every listing card
+    invalidate_tags(
+        category_tag(instance.pk),
+        CATEGORIES_TAG,
+        COMPANY_DIRECTORY_TAG,
+        COMPANY_LIST_TAG,
+    )
+    purge_tags(category_tag(instance.pk))
+    # Names and visibility feed every member company's autocomplete entry
+    from .search import autocomplete_index
+
+    transaction.on_commit(autocomplete_index.invalidate)
+
+
+@receiver(post_save, sender=BusinessCategory)
+def refresh_company_search_on_category_save(sender, instance, created, **kwargs):
+    # Category names are part of every member company's search_document
+    if created or kwargs.get("raw", False):
+        return
+    from .search import refresh_search_documents
+
+    refresh_search_documents(Company.objects.filter(category_fk=instance))
+
+
+@receiver(pre_delete, sender=BusinessCategory)
+def remember_category_companies(sender, instance, **kwargs):
+    instance._search_company_ids = list(
+        Company.objects.filter(category_fk=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=BusinessCategory)
+def refresh_company_search_on_category_delete(sender, instance, **kwargs):
+    company_ids = getattr(instance, "_search_company_ids", None)
+    if company_ids:
+        from .search import refresh_search_documents
+
+        refresh_search_documents(Company.objects.filter(pk__in=company_ids))
+
+
+COMPANY_DIRECTORY_FIELDS = {"category_fk", "city", "is_active"}
+
+
+@receiver(pre_save, sender=Company)
+def track_company_cache_state(sender, instance, **kwargs):
+    """Remember category/city/visibility so moves invalidate the old tags too."""
+    current = (instance.category_fk_id, instance.city, instance.is_active)
+    update_fields = kwargs.get("update_fields")
+    if not instance.pk or (
+        update_fields and not COMPANY_DIRECTORY_FIELDS.intersection(update_fields)
+    ):
+        instance._old_cache_state = None if not instance.pk else current
+        return
+    instance._old_cache_state = (
+        Company.objects.filter(pk=instance.pk)
+        .values_list("category_fk_id", "city", "is_active")
+        .first()
+    )
 
 
 @receiver([post_save, post_delete], sender=Company)
 def clear_cache_on_company_change(sender, instance, **kwargs):
+    tags = company_cache_tags(instance.pk, instance.category_fk_id, instance.city)
+    old = getattr(instance, "_old_cache_state", None)
+    current = (instance.category_fk_id, instance.city, instance.is_active)
+    if kwargs.get("created") or kwargs.get("signal") is post_delete or old is None:
+        tags.append(COMPANY_DIRECTORY_TAG)
+    elif old != current:
+        tags.extend(company_cache_tags(instance.pk, old[0], old[1]))
+        tags.append(COMPANY_DIRECTORY_TAG)
+    invalidate_tags(*tags)
+    purge_tags(company_tag(instance.pk))
+
+
+# Fields read by AutocompleteIndex entries and public_companies_queryset()
+AUTOCOMPLETE_FIELDS = {
+    "name", "name_uz", "name_ru", "slug", "category_fk", "is_active", "rating", "logo_scale",
+    "logo", "logo_url", "logo_url_backup", "image", "image_url", "library_image_path",
+}
+
+
+@receiver(post_save, sender=Company)
+def refresh_autocomplete_on_company_save(sender, instance, **kwargs):
     update_fields = kwargs.get("update_fields")
-    if update_fields and set(update_fields).issubset({"review_count", "rating"}):
+    if kwargs.get("raw", False) or (update_fields and not AUTOCOMPLETE_FIELDS.intersection(update_fields)):
         return
-    clear_public_cache()
+    from .search import autocomplete_index
+
+    transaction.on_commit(lambda: autocomplete_index.refresh_company(instance.pk))
+
+
+@receiver(post_delete, sender=Company)
+def refresh_autocomplete_on_company_delete(sender, instance, **kwargs):
+    from .search import autocomplete_index
+
+    company_id = instance.pk
+    transaction.on_commit(lambda: autocomplete_index.remove_company(company_id))
+
+
+def _invalidate_review_company(review) -> None:
+    state = (
+        Company.objects.filter(pk=review.company_id)
+        .values_list("category_fk_id", "city")
+        .first()
+    )
+    category_id, city = state or (None, "")
+    invalidate_tags(*company_cache_tags(review.company_id, category_id, city))
+    purge_tags(company_tag(review.company_id))
 
 
 @receiver(pre_save, sender=Review)
 def track_review_approval_state(sender, instance, **kwargs):
+    from .utils import review_stats_contribution
+
+    instance._old_is_approved = False
+    instance._old_stats_contribution = None
     if not instance.pk:
-        instance._old_is_approved = False
         return
     try:
-        old = Review.objects.only("is_approved").get(pk=instance.pk)
-        instance._old_is_approved = old.is_approved
+        old = Review.objects.only("is_approved", "rating", "company_id").get(pk=instance.pk)
     except Review.DoesNotExist:
-        instance._old_is_approved = False
+        return
+    instance._old_is_approved = old.is_approved
+    instance._old_stats_contribution = review_stats_contribution(
+        old.company_id, old.is_approved, old.rating
+    )
 
 
 @receiver(post_save, sender=Review)
 def clear_cache_on_approved_review_save(sender, instance, created, **kwargs):
     old_is_approved = getattr(instance, "_old_is_approved", False)
     if instance.is_approved or old_is_approved:
-        clear_public_cache()
+        _invalidate_review_company(instance)
 
 
 @receiver(post_delete, sender=Review)
 def clear_cache_on_approved_review_delete(sender, instance, **kwargs):
     if instance.is_approved:
-        clear_public_cache()
+        _invalidate_review_company(instance)
+
+
+@receiver([post_save, post_delete], sender=BusinessOwnershipClaim)
+def clear_cache_on_ownership_claim_change(sender, instance, **kwargs):
+    # The company page shows whether a claim is pending
+    invalidate_tags(company_tag(instance.company_id))
+
+
+def _new_uploads(instance, fields):
+    """Names of ``fields`` holding a freshly assigned file (not yet written to storage)."""
+    return [
+        name
+        for name in fields
+        if getattr(instance, name) and not getattr(getattr(instance, name), "_committed", True)
+    ]
+
+
+def _queue_image_variants(instance, profiles):
+    from .image_pipeline import enqueue_image
+
+    for field in getattr(instance, "_new_images", ()):
+        enqueue_image(getattr(instance, field).name, profiles[field])
 
 
 @receiver(pre_save, sender=Company)
-def optimize_company_images(sender, instance, **kwargs):
+def track_company_image_uploads(sender, instance, **kwargs):
     """
-    Optimize company images before saving to reduce file size and improve load times.
+    Note new image/logo uploads. The original is stored as uploaded; sized
+    variants are generated afterwards by ``manage.py process_images``.
     """
-    if not instance.pk:
-        # New company - optimize images if uploaded
-        if instance.image:
-            from .image_optimization import optimize_image
+    instance._new_images = _new_uploads(instance, ("image", "logo"))
+    if "image" in instance._new_images:
+        # Old variants show the previous picture: serve the original until new ones exist
+        instance.image_400 = instance.image_800 = instance.image_1200 = None
 
-            optimized = optimize_image(
-                instance.image, max_width=1200, max_height=800, quality=85
-            )
-            if optimized:
-                instance.image = optimized
 
-        if instance.logo:
-            from .image_optimization import optimize_image
-
-            optimized = optimize_image(
-                instance.logo, max_width=400, max_height=400, quality=90
-            )
-            if optimized:
-                instance.logo = optimized
-    else:
-        # Existing company - only optimize if image changed
-        try:
-            old_instance = Company.objects.get(pk=instance.pk)
-
-            if instance.image and old_instance.image != instance.image:
-                from .image_optimization import optimize_image
-
-                optimized = optimize_image(
-                    instance.image, max_width=1200, max_height=800, quality=85
-                )
-                if optimized:
-                    instance.image = optimized
-
-            if instance.logo and old_instance.logo != instance.logo:
-                from .image_optimization import optimize_image
-
-                optimized = optimize_image(
-                    instance.logo, max_width=400, max_height=400, quality=90
-                )
-                if optimized:
-                    instance.logo = optimized
-        except Company.DoesNotExist:
-            pass
+@receiver(post_save, sender=Company)
+def queue_company_image_variants(sender, instance, **kwargs):
+    _queue_image_variants(instance, {"image": "company", "logo": "logo"})
 
 
 @receiver(pre_save, sender=UserProfile)
-def optimize_avatar(sender, instance, **kwargs):
-    """
-    Optimize user avatars before saving.
-    """
-    if instance.avatar:
-        try:
-            if instance.pk:
-                old_instance = UserProfile.objects.get(pk=instance.pk)
-                if old_instance.avatar != instance.avatar:
-                    from .image_optimization import optimize_image
-
-                    optimized = optimize_image(
-                        instance.avatar, max_width=400, max_height=400, quality=90
-                    )
-                    if optimized:
-                        instance.avatar = optimized
-            else:
-                from .image_optimization import optimize_image
-
-                optimized = optimize_image(
-                    instance.avatar, max_width=400, max_height=400, quality=90
-                )
-                if optimized:
-                    instance.avatar = optimized
-        except UserProfile.DoesNotExist:
-            pass
+def track_avatar_upload(sender, instance, **kwargs):
+    instance._new_images = _new_uploads(instance, ("avatar",))
+
+
+@receiver(post_save, sender=UserProfile)
+def queue_avatar_variants(sender, instance, **kwargs):
+    _queue_image_variants(instance, {"avatar": "avatar"})
 
 
 # ============================================
@@ -276,146 +391,48 @@ def create_gamification_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=Review)
 def update_gamification_on_review(sender, instance, created, **kwargs):
-    """Update user's gamification stats when they post a review"""
-    if not instance.user or kwargs.get("raw", False):
+    """Reward the author when a review becomes approved; take the counters back when it stops being."""
+    from .gamification import record_review_approved, record_review_withdrawn, record_review_written
+
+    if not instance.user_id or kwargs.get("raw", False):
         return
+    if created:
+        record_review_written(instance.user_id)
+    was_approved = False if created else getattr(instance, "_old_is_approved", False)
+    if instance.is_approved and not was_approved:
+        record_review_approved(instance.user_id)
+    elif was_approved and not instance.is_approved:
+        record_review_withdrawn(instance.user_id)
 
-    gamification, _ = UserGamification.objects.get_or_create(user=instance.user)
 
-    if created and instance.is_approved:
-        # New approved review
-        gamification.total_reviews += 1
-        gamification.add_xp(10, "Review posted")
-        gamification.update_streak()
+@receiver(post_delete, sender=Review)
+def update_gamification_on_review_delete(sender, instance, **kwargs):
+    from .gamification import record_review_withdrawn
 
-        # Check for unique companies reviewed
-        unique_companies = (
-            Review.objects.filter(user=instance.user, is_approved=True)
-            .values("company")
-            .distinct()
-            .count()
-        )
-        gamification.companies_reviewed = unique_companies
-        gamification.save()
-
-        # Award badges
-        if gamification.total_reviews == 1:
-            Badge.objects.get_or_create(
-                user=instance.user,
-                badge_type="first_review",
-                defaults={
-                    "name": "Birinchi sharh",
-                    "description": "Birinchi sharhingizni yozdingiz!",
-                    "icon": "🎉",
-                },
-            )
-        elif gamification.total_reviews == 10:
-            Badge.objects.get_or_create(
-                user=instance.user,
-                badge_type="reviews_10",
-                defaults={
-                    "name": "10 sharh",
-                    "description": "10 ta sharh yozdingiz",
-                    "icon": "📝",
-                },
-            )
-        elif gamification.total_reviews == 50:
-            Badge.objects.get_or_create(
-                user=instance.user,
-                badge_type="reviews_50",
-                defaults={
-                    "name": "50 sharh",
-                    "description": "50 ta sharh yozdingiz",
-                    "icon": "✍️",
-                },
-            )
-        elif gamification.total_reviews == 100:
-            Badge.objects.get_or_create(
-                user=instance.user,
-                badge_type="reviews_100",
-                defaults={
-                    "name": "100 sharh",
-                    "description": "100 ta sharh yozdingiz!",
-                    "icon": "🏆",
-                },
-            )
+    if instance.user_id and instance.is_approved:
+        record_review_withdrawn(instance.user_id)
 
 
 @receiver(post_save, sender=ReviewHelpfulVote)
 def update_gamification_on_helpful_vote(sender, instance, created, **kwargs):
-    """Update review author's gamification when their review gets helpful votes"""
-    if not created or kwargs.get("raw", False) or not instance.review.user:
-        return
+    """Count helpful votes on the author's reviews as deltas, including changed votes."""
+    from .gamification import record_helpful_votes
 
-    review = instance.review
-    gamification, _ = UserGamification.objects.get_or_create(user=review.user)
-
-    # Update helpful votes count
-    total_helpful = ReviewHelpfulVote.objects.filter(
-        review__user=review.user, is_helpful=True
-    ).count()
-    gamification.helpful_votes_received = total_helpful
-    gamification.save()
-
-    # Add XP for helpful vote
-    if instance.is_helpful:
-        gamification.add_xp(2, "Helpful vote received")
-
-    # Award helpful badges
-    if total_helpful == 10:
-        Badge.objects.get_or_create(
-            user=review.user,
-            badge_type="helpful_10",
-            defaults={
-                "name": "10 foydali ovoz",
-                "description": "Sharhlaringiz 10 ta foydali ovoz oldi",
-                "icon": "👍",
-            },
-        )
-    elif total_helpful == 50:
-        Badge.objects.get_or_create(
-            user=review.user,
-            badge_type="helpful_50",
-            defaults={
-                "name": "50 foydali ovoz",
-                "description": "Sharhlaringiz 50 ta foydali ovoz oldi",
-                "icon": "🌟",
-            },
-        )
-    elif total_helpful == 100:
-        Badge.objects.get_or_create(
-            user=review.user,
-            badge_type="helpful_100",
-            defaults={
-                "name": "100 foydali ovoz",
-                "description": "Sharhlaringiz 100 ta foydali ovoz oldi!",
-                "icon": "💎",
-            },
-        )
+    if kwargs.get("raw", False):
+        return
+    old_type = None if created else getattr(instance, "_loaded_vote_type", None)
+    instance._loaded_vote_type = instance.vote_type
+    delta = (instance.vote_type == "helpful") - (old_type == "helpful")
+    author_id = instance.review.user_id
+    if delta and author_id:
+        record_helpful_votes(author_id, delta, new_vote=created)
 
 
 @receiver(pre_save, sender=ReviewImage)
-def optimize_review_image(sender, instance, **kwargs):
-    """Optimize review images before saving"""
-    if instance.image:
-        try:
-            if instance.pk:
-                old_instance = ReviewImage.objects.get(pk=instance.pk)
-                if old_instance.image != instance.image:
-                    from .image_optimization import optimize_image
-
-                    optimized = optimize_image(
-                        instance.image, max_width=1200, max_height=900, quality=85
-                    )
-                    if optimized:
-                        instance.image = optimized
-            else:
-                from .image_optimization import optimize_image
-
-                optimized = optimize_image(
-                    instance.image, max_width=1200, max_height=900, quality=85
-                )
-                if optimized:
-                    instance.image = optimized
-        except ReviewImage.DoesNotExist:
-            pass
+def track_review_image_upload(sender, instance, **kwargs):
+    instance._new_images = _new_uploads(instance, ("image",))
+
+
+@receiver(post_save, sender=ReviewImage)
+def queue_review_image_variants(sender, instance, **kwargs):
+    _queue_image_variants(instance, {"image": "review"})
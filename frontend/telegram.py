@@ -0,0 +1,301 @@
+"""
+Telegram Bot API client.
+
+Every call used to open a fresh ``urllib`` HTTPS connection, loop over chat
+ids one at a time and assemble multipart uploads in memory. A
+:class:`TelegramClient` instead keeps a pooled keep-alive ``requests``
+session per bot token, fans messages out to several chats on a shared
+thread pool, streams photo uploads straight from disk and honours the
+``retry_after`` Telegram sends with HTTP 429.
+
+Use :func:`get_telegram_client`; the helpers in ``frontend/utils.py`` and
+the outbox worker are built on it.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Never log at ERROR here: TelegramErrorHandler would try to report it via Telegram
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_BASE = "https://api.telegram.org"
+TELEGRAM_TIMEOUT = (5, 15)  # connect, read
+TELEGRAM_POOL_SIZE = 16
+TELEGRAM_FANOUT_WORKERS = 8
+TELEGRAM_MAX_INLINE_WAIT = 5  # longest 429 retry_after slept through in-line
+TELEGRAM_RATE_LIMIT_RETRIES = 2
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class TelegramError(Exception):
+    """A Bot API call failed; ``code`` is the HTTP status (None for network errors)."""
+
+    def __init__(self, description, code=None, retry_after=None):
+        super().__init__(description)
+        self.description = description
+        self.code = code
+        self.retry_after = retry_after
+
+    @property
+    def is_permanent(self) -> bool:
+        """Bad request, bad token, bot blocked or chat gone: retrying will not help."""
+        return self.code in (400, 401, 403, 404)
+
+
+class MultipartStream:
+    """``multipart/form-data`` body read lazily, so uploaded files are streamed.
+
+    ``files`` maps a field name to ``(filename, fileobj, size, content_type)``.
+    The total length is known up front, so requests sends a Content-Length
+    instead of falling back to chunked encoding.
+    """
+
+    def __init__(self, fields, files):
+        self.boundary = uuid.uuid4().hex
+        self._parts = []
+        for name, value in fields.items():
+            self._parts.append(
+                (
+                    f"--{self.boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                    f"{value}\r\n"
+                ).encode("utf-8")
+            )
+        for name, (filename, fileobj, size, content_type) in files.items():
+            self._parts.append(
+                (
+                    f"--{self.boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                    f"Content-Type: {content_type}\r\n\r\n"
+                ).encode("utf-8")
+            )
+            self._parts.append((fileobj, size))
+            self._parts.append(b"\r\n")
+        self._parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self._length = sum(len(p) if isinstance(p, bytes) else p[1] for p in self._parts)
+        self._index = 0
+        self._offset = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = UPLOAD_CHUNK_SIZE
+        while self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                chunk = part[self._offset:self._offset + size]
+                self._offset += len(chunk)
+                if self._offset >= len(part):
+                    self._index, self._offset = self._index + 1, 0
+                if chunk:
+                    return chunk
+            else:
+                chunk = part[0].read(size)
+                if chunk:
+                    return chunk
+                self._index, self._offset = self._index + 1, 0
+        return b""
+
+
+class TelegramClient:
+    """Bot API client for one token; safe to share between threads."""
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, token):
+        self.token = token
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=TELEGRAM_POOL_SIZE,
+            # Only connection failures are retried: a POST that reached Telegram may have been applied
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.3),
+        )
+        self.session.mount("https://", adapter)
+
+    # -- transport --------------------------------------------------------
+
+    def call(self, method, params=None, files=None, max_wait=TELEGRAM_MAX_INLINE_WAIT):
+        """POST ``method`` and return its ``result``; raises :class:`TelegramError`.
+
+        A 429 whose ``retry_after`` is at most ``max_wait`` seconds is slept
+        through and retried; longer waits raise with ``retry_after`` set so a
+        background caller can reschedule instead.
+        """
+        url = f"{TELEGRAM_API_BASE}/bot{self.token}/{method}"
+        params = {
+            k: json.dumps(v) if isinstance(v, (dict, list)) else v
+            for k, v in (params or {}).items()
+            if v is not None
+        }
+        for attempt in range(TELEGRAM_RATE_LIMIT_RETRIES + 1):
+            try:
+                if files:
+                    body = MultipartStream(params, files)
+                    response = self.session.post(
+                        url,
+                        data=body,
+                        headers={"Content-Type": body.content_type},
+                        timeout=TELEGRAM_TIMEOUT,
+                    )
+                else:
+                    response = self.session.post(url, data=params, timeout=TELEGRAM_TIMEOUT)
+            except requests.RequestException as exc:
+                raise TelegramError(f"{method}: {exc}") from exc
+
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = {}
+            if response.ok and payload.get("ok"):
+                return payload.get("result")
+
+            description = payload.get("description") or f"HTTP {response.status_code}"
+            retry_after = (payload.get("parameters") or {}).get("retry_after")
+            if response.status_code == 429 and retry_after is not None:
+                can_wait = attempt < TELEGRAM_RATE_LIMIT_RETRIES and all(
+                    f[1].seekable() for f in (files or {}).values()
+                )
+                if can_wait and retry_after <= max_wait:
+                    logger.warning("Telegram %s rate limited; retrying in %ss", method, retry_after)
+                    time.sleep(retry_after)
+                    for f in (files or {}).values():
+                        f[1].seek(0)
+                    continue
+            raise TelegramError(
+                f"{method}: {description}", code=response.status_code, retry_after=retry_after
+            )
+
+    @classmethod
+    def _pool(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=TELEGRAM_FANOUT_WORKERS, thread_name_prefix="telegram"
+                )
+            return cls._executor
+
+    def fan_out(self, chat_ids, send):
+        """Run ``send(chat_id)`` for every chat concurrently.
+
+        Returns ``{chat_id: result or TelegramError}`` in ``chat_ids`` order.
+        """
+        chat_ids = list(chat_ids)
+        if len(chat_ids) == 1:
+            futures = None
+        else:
+            futures = [self._pool().submit(send, chat_id) for chat_id in chat_ids]
+        results = {}
+        for i, chat_id in enumerate(chat_ids):
+            try:
+                results[chat_id] = futures[i].result() if futures else send(chat_id)
+            except TelegramError as exc:
+                logger.warning("Telegram delivery to %s failed: %s", chat_id, exc)
+                results[chat_id] = exc
+        return results
+
+    # -- Bot API methods --------------------------------------------------
+
+    def send_message(self, chat_id, text, reply_markup=None, **kwargs):
+        return self.call(
+            "sendMessage",
+            {
+                "chat_id": chat_id,
+                "text": text,
+                "parse_mode": "HTML",
+                "disable_web_page_preview": "true",
+                "reply_markup": reply_markup,
+            },
+            **kwargs,
+        )
+
+    def send_photo(self, chat_id, photo, caption="", reply_markup=None, **kwargs):
+        """Upload ``photo`` (a path or ``(filename, fileobj, size)``) with a caption.
+
+        The file is streamed from disk, never read into memory whole.
+        """
+        import mimetypes
+
+        params = {
+            "chat_id": chat_id,
+            "caption": caption[:1024],
+            "parse_mode": "HTML",
+            "reply_markup": reply_markup,
+        }
+        if isinstance(photo, (str, os.PathLike)):
+            with open(photo, "rb") as fh:
+                return self.send_photo(
+                    chat_id,
+                    (os.path.basename(photo), fh, os.path.getsize(photo)),
+                    caption,
+                    reply_markup,
+                    **kwargs,
+                )
+        filename, fileobj, size = photo
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return self.call(
+            "sendPhoto",
+            params,
+            files={"photo": (filename, fileobj, size, content_type)},
+            **kwargs,
+        )
+
+    def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        return self.call(
+            "editMessageText",
+            {
+                "chat_id": chat_id,
+                "message_id": message_id,
+                "text": text,
+                "parse_mode": "HTML",
+                "disable_web_page_preview": "true",
+            },
+            **kwargs,
+        )
+
+    def answer_callback_query(self, callback_query_id, text, show_alert=False, **kwargs):
+        return self.call(
+            "answerCallbackQuery",
+            {
+                "callback_query_id": callback_query_id,
+                "text": text,
+                "show_alert": "true" if show_alert else "false",
+            },
+            **kwargs,
+        )
+
+    def set_webhook(self, url, **params):
+        return self.call("setWebhook", {"url": url, **params})
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_telegram_client(token=None):
+    """Shared client for ``token`` (default ``TELEGRAM_BOT_TOKEN``), or None if unset."""
+    token = token or getattr(settings, "TELEGRAM_BOT_TOKEN", "")
+    if not token:
+        return None
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            client = _clients[token] = TelegramClient(token)
+        return client
@@ -1,79 +1,76 @@
 from django import template
 from django.contrib.auth import get_user_model
-from frontend.models import Company, Review
 from django.utils import timezone
 from datetime import timedelta
 
+from frontend.admin_dashboard import SITE_STATS_ACTIVE_DAYS, site_stats
+
 register = template.Library()
 
 
-@register.simple_tag
-def admin_count_users():
-    User = get_user_model()
-    try:
-        return User.objects.count()
-    except Exception:
-        return 0
+def _stats(context):
+    """``site_stats()`` once per template render; ``None`` if it fails."""
+    render_context = context.render_context
+    if "admin_site_stats" not in render_context:
+        try:
+            render_context["admin_site_stats"] = site_stats()
+        except Exception:
+            render_context["admin_site_stats"] = None
+    return render_context["admin_site_stats"]
 
 
-@register.simple_tag
-def admin_count_companies():
-    try:
-        return Company.objects.count()
-    except Exception:
-        return 0
+def _stat(context, table, name, default=0):
+    stats = _stats(context)
+    return default if stats is None else stats[table][name]
 
 
-@register.simple_tag
-def admin_count_reviews():
-    try:
-        return Review.objects.count()
-    except Exception:
-        return 0
+@register.simple_tag(takes_context=True)
+def admin_count_users(context):
+    return _stat(context, "users", "total")
 
 
-@register.simple_tag
-def admin_count_pending_reviews():
-    try:
-        return Review.objects.filter(is_approved=False).count()
-    except Exception:
-        return 0
+@register.simple_tag(takes_context=True)
+def admin_count_companies(context):
+    return _stat(context, "companies", "total")
+
 
+@register.simple_tag(takes_context=True)
+def admin_count_reviews(context):
+    return _stat(context, "reviews", "total")
 
-@register.simple_tag
-def admin_users_recent_subtext(days=7):
+
+@register.simple_tag(takes_context=True)
+def admin_count_pending_reviews(context):
+    return _stat(context, "reviews", "pending")
+
+
+@register.simple_tag(takes_context=True)
+def admin_users_recent_subtext(context, days=SITE_STATS_ACTIVE_DAYS):
     """Return a localized subtext like '3 aktiv (7 kun ichida)'."""
-    User = get_user_model()
     try:
-        since = timezone.now() - timedelta(days=int(days))
-        count = User.objects.filter(last_login__gte=since).count()
-        return f"{count} aktiv ({days} kun ichida)"
+        if int(days) == SITE_STATS_ACTIVE_DAYS:
+            count = _stat(context, "users", "active_7d", None)
+        else:
+            since = timezone.now() - timedelta(days=int(days))
+            count = get_user_model().objects.filter(last_login__gte=since).count()
     except Exception:
-        return "-"
+        count = None
+    return "-" if count is None else f"{count} aktiv ({days} kun ichida)"
 
 
-@register.simple_tag
-def admin_companies_verified_subtext():
-    try:
-        count = Company.objects.filter(is_verified=True).count()
-        return f"{count} tasdiqlangan"
-    except Exception:
-        return "-"
+@register.simple_tag(takes_context=True)
+def admin_companies_verified_subtext(context):
+    count = _stat(context, "companies", "verified", None)
+    return "-" if count is None else f"{count} tasdiqlangan"
 
 
-@register.simple_tag
-def admin_reviews_approved_subtext():
-    try:
-        count = Review.objects.filter(is_approved=True).count()
-        return f"{count} tasdiqlangan"
-    except Exception:
-        return "-"
+@register.simple_tag(takes_context=True)
+def admin_reviews_approved_subtext(context):
+    count = _stat(context, "reviews", "approved", None)
+    return "-" if count is None else f"{count} tasdiqlangan"
 
 
-@register.simple_tag
-def admin_pending_subtext():
-    try:
-        count = Review.objects.filter(is_approved=False).count()
-        return f"{count} tasdiqlanmoqda"
-    except Exception:
-        return "-"
+@register.simple_tag(takes_context=True)
+def admin_pending_subtext(context):
+    count = _stat(context, "reviews", "pending", None)
+    return "-" if count is None else f"{count} tasdiqlanmoqda"
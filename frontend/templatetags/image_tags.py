@@ -0,0 +1,78 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from frontend.image_pipeline import best_variant_url, image_variants
+
+register = template.Library()
+
+# <source> order: the browser takes the first type it supports
+PICTURE_FORMATS = (("avif", "image/avif"), ("webp", "image/webp"))
+
+
+@register.filter
+def variant_url(field_file, width):
+    """
+    URL of the smallest generated variant at least ``width`` px wide, or the
+    original upload while variants are still being generated.
+    Usage: {{ profile.avatar|variant_url:192 }}
+    """
+    try:
+        width = int(width)
+    except (TypeError, ValueError):
+        width = 0
+    return best_variant_url(field_file, width)
+
+
+def _original_url(field_file) -> str:
+    try:
+        return field_file.url if field_file else ""
+    except ValueError:
+        return ""
+
+
+@register.simple_tag
+def picture(image, fallback="", sizes="100vw", **attrs):
+    """
+    Responsive ``<picture>`` for an uploaded image (Company image/logo,
+    UserProfile avatar, ReviewImage), built from its stored variants.
+
+    Emits an AVIF and a WebP ``<source>`` with ``srcset``/``sizes`` so the
+    browser downloads only the width the slot needs, and ``width``/``height``
+    on the ``<img>`` so the layout does not shift. Until variants exist (or
+    when there is no upload) it is a plain ``<img>`` of the original or of
+    ``fallback``. Other keyword arguments become ``<img>`` attributes;
+    ``loading`` defaults to lazy.
+
+    The ``<picture>`` is ``display: contents`` so CSS sizing the ``<img>``
+    against its container keeps working. Usage:
+    {% picture company.image fallback=company.image_url sizes="(min-width: 1024px) 33vw, 100vw" alt=company.name class="w-full h-full object-cover" %}
+    """
+    variants = image_variants(image.name) if image else []
+    src = _original_url(image) or fallback
+    if not src:
+        return ""
+
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    attrs.setdefault("alt", "")
+    sources = []
+    if variants:
+        widest = variants[-1]
+        attrs.setdefault("width", widest["width"])
+        attrs.setdefault("height", widest["height"])
+        for fmt, mime in PICTURE_FORMATS:
+            srcset = ", ".join(
+                f"{v['url']} {v['width']}w" for v in variants if v["format"] == fmt
+            )
+            if srcset:
+                sources.append((mime, srcset, sizes))
+
+    img_attrs = {k: v for k, v in attrs.items() if v not in (None, "")}
+    img_attrs["alt"] = attrs["alt"]
+    return format_html(
+        '<picture style="display: contents">{}<img src="{}"{}></picture>',
+        format_html_join("", '<source type="{}" srcset="{}" sizes="{}">', sources),
+        src,
+        flatatt(img_attrs),
+    )
@@ -0,0 +1,90 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from frontend.activity_log import log_activity, write_activity_entries
+from frontend.models import ActivityLog, Company
+from frontend.rollups import rollup_daily_stats
+
+User = get_user_model()
+
+
+class ActivityLogWriteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="actor", password="password")
+        self.company = Company.objects.create(name="Logged Co", is_active=True)
+
+    def test_written_on_commit_with_action_time(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            log_activity("company_liked", actor=self.user, company=self.company, details="liked")
+            self.assertFalse(ActivityLog.objects.exists())
+            logged_at = timezone.now()
+
+        entry = ActivityLog.objects.get()
+        self.assertEqual((entry.actor, entry.company, entry.details), (self.user, self.company, "liked"))
+        self.assertLessEqual(entry.created_at, logged_at)
+
+    def test_batch_insert_nulls_deleted_targets(self):
+        stamp = (timezone.now() - timedelta(minutes=5)).isoformat()
+        entries = [
+            {"action": "contact_revealed", "company_id": self.company.pk, "created_at": stamp},
+            {"action": "company_liked", "actor_id": 999999, "company_id": 999999, "created_at": stamp},
+        ] * 3
+        # One existence check per target that is set, then one INSERT
+        with self.assertNumQueries(3):
+            self.assertEqual(write_activity_entries(entries), 6)
+
+        self.assertEqual(ActivityLog.objects.filter(company=self.company).count(), 3)
+        orphan = ActivityLog.objects.filter(action="company_liked").first()
+        self.assertEqual((orphan.actor_id, orphan.company_id), (None, None))
+        self.assertEqual(orphan.created_at.isoformat(), stamp)
+
+
+class ArchiveActivityLogTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Archived Co", is_active=True)
+        self.dest = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dest, ignore_errors=True)
+
+    def entry(self, days_ago):
+        return ActivityLog.objects.create(
+            company=self.company,
+            action="contact_revealed",
+            created_at=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_activity_log", "--dest", self.dest, "--keep-months", "1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_old_months_move_to_gzip_files(self):
+        old = self.entry(100)
+        recent = self.entry(1)
+        rollup_daily_stats()
+
+        self.assertIn("Would archive 1 months (1 rows)", self.archive("--dry-run"))
+        self.assertEqual(ActivityLog.objects.count(), 2)
+
+        output = self.archive()
+        self.assertIn("Archived 1 months (1 rows)", output)
+        self.assertEqual(list(ActivityLog.objects.values_list("pk", flat=True)), [recent.pk])
+        path = Path(self.dest) / f"activity_log_{old.created_at:%Y-%m}.jsonl.gz"
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            rows = [json.loads(line) for line in fh]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]["id"], rows[0]["company_id"]), (old.pk, self.company.pk))
+
+    def test_nothing_archived_before_rollups(self):
+        self.entry(100)
+        self.assertIn("Archived 0 months", self.archive())
+        self.assertEqual(ActivityLog.objects.count(), 1)
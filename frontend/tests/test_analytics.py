@@ -0,0 +1,157 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from frontend.analytics import ANALYTICS_MAX_DAYS, company_totals, daily_series, platform_series
+from frontend.models import (
+    ActivityLog,
+    Company,
+    CompanyLike,
+    DailyCompanyStats,
+    DailyPlatformStats,
+    Review,
+)
+from frontend.rollups import rollup_daily_stats, rollup_watermark
+from frontend.utils import set_reviews_approval
+from frontend.view_counts import apply_view_counts
+
+User = get_user_model()
+
+
+class AnalyticsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="password")
+        self.company = Company.objects.create(name="Series Co", is_active=True, manager=self.owner)
+
+    def backdate(self, obj, days, field="created_at"):
+        type(obj).objects.filter(pk=obj.pk).update(**{field: timezone.now() - timedelta(days=days)})
+
+    def review(self, rating, days_ago, approved=True):
+        review = Review.objects.create(
+            company=self.company, user_name="u", rating=rating, text="Matn", is_approved=approved
+        )
+        self.backdate(review, days_ago)
+        return review
+
+
+class DailySeriesTests(AnalyticsTestCase):
+    def test_grouped_series_with_gaps_filled(self):
+        self.review(5, 2)
+        self.review(3, 2)
+        self.review(1, 2, approved=False)
+        self.review(4, 0)
+        reveal = ActivityLog.objects.create(company=self.company, action="contact_revealed")
+        self.backdate(reveal, 1)
+        CompanyLike.objects.create(company=self.company, user=self.owner)
+
+        series = daily_series([self.company.pk], 4)
+
+        self.assertEqual(series["dates"][-1], timezone.localdate())
+        self.assertEqual(series["reviews"], [0, 2, 0, 1])
+        self.assertEqual(series["ratings"], [None, 4.0, None, 4.0])
+        self.assertEqual(series["contact_reveals"], [0, 0, 1, 0])
+        self.assertEqual(series["likes"], [0, 0, 0, 1])
+
+    def test_query_count_does_not_grow_with_days(self):
+        self.review(5, 10)
+        # watermark, rollup rows, one GROUP BY per raw table
+        with self.assertNumQueries(5):
+            series = daily_series([self.company.pk], ANALYTICS_MAX_DAYS)
+        self.assertEqual(len(series["dates"]), ANALYTICS_MAX_DAYS)
+        self.assertEqual(series["reviews"][-11], 1)
+
+    def test_dashboard_clamps_days(self):
+        self.client.force_login(self.owner)
+        url = reverse("analytics_dashboard", args=[self.company.pk])
+
+        response = self.client.get(url, {"days": "9999"}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["days"], ANALYTICS_MAX_DAYS)
+        response = self.client.get(url, {"days": "abc"}, secure=True)
+        self.assertEqual(response.context["days"], 30)
+
+
+class RollupTests(AnalyticsTestCase):
+    def test_fold_then_read_rollups_for_closed_days(self):
+        self.review(5, 3)
+        self.review(2, 1)
+        reveal = ActivityLog.objects.create(company=self.company, action="contact_revealed")
+        self.backdate(reveal, 1)
+        self.backdate(self.owner, 1, field="date_joined")
+
+        self.assertEqual(rollup_daily_stats(), 3)  # first run starts at the earliest row
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.assertEqual(rollup_watermark(), yesterday)
+        row = DailyCompanyStats.objects.get(company=self.company, date=yesterday)
+        self.assertEqual((row.reviews, row.rating_sum, row.contact_reveals), (1, 2, 1))
+        platform = DailyPlatformStats.objects.get(date=yesterday)
+        self.assertEqual((platform.new_users, platform.reviews, platform.contact_reveals), (1, 1, 1))
+
+        # Closed days now come from the rollups: a raw row behind the
+        # watermark is invisible until the next fold
+        self.review(4, 1)
+        self.review(4, 0)
+        series = daily_series([self.company.pk], 4)
+        self.assertEqual(series["reviews"], [1, 0, 1, 1])
+        self.assertEqual(series["ratings"], [5.0, None, 2.0, 4.0])
+        self.assertEqual(platform_series(2)["new_users"], [1, 0])
+
+        # Re-folding recent days picks it up
+        self.assertEqual(rollup_daily_stats(), 3)
+        series = daily_series([self.company.pk], 4)
+        self.assertEqual(series["reviews"], [1, 0, 2, 1])
+        self.assertEqual(series["ratings"], [5.0, None, 3.0, 4.0])
+
+    def test_late_moderation_refolds_its_day(self):
+        review = self.review(5, 10, approved=False)
+        review.refresh_from_db()
+        reveal = ActivityLog.objects.create(company=self.company, action="contact_revealed")
+        self.backdate(reveal, 10)
+        like = CompanyLike.objects.create(company=self.company, user=self.owner)
+        self.backdate(like, 10)
+        rollup_daily_stats()
+        # Archived: the refold must keep the folded reveal
+        reveal.delete()
+
+        review.is_approved = True
+        review.save()
+        self.assertEqual(rollup_daily_stats(), 4)  # the marked day, then the usual refold
+        series = daily_series([self.company.pk], 30)
+        self.assertEqual(sum(series["reviews"]), 1)
+        self.assertEqual(sum(series["contact_reveals"]), 1)
+
+        set_reviews_approval(Review.objects.filter(pk=review.pk), False)
+        CompanyLike.objects.filter(pk=like.pk).delete()
+        rollup_daily_stats()
+        series = daily_series([self.company.pk], 30)
+        self.assertEqual((sum(series["reviews"]), sum(series["likes"])), (0, 0))
+        self.assertEqual(platform_series(30)["approved_reviews"][-11], 0)
+
+    def test_views_are_added_to_today_and_survive_folding(self):
+        apply_view_counts({self.company.pk: 3, 999999: 5})
+        apply_view_counts({self.company.pk: 2})
+        today = timezone.localdate()
+        self.assertEqual(DailyCompanyStats.objects.get(company=self.company, date=today).views, 5)
+        self.assertEqual(DailyPlatformStats.objects.get(date=today).views, 5)
+        self.assertIsNone(rollup_watermark())
+
+        rollup_daily_stats(today=today + timedelta(days=1))
+        self.assertEqual(rollup_watermark(), today)
+        self.assertEqual(daily_series([self.company.pk], 1)["views"], [5])
+        self.assertEqual(company_totals([self.company.pk])["views"], 5)
+        self.assertEqual(DailyPlatformStats.objects.get(date=today).views, 5)
+
+    def test_command(self):
+        self.review(5, 2)
+        out = StringIO()
+        call_command("rollup_daily_stats", stdout=out)
+        self.assertIn("Folded 2 days", out.getvalue())
+        call_command("rollup_daily_stats", "--refold-days", "0", stdout=out)
+        self.assertIn("Folded 0 days", out.getvalue())
@@ -0,0 +1,358 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from frontend.cache_utils import (
+    COMPANY_LIST_TAG,
+    category_tag,
+    city_tag,
+    clear_public_cache,
+    company_tag,
+    get_or_compute,
+    invalidate_tags,
+    tagged_cache_key,
+)
+from frontend.models import BusinessCategory, Company
+
+
+class TaggedCacheKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_key_is_stable_until_tag_invalidated(self):
+        key = tagged_cache_key("demo", [company_tag(1)])
+        self.assertEqual(key, tagged_cache_key("demo", [company_tag(1)]))
+
+        invalidate_tags(company_tag(1))
+        self.assertNotEqual(key, tagged_cache_key("demo", [company_tag(1)]))
+
+    def test_unrelated_tag_does_not_change_key(self):
+        key = tagged_cache_key("demo", [category_tag(1)])
+        invalidate_tags(category_tag(2))
+        self.assertEqual(key, tagged_cache_key("demo", [category_tag(1)]))
+
+    def test_clear_public_cache_invalidates_every_tagged_key(self):
+        key = tagged_cache_key("demo", [category_tag(1)])
+        clear_public_cache()
+        self.assertNotEqual(key, tagged_cache_key("demo", [category_tag(1)]))
+
+
+class GetOrComputeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def _compute(self):
+        self.calls += 1
+        return f"value-{self.calls}"
+
+    def test_computes_once_while_fresh(self):
+        self.assertEqual(get_or_compute("demo", self._compute, 60), "value-1")
+        self.assertEqual(get_or_compute("demo", self._compute, 60), "value-1")
+        self.assertEqual(self.calls, 1)
+
+    def test_tag_invalidation_triggers_recompute(self):
+        get_or_compute("demo", self._compute, 60, tags=[company_tag(1)])
+        invalidate_tags(company_tag(1))
+        self.assertEqual(get_or_compute("demo", self._compute, 60, tags=[company_tag(1)]), "value-2")
+
+    def test_serves_stale_value_while_another_worker_recomputes(self):
+        get_or_compute("demo", self._compute, 60, tags=[company_tag(1)])
+        invalidate_tags(company_tag(1))
+        cache.add("demo:lock", 1, 30)  # another worker holds the lock
+
+        self.assertEqual(get_or_compute("demo", self._compute, 60, tags=[company_tag(1)]), "value-1")
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_value_recomputed_by_lock_winner(self):
+        get_or_compute("demo", self._compute, 0)
+        self.assertEqual(get_or_compute("demo", self._compute, 60), "value-2")
+
+
+class SignalTagInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.food = BusinessCategory.objects.create(name="Food", name_ru="Еда", slug="food")
+        self.tech = BusinessCategory.objects.create(name="Tech", name_ru="Тех", slug="tech")
+        self.company = Company.objects.create(
+            name="Cafe", category_fk=self.food, city="Toshkent", is_active=True
+        )
+
+    def test_company_save_only_touches_its_category(self):
+        food_key = tagged_cache_key("list", [category_tag(self.food.pk)])
+        tech_key = tagged_cache_key("list", [category_tag(self.tech.pk)])
+
+        self.company.description = "Updated"
+        self.company.save()
+
+        self.assertNotEqual(food_key, tagged_cache_key("list", [category_tag(self.food.pk)]))
+        self.assertEqual(tech_key, tagged_cache_key("list", [category_tag(self.tech.pk)]))
+
+    def test_category_move_invalidates_old_and_new_category(self):
+        food_key = tagged_cache_key("list", [category_tag(self.food.pk)])
+        tech_key = tagged_cache_key("list", [category_tag(self.tech.pk)])
+
+        self.company.category_fk = self.tech
+        self.company.save()
+
+        self.assertNotEqual(food_key, tagged_cache_key("list", [category_tag(self.food.pk)]))
+        self.assertNotEqual(tech_key, tagged_cache_key("list", [category_tag(self.tech.pk)]))
+
+    def test_business_list_page_refreshes_after_company_change(self):
+        url = reverse("business_list_by_category", kwargs={"category_slug": "food"})
+        response = self.client.get(url, secure=True)
+        self.assertContains(response, "Cafe")
+
+        self.company.name = "Renamed Cafe"
+        self.company.save()
+
+        response = self.client.get(url, secure=True)
+        self.assertContains(response, "Renamed Cafe")
+
+    def test_listing_tag_bumped_by_company_change(self):
+        key = tagged_cache_key("home", [COMPANY_LIST_TAG])
+        self.company.save()
+        self.assertNotEqual(key, tagged_cache_key("home", [COMPANY_LIST_TAG]))
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        from frontend.models import Review, ReviewLike
+
+        cache.clear()
+        User = get_user_model()
+        self.company = Company.objects.create(name="Fragment Cafe", is_active=True)
+        self.author = User.objects.create_user(username="author", password="x")
+        self.fan = User.objects.create_user(username="fan", password="x")
+        self.review = Review.objects.create(
+            company=self.company, user=self.author, user_name="author",
+            rating=5, text="Ajoyib joy", is_approved=True,
+        )
+        ReviewLike.objects.create(review=self.review, user=self.fan)
+        self.feed_url = reverse("company_reviews_feed", kwargs={"slug": self.company.slug})
+
+    def _feed_html(self, user):
+        self.client.force_login(user)
+        return self.client.get(self.feed_url, secure=True).json()["html"]
+
+    def test_review_body_shared_but_like_state_per_user(self):
+        from frontend.models import Review
+
+        fan_html = self._feed_html(self.fan)
+        # Bypasses updated_at: other viewers still get the cached body
+        Review.objects.filter(pk=self.review.pk).update(text="Tahrirlangan")
+        author_html = self._feed_html(self.author)
+
+        self.assertIn("Ajoyib joy", author_html)
+        self.assertIn("border-red-200", fan_html)
+        self.assertNotIn("border-red-200", author_html)
+
+        self.review.refresh_from_db()
+        self.review.save()
+        self.assertIn("Tahrirlangan", self._feed_html(self.author))
+
+    def test_company_card_cached_for_signed_in_users_until_company_changes(self):
+        url = reverse("business_list")
+        self.client.force_login(self.fan)
+        self.assertContains(self.client.get(url, secure=True), "Fragment Cafe")
+
+        Company.objects.filter(pk=self.company.pk).update(name="Stale Cafe")
+        self.assertContains(self.client.get(url, secure=True), "Fragment Cafe")
+
+        self.company.refresh_from_db()
+        self.company.save()
+        self.assertContains(self.client.get(url, secure=True), "Stale Cafe")
+
+
+class HttpCacheTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        cache.clear()
+        self.company = Company.objects.create(name="Edge Cafe", is_active=True)
+        self.user = get_user_model().objects.create_user(username="member", password="x")
+        self.detail_url = reverse("company_detail", kwargs={"slug": self.company.slug})
+
+    def test_anonymous_listing_is_public_and_revalidates(self):
+        url = reverse("business_list")
+        response = self.client.get(url, secure=True)
+        self.assertIn("s-maxage=", response["Cache-Control"])
+        self.assertIn("public", response["Cache-Control"])
+        self.assertTrue(response.has_header("Last-Modified"))
+        etag = response["ETag"]
+
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.company.save()
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_company_page_has_no_csrf_token_and_counts_304_views(self):
+        from unittest import mock
+
+        response = self.client.get(self.detail_url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('type="hidden" name="csrfmiddlewaretoken"', response.content.decode())
+        self.assertNotIn("csrftoken", response.cookies)
+        self.assertIn("public", response["Cache-Control"])
+
+        with mock.patch("frontend.views.company.record_company_view") as record:
+            response = self.client.get(
+                self.detail_url, secure=True, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+        record.assert_called_once_with(mock.ANY, self.company.pk)
+
+        # Forms on the cached page fetch their token separately
+        token = self.client.get(reverse("csrf_token"), secure=True)
+        self.assertTrue(token.json()["token"])
+        self.assertIn("no-store", token["Cache-Control"])
+
+    def test_signed_in_pages_stay_private(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.detail_url, secure=True)
+        self.assertIn("no-store", response["Cache-Control"])
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_api_varies_on_origin(self):
+        response = self.client.get(reverse("v1_companies"), secure=True)
+        self.assertTrue(response.has_header("ETag"))
+        self.assertIn("Origin", response["Vary"])
+        self.assertIn("s-maxage=", response["Cache-Control"])
+
+
+class EdgeCacheTests(TestCase):
+    """Purges against a stand-in for nginx's purge listener."""
+
+    def setUp(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        cache.clear()
+        received = self.received = []
+        refreshes = self.refreshes = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                received.append((self.path, self.headers["Host"], self.headers["Cookie"]))
+                refreshes.append(self.headers["X-Edge-Refresh"])
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        override = self.settings(
+            EDGE_CACHE_PURGE_URL=f"http://127.0.0.1:{server.server_port}",
+            EDGE_CACHE_HOSTS=["fikrly.uz"],
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.company = Company.objects.create(name="Edge Cafe", is_active=True)
+        self.detail_url = reverse("company_detail", kwargs={"slug": self.company.slug})
+
+    def test_saving_company_refreshes_its_rendered_pages(self):
+        from frontend.edge_cache import wait_for_purges
+        from frontend.views.company import COMPANY_DETAIL_S_MAXAGE
+
+        response = self.client.get(self.detail_url, secure=True)
+        self.assertEqual(response["X-Accel-Expires"], str(COMPANY_DETAIL_S_MAXAGE))
+        ru_url = "/ru" + self.detail_url
+        self.assertEqual(self.client.get(ru_url, secure=True).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.description = "Yangi"
+            self.company.save()
+        wait_for_purges(timeout=10)
+
+        self.assertCountEqual(
+            self.received,
+            [
+                (self.detail_url, "fikrly.uz", "django_language=uz"),
+                (ru_url, "fikrly.uz", "django_language=ru"),
+            ],
+        )
+        self.assertEqual(self.refreshes, ["1", "1"])
+
+        # Tracked paths are consumed; an unrelated company's save sends nothing
+        other = Company.objects.create(name="Other Cafe", is_active=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.save()
+            other.save()
+        wait_for_purges(timeout=10)
+        self.assertEqual(len(self.received), 2)
+
+    def test_bulk_approval_refreshes_company_pages(self):
+        from django.contrib.auth import get_user_model
+
+        from frontend.edge_cache import pop_urls, track_url, wait_for_purges
+        from frontend.models import Review
+        from frontend.utils import set_reviews_approval
+
+        user = get_user_model().objects.create_user(username="edgeuser", password="x")
+        Review.objects.create(company=self.company, user=user, rating=5, text="Zo'r", is_approved=False)
+        self.client.get(self.detail_url, secure=True)
+        # City listings are left to expire on their own
+        track_url("/bizneslar/?city=Toshkent", [city_tag("Toshkent")])
+        self.assertEqual(pop_urls([city_tag("Toshkent")]), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            set_reviews_approval(Review.objects.filter(company=self.company), True)
+        wait_for_purges(timeout=10)
+        self.assertEqual(self.received, [(self.detail_url, "fikrly.uz", "django_language=uz")])
+
+    def test_nothing_tracked_without_purge_url(self):
+        from frontend.edge_cache import pop_urls
+
+        with self.settings(EDGE_CACHE_PURGE_URL=""):
+            self.client.get(self.detail_url, secure=True)
+        self.assertEqual(pop_urls([company_tag(self.company.pk)]), [])
+
+
+class AdminStatsTests(TestCase):
+    TEMPLATE = (
+        "{% load admin_stats %}"
+        "{% admin_count_users %}|{% admin_users_recent_subtext 7 %}|"
+        "{% admin_count_companies %}|{% admin_companies_verified_subtext %}|"
+        "{% admin_count_reviews %}|{% admin_reviews_approved_subtext %}|"
+        "{% admin_count_pending_reviews %}|{% admin_pending_subtext %}"
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name="Stats Co", is_active=True, is_verified=True)
+
+    def render(self):
+        from django.template import Context, Template
+
+        return Template(self.TEMPLATE).render(Context())
+
+    def test_tags_share_one_cached_pass(self):
+        from frontend.models import Review
+
+        Review.objects.create(company=self.company, user_name="a", rating=5, text="x", is_approved=True)
+        Review.objects.create(company=self.company, user_name="b", rating=3, text="y")
+
+        # users, profiles, companies, reviews: one aggregate each
+        with self.assertNumQueries(4):
+            html = self.render()
+        self.assertEqual(
+            html,
+            "0|0 aktiv (7 kun ichida)|1|1 tasdiqlangan|2|1 tasdiqlangan|1|1 tasdiqlanmoqda",
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(), html)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(company=self.company, user_name="c", rating=4, text="z")
+        self.assertIn("|3|1 tasdiqlangan|2|", self.render())
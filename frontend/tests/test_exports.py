@@ -0,0 +1,285 @@
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from frontend.exports import (
+    ADMIN_REVIEW_EXPORT_COLUMNS,
+    COMPANY_EXPORT_COLUMNS,
+    csv_response,
+    iter_rows,
+)
+from frontend.models import BusinessCategory, Company, Review
+
+User = get_user_model()
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        category = BusinessCategory.objects.create(name="Kafe", slug="kafe")
+        self.company = Company.objects.create(
+            name="Export Co", city="Toshkent", category_fk=category, is_active=True
+        )
+        for i in range(5):
+            user = User.objects.create_user(
+                username=f"user{i}", first_name="Ali", last_name=f"V{i}", password="password"
+            )
+            Review.objects.create(
+                company=self.company,
+                user=user,
+                user_name=f"Ali {i}",
+                rating=i + 1,
+                text="x" * 150,
+                is_approved=True,
+            )
+
+    def test_rows_are_fetched_in_one_query_without_instances(self):
+        with self.assertNumQueries(1):
+            rows = list(iter_rows(Review.objects.all(), ADMIN_REVIEW_EXPORT_COLUMNS))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0][1], "Export Co")
+        self.assertEqual(len(rows[0][4]), 100)
+
+    def test_csv_is_streamed(self):
+        response = csv_response(Company.objects.all(), COMPANY_EXPORT_COLUMNS, "companies.csv")
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn("companies.csv", response["Content-Disposition"])
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][:3], ["ID", "Name", "Category"])
+        self.assertEqual(rows[1][1:4], ["Export Co", "Kafe", "Toshkent"])
+
+    def test_excel_export_is_write_only_workbook(self):
+        from openpyxl import load_workbook
+
+        url = reverse("export_reviews_excel", args=[self.company.pk])
+        self.client.force_login(User.objects.get(username="user1"))
+        self.assertEqual(self.client.get(url, secure=True).status_code, 403)
+
+        Company.objects.filter(pk=self.company.pk).update(manager=User.objects.get(username="user0"))
+        self.client.force_login(User.objects.get(username="user0"))
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        wb = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        ws = wb["Reviews"]
+        self.assertEqual(ws.max_row, 6)
+        self.assertEqual(ws["A1"].value, "Date")
+        self.assertEqual(ws["B2"].value.split()[0], "Ali")
+
+
+class DataExportJobTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = self.settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.manager = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password"
+        )
+        self.company = Company.objects.create(name="Job Co", manager=self.manager)
+        for i in range(3):
+            Review.objects.create(
+                company=self.company, user_name=f"Guest {i}", rating=5, text="Zo'r", is_approved=True
+            )
+
+    def test_request_is_processed_by_worker(self):
+        from frontend.export_jobs import process_data_exports
+        from frontend.models import DataExport, OutboundMessage
+
+        self.client.force_login(self.manager)
+        response = self.client.post(
+            reverse("request_data_export"),
+            {"export_type": "reviews_excel", "company_id": self.company.pk},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 302)
+        export = DataExport.objects.get()
+        self.assertEqual(export.status, "pending")
+
+        self.assertEqual(process_data_exports(concurrency=1), {"completed": 1, "failed": 0})
+        export.refresh_from_db()
+        self.assertEqual(export.status, "completed")
+        self.assertIsNotNone(export.completed_at)
+        self.assertGreater(export.expires_at, export.completed_at)
+        self.assertTrue(export.file.name.endswith(".xlsx"))
+        self.assertTrue(OutboundMessage.objects.filter(channel="email").exists())
+
+        download = self.client.get(
+            reverse("download_data_export", args=[export.pk]), secure=True
+        )
+        self.assertEqual(download.status_code, 200)
+        self.client.force_login(User.objects.create_user(username="other", password="password"))
+        other = self.client.get(reverse("download_data_export", args=[export.pk]), secure=True)
+        self.assertEqual(other.status_code, 404)
+
+    def test_other_users_company_is_refused(self):
+        from frontend.export_jobs import process_data_exports
+        from frontend.models import DataExport
+
+        stranger = User.objects.create_user(username="stranger", password="password")
+        self.client.force_login(stranger)
+        self.client.post(
+            reverse("request_data_export"),
+            {"export_type": "reviews_pdf", "company_id": self.company.pk},
+            secure=True,
+        )
+        self.assertFalse(DataExport.objects.exists())
+
+        # A row that slipped past the view is still refused by the worker
+        export = DataExport.objects.create(
+            user=stranger, export_type="reviews_pdf", filters={"company_id": self.company.pk}
+        )
+        self.assertEqual(process_data_exports(concurrency=1)["failed"], 1)
+        export.refresh_from_db()
+        self.assertEqual(export.status, "failed")
+        self.assertFalse(export.file)
+
+    def test_user_data_json_and_cleanup(self):
+        import json
+        from datetime import timedelta
+
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        from frontend.export_jobs import process_data_exports
+        from frontend.models import DataExport
+
+        self.client.force_login(self.manager)
+        self.client.get(reverse("export_user_data"), secure=True)
+        process_data_exports(concurrency=1)
+        export = DataExport.objects.get(export_type="user_data")
+        with export.file.open("rb") as fh:
+            data = json.loads(fh.read().decode("utf-8"))
+        self.assertEqual(data["personal_info"]["username"], "owner")
+        self.assertEqual(data["companies"][0]["name"], "Job Co")
+
+        pending = DataExport.objects.create(user=self.manager, export_type="user_data")
+        DataExport.objects.filter(pk=export.pk).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        call_command("clean_expired_exports", stdout=io.StringIO())
+        self.assertEqual(list(DataExport.objects.values_list("pk", flat=True)), [pending.pk])
+
+    def test_stale_jobs_are_retried_then_failed(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from frontend.export_jobs import (
+            EXPORT_MAX_ATTEMPTS,
+            EXPORT_STALE_AFTER,
+            _progress_reporter,
+            claim_export,
+            requeue_stale_exports,
+        )
+        from frontend.models import DataExport
+
+        export = DataExport.objects.create(user=self.manager, export_type="user_data")
+        long_ago = timezone.now() - EXPORT_STALE_AFTER - timedelta(minutes=1)
+        self.assertEqual(claim_export().attempts, 1)
+
+        # Still reporting progress: a long job is left alone
+        DataExport.objects.filter(pk=export.pk).update(started_at=long_ago)
+        _progress_reporter(export)(1, 2)
+        self.assertEqual(requeue_stale_exports(), 0)
+
+        for attempt in range(2, EXPORT_MAX_ATTEMPTS + 1):
+            DataExport.objects.filter(pk=export.pk).update(started_at=long_ago)
+            self.assertEqual(requeue_stale_exports(), 1)
+            self.assertEqual(claim_export().attempts, attempt)
+
+        # The last worker died too: give up instead of requeueing forever
+        DataExport.objects.filter(pk=export.pk).update(started_at=long_ago)
+        self.assertEqual(requeue_stale_exports(), 0)
+        export.refresh_from_db()
+        self.assertEqual((export.status, export.attempts), ("failed", EXPORT_MAX_ATTEMPTS))
+        self.assertIsNone(claim_export())
+
+
+class ChunkedPdfExportTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username="pdfowner", password="password")
+        self.company = Company.objects.create(name="Pdf Co", manager=self.manager)
+        Review.objects.bulk_create(
+            Review(company=self.company, user_name=f"Guest {i}", rating=4, text="Yaxshi " * 10,
+                   is_approved=True)
+            for i in range(130)
+        )
+
+    def test_every_review_is_rendered_and_progress_reported(self):
+        from frontend.exports import write_reviews_pdf
+
+        calls = []
+        buffer = io.BytesIO()
+        write_reviews_pdf(
+            buffer, self.company, Review.objects.filter(company=self.company),
+            progress=lambda done, total: calls.append((done, total)),
+        )
+        pdf = buffer.getvalue()
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        # 40 rows per chunk, the last one partial; no 100-row cap
+        self.assertEqual(calls, [(40, 130), (80, 130), (120, 130), (130, 130)])
+        self.assertGreaterEqual(pdf.count(b"/Type /Page\n"), 4)
+
+    def test_small_company_pdf_is_returned_inline(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(
+            reverse("export_reviews_pdf", args=[self.company.pk]), secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+        self.client.force_login(User.objects.create_user(username="nosy", password="password"))
+        response = self.client.get(
+            reverse("export_reviews_pdf", args=[self.company.pk]), secure=True
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_large_company_pdf_is_queued_as_job(self):
+        from unittest import mock
+
+        from frontend.models import DataExport
+
+        self.client.force_login(self.manager)
+        url = reverse("export_reviews_pdf", args=[self.company.pk])
+        with mock.patch("frontend.exports.PDF_INLINE_MAX_ROWS", 100):
+            response = self.client.get(url, secure=True)
+            self.client.get(url, secure=True)  # a second click does not queue twice
+        self.assertRedirects(
+            response, reverse("request_data_export"), fetch_redirect_response=False
+        )
+        export = DataExport.objects.get()
+        self.assertEqual(
+            (export.export_type, export.filters), ("reviews_pdf", {"company_id": str(self.company.pk)})
+        )
+
+        status = self.client.get(reverse("data_export_status", args=[export.pk]), secure=True)
+        self.assertEqual(status.json(), {"id": export.pk, "status": "pending", "progress": 0})
+
+        import shutil
+        import tempfile
+
+        from frontend.export_jobs import process_data_exports
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media):
+            self.assertEqual(process_data_exports(concurrency=1)["completed"], 1)
+        status = self.client.get(reverse("data_export_status", args=[export.pk]), secure=True)
+        self.assertEqual(status.json()["progress"], 100)
+        self.assertIn("download_url", status.json())
+
+        stranger = User.objects.create_user(username="nosy", password="password")
+        self.client.force_login(stranger)
+        with mock.patch("frontend.exports.PDF_INLINE_MAX_ROWS", 100):
+            self.assertEqual(self.client.get(url, secure=True).status_code, 403)
+        status = self.client.get(reverse("data_export_status", args=[export.pk]), secure=True)
+        self.assertEqual(status.status_code, 404)
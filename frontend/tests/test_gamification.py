@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from frontend.gamification import apply_progress, level_for_xp
+from frontend.models import Badge, Company, Review, ReviewHelpfulVote, UserGamification
+from frontend.utils import set_reviews_approval
+
+User = get_user_model()
+
+
+class GamificationTestCase(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="password")
+        self.voter = User.objects.create_user(username="voter", password="password")
+        self.company = Company.objects.create(name="Game Co", is_active=True)
+
+    def stats(self):
+        return UserGamification.objects.get(user=self.author)
+
+    def badges(self):
+        return set(Badge.objects.filter(user=self.author).values_list("badge_type", flat=True))
+
+
+class ApplyProgressTests(GamificationTestCase):
+    def test_one_update_without_badges_two_with(self):
+        with self.assertNumQueries(1):
+            apply_progress(self.author.pk, xp=5, helpful_votes_received=3)
+        with self.assertNumQueries(2):
+            apply_progress(self.author.pk, xp=395, total_reviews=1)
+
+        stats = self.stats()
+        self.assertEqual((stats.xp, stats.level, stats.helpful_votes_received), (400, 5, 3))
+        self.assertEqual(self.badges(), {"first_review", "level_5"})
+
+    def test_level_is_derived_from_xp(self):
+        self.assertEqual([level_for_xp(xp) for xp in (0, 99, 100, 250)], [1, 1, 2, 3])
+        stats = self.stats()
+        stats.add_xp(250)
+        self.assertEqual((stats.xp, stats.level), (250, 3))
+        self.assertEqual(self.stats().level, 3)
+
+    def test_streak(self):
+        today = timezone.localdate()
+        UserGamification.objects.filter(user=self.author).update(
+            current_streak=6, longest_streak=6, last_activity_date=today - timedelta(days=1)
+        )
+        apply_progress(self.author.pk, active=True)
+        apply_progress(self.author.pk, active=True)  # same day
+        stats = self.stats()
+        self.assertEqual((stats.current_streak, stats.longest_streak, stats.last_activity_date), (7, 7, today))
+        self.assertEqual(self.badges(), {"streak_7"})
+
+        apply_progress(self.author.pk, active=True, today=today + timedelta(days=3))
+        stats = self.stats()
+        self.assertEqual((stats.current_streak, stats.longest_streak), (1, 7))
+
+    def test_counters_never_go_negative(self):
+        apply_progress(self.author.pk, total_reviews=-1)
+        self.assertEqual(self.stats().total_reviews, 0)
+
+    def test_missing_row_is_created(self):
+        UserGamification.objects.filter(user=self.author).delete()
+        self.assertEqual(apply_progress(self.author.pk, xp=10)["xp"], 10)
+
+
+class GamificationSignalTests(GamificationTestCase):
+    def review(self, approved, company=None):
+        return Review.objects.create(
+            company=company or self.company, user=self.author, user_name="author", rating=5, text="Matn",
+            is_approved=approved,
+        )
+
+    def test_review_counts_once_approved(self):
+        review = self.review(approved=False)
+        self.assertEqual(self.stats().total_reviews, 0)
+
+        review.is_approved = True
+        review.save()
+        stats = self.stats()
+        self.assertEqual((stats.total_reviews, stats.companies_reviewed, stats.xp), (1, 1, 10))
+        self.assertEqual(stats.current_streak, 1)
+        self.assertEqual(self.badges(), {"first_review"})
+
+        review.delete()
+        stats = self.stats()
+        self.assertEqual((stats.total_reviews, stats.companies_reviewed, stats.xp), (0, 0, 10))
+
+    def test_streak_follows_writing_not_moderation(self):
+        review = self.review(approved=False)
+        today = timezone.localdate()
+        self.assertEqual((self.stats().current_streak, self.stats().last_activity_date), (1, today))
+
+        earlier = today - timedelta(days=3)
+        UserGamification.objects.filter(user=self.author).update(last_activity_date=earlier)
+        review.is_approved = True
+        review.save()
+        set_reviews_approval(Review.objects.filter(pk=review.pk), False)
+        set_reviews_approval(Review.objects.filter(pk=review.pk), True)
+        stats = self.stats()
+        self.assertEqual((stats.current_streak, stats.last_activity_date), (1, earlier))
+        self.assertEqual(stats.total_reviews, 1)
+
+    def test_bulk_approval_matches_single_saves(self):
+        first = self.review(approved=False)
+        self.review(approved=False, company=Company.objects.create(name="Second Co", is_active=True))
+        reviews = Review.objects.filter(user=self.author)
+
+        self.assertEqual(set_reviews_approval(reviews, True), 2)
+        self.assertEqual(set_reviews_approval(reviews, True), 0)
+        stats = self.stats()
+        self.assertEqual((stats.total_reviews, stats.companies_reviewed, stats.xp), (2, 2, 20))
+        self.assertEqual(self.badges(), {"first_review"})
+
+        # A single unapproval takes back what the bulk approval gave
+        first.refresh_from_db()
+        first.is_approved = False
+        first.save()
+        self.assertEqual(self.stats().total_reviews, 1)
+
+        self.assertEqual(set_reviews_approval(reviews, False), 1)
+        stats = self.stats()
+        self.assertEqual((stats.total_reviews, stats.companies_reviewed, stats.xp), (0, 0, 20))
+
+    def test_helpful_votes_use_vote_type(self):
+        review = self.review(approved=True)
+        ReviewHelpfulVote.objects.create(review=review, user=self.voter, vote_type="helpful")
+        stats = self.stats()
+        self.assertEqual((stats.helpful_votes_received, stats.xp), (1, 12))
+
+        vote = ReviewHelpfulVote.objects.get(review=review, user=self.voter)
+        vote.vote_type = "not_helpful"
+        vote.save()
+        self.assertEqual(self.stats().helpful_votes_received, 0)
+
+        other = User.objects.create_user(username="other", password="password")
+        ReviewHelpfulVote.objects.create(review=review, user=other, vote_type="not_helpful")
+        stats = self.stats()
+        self.assertEqual((stats.helpful_votes_received, stats.xp), (0, 12))
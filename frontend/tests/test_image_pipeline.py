@@ -0,0 +1,198 @@
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from unittest import mock
+
+from django.test import TestCase
+from PIL import Image
+
+from frontend.image_pipeline import (
+    best_variant_url,
+    image_variants,
+    process_images,
+    shutdown_pool,
+)
+from frontend.models import Company, ImageAsset, ImageVariant
+
+User = get_user_model()
+
+
+def jpeg_upload(name="photo.jpg", size=(1600, 1000), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class ImagePipelineTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = self.settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+
+    def test_upload_stores_original_and_queues_asset(self):
+        company = Company.objects.create(name="Rasm Co", image=jpeg_upload())
+
+        asset = ImageAsset.objects.get()
+        self.assertEqual((asset.source, asset.profile, asset.status), (company.image.name, "company", "pending"))
+        # Stored as uploaded: no re-encode inside the request
+        with Image.open(company.image.path) as img:
+            self.assertEqual(img.size, (1600, 1000))
+        self.assertEqual(best_variant_url(company.image, 400), company.image.url)
+        self.assertEqual(company.image_400_url, company.image.url)
+
+    def test_worker_generates_variants_and_fills_company_fields(self):
+        company = Company.objects.create(name="Rasm Co", image=jpeg_upload())
+
+        self.assertEqual(process_images(concurrency=1), {"ready": 1, "deduplicated": 0, "failed": 0})
+        asset = ImageAsset.objects.get()
+        self.assertEqual((asset.status, asset.width, asset.height), ("ready", 1600, 1000))
+        self.assertEqual(
+            sorted(ImageVariant.objects.filter(format="webp").values_list("width", "height")),
+            [(400, 250), (800, 500), (1200, 750)],
+        )
+        company.refresh_from_db()
+        self.assertTrue(company.image_400.name.endswith("_400.webp"))
+        self.assertEqual(company.image_800_url, company.image_800.url)
+        self.assertIn("_800.webp", best_variant_url(company.image, 500))
+        self.assertIn("_1200.webp", best_variant_url(company.image, 3000))
+
+        # A new upload drops the old variants until the worker has run again
+        company.image = jpeg_upload("other.jpg", color=(0, 0, 200))
+        company.save()
+        company.refresh_from_db()
+        self.assertFalse(company.image_400)
+        self.assertEqual(image_variants(company.image.name), [])
+
+    def test_same_content_is_encoded_once(self):
+        Company.objects.create(name="Bir", image=jpeg_upload("a.jpg"))
+        Company.objects.create(name="Ikki", image=jpeg_upload("b.jpg"))
+
+        try:
+            # Two jobs: encoded on the process pool
+            self.assertEqual(process_images(concurrency=2)["ready"], 2)
+        finally:
+            shutdown_pool()
+        Company.objects.create(name="Uch", image=jpeg_upload("c.jpg"))
+        self.assertEqual(process_images(concurrency=1), {"ready": 0, "deduplicated": 1, "failed": 0})
+        self.assertEqual(ImageVariant.objects.filter(format="webp").count(), 3)
+        self.assertEqual(ImageAsset.objects.values("content_hash").distinct().count(), 1)
+
+    def test_small_avatar_is_not_upscaled_and_template_filter_uses_variant(self):
+        user = User.objects.create_user(username="rasmli", password="password")
+        profile = user.profile
+        profile.avatar = jpeg_upload("me.jpg", size=(100, 100))
+        profile.save()
+
+        self.assertEqual(ImageAsset.objects.get().profile, "avatar")
+        process_images(concurrency=1)
+        self.assertEqual(
+            sorted(ImageVariant.objects.filter(format="webp").values_list("width", flat=True)),
+            [64],
+        )
+        html = Template("{% load image_tags %}{{ avatar|variant_url:192 }}").render(
+            Context({"avatar": profile.avatar})
+        )
+        self.assertTrue(html.endswith("_64.webp"))
+
+    def test_unreadable_upload_fails_after_retries(self):
+        Company.objects.create(
+            name="Buzuq", image=SimpleUploadedFile("bad.jpg", b"not an image", "image/jpeg")
+        )
+        for _ in range(3):
+            process_images(concurrency=1)
+        asset = ImageAsset.objects.get()
+        self.assertEqual((asset.status, asset.attempts), ("failed", 3))
+        self.assertFalse(ImageVariant.objects.exists())
+
+
+class ImageOptimizationTests(TestCase):
+    def rotated_jpeg(self, size=(4000, 3000)):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90° clockwise on display
+        exif[0x010F] = "Camera Maker"
+        buffer = io.BytesIO()
+        Image.new("RGB", size, (20, 120, 220)).save(buffer, format="JPEG", exif=exif.tobytes())
+        return buffer.getvalue()
+
+    def test_jpeg_is_decoded_at_reduced_size(self):
+        from frontend.image_optimization import open_image
+
+        img = open_image(io.BytesIO(jpeg_upload(size=(4000, 3000)).read()), max_size=(1200, 900))
+        # draft() picks the 1/2 scale: still large enough for the box, a quarter of the pixels
+        self.assertEqual(img.size, (2000, 1500))
+
+    def test_orientation_applied_and_exif_stripped(self):
+        from frontend.image_optimization import render_variants
+
+        width, height, variants = render_variants(self.rotated_jpeg(), (400, 1200), formats=("webp",))
+        self.assertEqual((width, height), (3000, 4000))
+        self.assertEqual([(v[1], v[2]) for v in variants], [(1200, 1600), (400, 533)])
+        for _, _, _, data in variants:
+            self.assertEqual(dict(Image.open(io.BytesIO(data)).getexif()), {})
+
+    def test_decompression_bomb_is_rejected_unread(self):
+        from frontend.image_optimization import ImageTooLarge, open_image, render_variants
+
+        buffer = io.BytesIO()
+        Image.new("L", (1000, 1000)).save(buffer, format="PNG")
+        with self.assertRaises(ImageTooLarge):
+            open_image(io.BytesIO(buffer.getvalue()), max_pixels=500_000)
+        with mock.patch("frontend.image_optimization.MAX_IMAGE_PIXELS", 500_000):
+            with self.assertRaises(ImageTooLarge):
+                render_variants(buffer.getvalue(), (400,), formats=("webp",))
+
+
+class PictureTagTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = self.settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+
+    def render(self, image, **extra):
+        template = Template(
+            "{% load image_tags %}"
+            '{% picture image fallback=fallback sizes="(min-width: 1024px) 33vw, 100vw" alt=name class="w-full" %}'
+        )
+        return template.render(Context({"image": image, "fallback": "", "name": "Rasm Co", **extra}))
+
+    def test_original_until_variants_exist(self):
+        company = Company.objects.create(name="Rasm Co", image=jpeg_upload())
+
+        html = self.render(company.image)
+        self.assertNotIn("<source", html)
+        self.assertIn(f'<img src="{company.image.url}"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_sources_with_srcset_sizes_and_dimensions(self):
+        company = Company.objects.create(name="Rasm Co", image=jpeg_upload())
+        process_images(concurrency=1)
+
+        html = self.render(company.image)
+        webp = [v["url"] for v in image_variants(company.image.name) if v["format"] == "webp"]
+        self.assertIn(
+            f'<source type="image/webp" srcset="{webp[0]} 400w, {webp[1]} 800w, {webp[2]} 1200w" '
+            'sizes="(min-width: 1024px) 33vw, 100vw">',
+            html,
+        )
+        self.assertIn(f'<img src="{company.image.url}"', html)
+        self.assertIn('height="750"', html)
+        self.assertIn('width="1200"', html)
+        self.assertIn('alt="Rasm Co"', html)
+
+    def test_fallback_and_empty(self):
+        company = Company.objects.create(name="Rasm Co")
+
+        html = self.render(company.image, fallback="https://example.com/a.jpg")
+        self.assertIn('<img src="https://example.com/a.jpg"', html)
+        self.assertEqual(self.render(company.image).strip(), "")
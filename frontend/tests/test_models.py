@@ -1,3 +1,5 @@
+from io import StringIO
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.utils import translation
@@ -84,6 +86,105 @@ class ReviewLogicTests(TestCase):
         self.assertEqual(self.company.rating, 5.0)
 
 
+class IncrementalCompanyStatsTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Stats Cafe")
+
+    def _review(self, rating, approved=True):
+        user = User.objects.create_user(
+            username=f"stats{User.objects.count()}", password="password"
+        )
+        return Review.objects.create(
+            company=self.company, user=user, rating=rating, text="x", is_approved=approved
+        )
+
+    def test_signals_maintain_aggregates(self):
+        first = self._review(5)
+        self._review(2)
+        pending = self._review(1, approved=False)
+
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.review_count, 2)
+        self.assertEqual(self.company.rating_sum, 7)
+        self.assertEqual(float(self.company.rating), 3.5)
+        self.assertEqual(self.company.rating_5_count, 1)
+        self.assertEqual(self.company.rating_1_count, 0)
+
+        first.rating = 4
+        first.save()
+        pending.is_approved = True
+        pending.save()
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.review_count, 3)
+        self.assertEqual(self.company.rating_5_count, 0)
+        self.assertEqual(self.company.rating_4_count, 1)
+        self.assertEqual(float(self.company.rating), 2.33)
+
+        Review.objects.filter(company=self.company).delete()
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.review_count, 0)
+        self.assertEqual(self.company.rating_sum, 0)
+        self.assertEqual(float(self.company.rating), 0)
+
+    def test_rating_distribution_reads_stored_histogram(self):
+        self._review(5)
+        self._review(5)
+        self._review(1)
+        company = Company.objects.get(pk=self.company.pk)
+
+        with self.assertNumQueries(0):
+            dist = company.rating_distribution
+        self.assertEqual([row["star"] for row in dist], [5, 4, 3, 2, 1])
+        self.assertEqual(dist[0], {"star": 5, "count": 2, "percent": 67})
+        self.assertEqual(dist[4], {"star": 1, "count": 1, "percent": 33})
+
+    def test_api_company_detail_exposes_histogram(self):
+        from django.urls import reverse
+
+        self.company.is_active = True
+        self.company.save()
+        self._review(4)
+        response = self.client.get(
+            reverse("v1_company_detail", kwargs={"slug": self.company.slug}), secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["company"]["rating_distribution"],
+            {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0},
+        )
+
+    def test_bulk_approval_updates_aggregates(self):
+        from ..utils import set_reviews_approval
+
+        self._review(3, approved=False)
+        self._review(5, approved=False)
+
+        self.assertEqual(set_reviews_approval(Review.objects.all(), True), 2)
+        self.assertEqual(set_reviews_approval(Review.objects.all(), True), 0)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.review_count, 2)
+        self.assertEqual(float(self.company.rating), 4.0)
+
+        set_reviews_approval(Review.objects.filter(rating=5), False)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.review_count, 1)
+        self.assertEqual(self.company.rating_5_count, 0)
+
+    def test_reconcile_command_repairs_drift(self):
+        from django.core.management import call_command
+
+        self._review(4)
+        Company.objects.filter(pk=self.company.pk).update(
+            review_count=9, rating_sum=0, rating_4_count=0, rating=1
+        )
+        call_command("reconcile_company_stats", stdout=StringIO())
+
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.review_count, 1)
+        self.assertEqual(self.company.rating_4_count, 1)
+        self.assertEqual(float(self.company.rating), 4.0)
+
+
 class LocalizationDisplayTests(TestCase):
     def test_category_display_name_uses_ru_for_regional_code(self):
         category = BusinessCategory.objects.create(
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from frontend.email_notifications import EmailNotificationService
+from frontend.models import Company, OutboundMessage, Review
+from frontend.outbox import (
+    PermanentDeliveryError,
+    RetryAfter,
+    enqueue_telegram,
+    process_outbox,
+)
+
+User = get_user_model()
+
+
+@override_settings(TELEGRAM_BOT_TOKEN="test-token", TELEGRAM_REVIEWS_CHAT_IDS=["1", "2"])
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username="manager", email="manager@example.com", password="password"
+        )
+        self.author = User.objects.create_user(username="author", password="password")
+        self.company = Company.objects.create(name="Outbox Co", manager=self.manager)
+
+    def _review(self):
+        return Review.objects.create(
+            company=self.company, user=self.author, user_name="Author", rating=4, text="Yaxshi"
+        )
+
+    def test_new_review_queues_telegram_without_network(self):
+        with mock.patch("requests.Session.post") as post:
+            self._review()
+        post.assert_not_called()
+        rows = OutboundMessage.objects.filter(channel="telegram")
+        self.assertEqual(sorted(r.payload["chat_id"] for r in rows), ["1", "2"])
+        self.assertTrue(all(r.status == "pending" for r in rows))
+
+    def test_email_is_delivered_by_worker(self):
+        review = self._review()
+        EmailNotificationService.send_new_review_notification(self.company, review)
+        self.assertEqual(len(mail.outbox), 0)
+
+        with mock.patch("frontend.outbox._telegram_call"):
+            counts = process_outbox()
+        self.assertEqual(counts["sent"], 3)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["manager@example.com"])
+        self.assertFalse(OutboundMessage.objects.exclude(status="sent").exists())
+
+    def test_failure_is_retried_with_backoff_then_given_up(self):
+        message = enqueue_telegram("1", "hello")
+        OutboundMessage.objects.filter(pk=message.pk).update(max_attempts=2)
+
+        with mock.patch("frontend.outbox._telegram_call", side_effect=OSError("timeout")):
+            self.assertEqual(process_outbox()["pending"], 1)
+            message.refresh_from_db()
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.next_attempt_at, timezone.now())
+            # Not due yet: nothing is claimed
+            self.assertEqual(process_outbox()["pending"], 0)
+
+            OutboundMessage.objects.filter(pk=message.pk).update(
+                next_attempt_at=timezone.now() - timedelta(seconds=1)
+            )
+            self.assertEqual(process_outbox()["failed"], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, "failed")
+        self.assertIn("timeout", message.last_error)
+
+    def test_rate_limit_waits_without_using_an_attempt(self):
+        message = enqueue_telegram("1", "hello")
+        with mock.patch("frontend.outbox._telegram_call", side_effect=RetryAfter(600)):
+            process_outbox()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("pending", 0))
+        self.assertGreaterEqual(
+            message.next_attempt_at, timezone.now() + timedelta(seconds=590)
+        )
+
+    def test_permanent_error_is_not_retried(self):
+        message = enqueue_telegram("1", "hello")
+        with mock.patch(
+            "frontend.outbox._telegram_call", side_effect=PermanentDeliveryError("chat not found")
+        ):
+            process_outbox()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("failed", 1))
@@ -0,0 +1,147 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from frontend.models import Company
+from frontend.pagination import keyset_paginate
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Duplicate ratings/counts make the id tie-breaker matter
+        for i in range(7):
+            Company.objects.create(
+                name=f"Company {i}", is_active=True, rating=i % 3, review_count=i % 2
+            )
+        self.ordering = ("-rating", "-review_count", "-id")
+        self.expected = list(
+            Company.objects.order_by(*self.ordering).values_list("id", flat=True)
+        )
+
+    def test_walks_forward_and_back_without_gaps(self):
+        qs = Company.objects.all()
+        seen, pages, cursor = [], [], None
+        while True:
+            page = keyset_paginate(qs, self.ordering, 3, cursor)
+            pages.append([c.id for c in page])
+            seen.extend(pages[-1])
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+
+        back = keyset_paginate(qs, self.ordering, 3, page.previous_cursor)
+        self.assertEqual([c.id for c in back], pages[1])
+        first = keyset_paginate(qs, self.ordering, 3, back.previous_cursor)
+        self.assertEqual([c.id for c in first], pages[0])
+        self.assertFalse(first.has_previous())
+
+    def test_tampered_cursor_restarts_at_first_page(self):
+        page = keyset_paginate(Company.objects.all(), self.ordering, 3, "not-a-cursor")
+        self.assertEqual([c.id for c in page], self.expected[:3])
+        self.assertFalse(page.has_previous())
+
+    def test_api_cursor_mode(self):
+        url = reverse("v1_companies")
+        data = self.client.get(url, {"cursor": "", "limit": 4}, secure=True).json()
+        self.assertEqual(data["pagination"]["total_count"], 7)
+        self.assertTrue(data["pagination"]["has_next"])
+        ids = [c["id"] for c in data["companies"]]
+
+        data = self.client.get(
+            url, {"cursor": data["pagination"]["next_cursor"], "limit": 4}, secure=True
+        ).json()
+        ids += [c["id"] for c in data["companies"]]
+        self.assertFalse(data["pagination"]["has_next"])
+        self.assertEqual(sorted(ids), sorted(self.expected))
+
+    def test_business_list_cursor_mode_keeps_canonical_clean(self):
+        response = self.client.get(
+            reverse("business_list"), {"cursor": "", "limit": 3, "sort": "new"}, secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["cursor_mode"])
+        self.assertEqual(len(response.context["page_obj"]), 3)
+        self.assertNotIn("cursor", response.context["canonical_url"])
+
+
+class ReviewFeedTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        from frontend.models import Review
+
+        User = get_user_model()
+        self.company = Company.objects.create(name="Feed Cafe", is_active=True)
+        for i in range(12):
+            user = User.objects.create_user(username=f"feed{i}", password="x")
+            Review.objects.create(
+                company=self.company,
+                user=user,
+                rating=i % 5 + 1,
+                like_count=i % 4,
+                text="" if i % 3 == 0 else f"review {i}",
+                is_approved=True,
+            )
+        self.url = reverse("company_reviews_feed", kwargs={"slug": self.company.slug})
+
+    def _walk(self, **params):
+        ids, cursor = [], ""
+        while True:
+            data = self.client.get(
+                self.url, {**params, "cursor": cursor, "limit": 5}, secure=True
+            ).json()
+            ids += [r["id"] for r in data["reviews"]]
+            if not data["has_next"]:
+                return ids
+            cursor = data["next_cursor"]
+
+    def test_each_sort_pages_in_order(self):
+        from frontend.review_feed import REVIEW_FEED_SORTS
+
+        for sort, ordering in REVIEW_FEED_SORTS.items():
+            expected = list(
+                self.company.reviews.order_by(*ordering).values_list("id", flat=True)
+            )
+            self.assertEqual(self._walk(sort=sort), expected, sort)
+
+    def test_filters_apply_to_feed(self):
+        ids = self._walk(sort="newest", with_text="1", stars="5")
+        expected = list(
+            self.company.reviews.filter(rating=5).exclude(text="")
+            .order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_company_detail_hands_cursor_to_infinite_scroll(self):
+        response = self.client.get(
+            reverse("company_detail", kwargs={"slug": self.company.slug}),
+            {"limit": 5},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["paginator"].count, 12)
+        data = self.client.get(
+            self.url, {"cursor": response.context["review_feed_cursor"], "limit": 5}, secure=True
+        ).json()
+        first_page = [r.pk for r in response.context["reviews"]]
+        self.assertEqual(len(data["reviews"]), 5)
+        self.assertFalse(set(first_page) & {r["id"] for r in data["reviews"]})
+
+    def test_owner_response_replaces_cached_card(self):
+        cache.clear()
+        self.company.manager = self.company.reviews.first().user
+        self.company.save()
+        review = self.company.reviews.order_by("-created_at", "-id").first()
+        self.client.get(self.url, {"sort": "newest", "limit": 5}, secure=True)
+
+        self.client.force_login(self.company.manager)
+        self.client.post(
+            reverse("manager_review_response", args=[review.pk]),
+            {"owner_response_text": "Rahmat, kutib qolamiz!"},
+            secure=True,
+        )
+        html = self.client.get(self.url, {"sort": "newest", "limit": 5}, secure=True).json()["html"]
+        self.assertIn("Rahmat, kutib qolamiz!", html)
@@ -1,10 +1,13 @@
 from django.test import TestCase
 from django.urls import reverse
 from frontend.models import Company, BusinessCategory
+from frontend.cache_utils import get_tag_versions
+from frontend.search import AUTOCOMPLETE_TAG, autocomplete_index, fold_search_text
 
 
 class SearchTests(TestCase):
     def setUp(self):
+        autocomplete_index.clear()
         self.category = BusinessCategory.objects.create(
             name="Test Category",
             name_ru="Тестовая категория",
@@ -55,3 +58,114 @@ class SearchTests(TestCase):
             reverse("search_suggestions_api"), {"q": "a"}, secure=True
         )
         self.assertEqual(response.status_code, 200)
+
+
+class SearchDocumentTests(TestCase):
+    def setUp(self):
+        self.category = BusinessCategory.objects.create(
+            name="Oshxona", name_ru="Ресторан", slug="oshxona"
+        )
+        self.company = Company.objects.create(
+            name="Rayhon",
+            name_ru="Райхон",
+            description="Milliy taomlar",
+            city="Toshkent",
+            category_fk=self.category,
+            is_active=True,
+        )
+
+    def test_document_covers_translations_city_and_category(self):
+        document = Company.objects.get(pk=self.company.pk).search_document
+        for part in ("rayhon", "райхон", "milliy taomlar", "toshkent", "oshxona", "ресторан"):
+            self.assertIn(part, document)
+
+    def test_apostrophe_variants_match(self):
+        self.company.description = "Go‘shtli taomlar"
+        self.company.save(update_fields=["description"])
+        response = self.client.get(reverse("business_list"), {"q": "go'shtli"}, secure=True)
+        self.assertContains(response, "Rayhon")
+
+    def test_category_rename_refreshes_member_documents(self):
+        self.category.name_ru = "Кафе"
+        self.category.save()
+        self.assertIn("кафе", Company.objects.get(pk=self.company.pk).search_document)
+
+    def test_business_list_searches_russian_name(self):
+        response = self.client.get(reverse("business_list"), {"q": "Райхон"}, secure=True)
+        self.assertContains(response, "Rayhon")
+
+    def test_rebuild_command_backfills(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        Company.objects.filter(pk=self.company.pk).update(search_document="")
+        call_command("rebuild_search_documents", stdout=StringIO())
+        self.assertIn("rayhon", Company.objects.get(pk=self.company.pk).search_document)
+
+
+class AutocompleteIndexTests(TestCase):
+    def setUp(self):
+        autocomplete_index.clear()
+        self.category = BusinessCategory.objects.create(
+            name="Oshxona", name_ru="Ресторан", slug="oshxona"
+        )
+        self.company = Company.objects.create(
+            name="O‘zbegim Plov",
+            name_ru="Узбегим Плов",
+            category_fk=self.category,
+            is_active=True,
+            rating=4,
+        )
+
+    def _names(self, query):
+        response = self.client.get(
+            reverse("search_suggestions_api"), {"q": query}, secure=True
+        )
+        return [r["name"] for r in response.json()["results"]]
+
+    def test_fold_unifies_scripts_and_apostrophes(self):
+        self.assertEqual(fold_search_text("Ўзбек"), "ozbek")
+        self.assertEqual(fold_search_text("O‘zbek"), "ozbek")
+        self.assertEqual(fold_search_text("oʻzbek"), "ozbek")
+
+    def test_prefix_matches_any_word_in_either_script(self):
+        for query in ("o'zbegim", "ozb", "Узбег", "plov", "Плов", "restor"):
+            self.assertEqual(self._names(query), ["O‘zbegim Plov"], query)
+        self.assertEqual(self._names("lov"), [])
+
+    def test_lookup_does_not_query_database_once_built(self):
+        self._names("plov")
+        with self.assertNumQueries(0):
+            self.assertEqual(self._names("plo"), ["O‘zbegim Plov"])
+
+    def test_signals_refresh_index_incrementally(self):
+        self._names("plov")
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Company.objects.create(name="Plov Center", is_active=True, rating=5)
+        self.assertEqual(self._names("plov"), ["Plov Center", "O‘zbegim Plov"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.is_active = False
+            other.save()
+        self.assertEqual(self._names("plov"), ["O‘zbegim Plov"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.is_active = False
+            self.category.save()
+        self.assertEqual(self._names("plov"), [])
+
+    def test_saves_that_leave_the_entry_unchanged_do_not_publish(self):
+        self._names("plov")
+        version = get_tag_versions([AUTOCOMPLETE_TAG])[AUTOCOMPLETE_TAG]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.view_count = 10
+            self.company.save()
+            self.company.like_count = 3
+            self.company.save(update_fields=["like_count"])
+        self.assertEqual(get_tag_versions([AUTOCOMPLETE_TAG])[AUTOCOMPLETE_TAG], version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.name = "Plov Saroy"
+            self.company.save()
+        self.assertNotEqual(get_tag_versions([AUTOCOMPLETE_TAG])[AUTOCOMPLETE_TAG], version)
+        self.assertEqual(self._names("saroy"), ["Plov Saroy"])
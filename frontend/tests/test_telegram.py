@@ -0,0 +1,68 @@
+import io
+import json
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from frontend.telegram import MultipartStream, TelegramClient, TelegramError
+
+
+def _response(status, payload):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+class TelegramClientTests(SimpleTestCase):
+    def setUp(self):
+        self.client_ = TelegramClient("test-token")
+
+    def test_multipart_stream_reads_file_in_chunks(self):
+        photo = io.BytesIO(b"x" * 200_000)
+        body = MultipartStream({"chat_id": "1"}, {"photo": ("r.jpg", photo, 200_000, "image/jpeg")})
+        chunks = []
+        while True:
+            chunk = body.read(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        data = b"".join(chunks)
+        self.assertEqual(len(data), len(body))
+        self.assertLessEqual(max(map(len, chunks)), 65536)
+        self.assertIn(b'name="photo"; filename="r.jpg"', data)
+        self.assertTrue(data.endswith(f"--{body.boundary}--\r\n".encode()))
+
+    def test_short_rate_limit_is_waited_out(self):
+        responses = [
+            _response(429, {"ok": False, "parameters": {"retry_after": 1}}),
+            _response(200, {"ok": True, "result": {"message_id": 7}}),
+        ]
+        with mock.patch.object(self.client_.session, "post", side_effect=responses), mock.patch(
+            "frontend.telegram.time.sleep"
+        ) as sleep:
+            result = self.client_.send_message("1", "hi")
+        sleep.assert_called_once_with(1)
+        self.assertEqual(result, {"message_id": 7})
+
+    def test_long_rate_limit_is_raised_with_retry_after(self):
+        response = _response(429, {"ok": False, "parameters": {"retry_after": 60}})
+        with mock.patch.object(self.client_.session, "post", return_value=response):
+            with self.assertRaises(TelegramError) as ctx:
+                self.client_.send_message("1", "hi")
+        self.assertEqual(ctx.exception.retry_after, 60)
+
+    def test_fan_out_reports_each_chat(self):
+        def post(url, data=None, **kwargs):
+            if data["chat_id"] == "bad":
+                return _response(400, {"ok": False, "description": "chat not found"})
+            return _response(200, {"ok": True, "result": {"chat": data["chat_id"]}})
+
+        with mock.patch.object(self.client_.session, "post", side_effect=post):
+            results = self.client_.fan_out(
+                ["1", "bad", "2"], lambda chat_id: self.client_.send_message(chat_id, "hi")
+            )
+        self.assertEqual(list(results), ["1", "bad", "2"])
+        self.assertEqual(results["2"], {"chat": "2"})
+        self.assertTrue(results["bad"].is_permanent)
@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from frontend.models import Company
+from frontend.view_counts import (
+    apply_view_counts,
+    flush_local_view_counts,
+    pending_view_counts,
+)
+
+
+class ViewCountBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        flush_local_view_counts()
+        self.company = Company.objects.create(name="Viewed Co", is_active=True)
+        self.url = reverse("company_detail", args=[self.company.slug])
+
+    def tearDown(self):
+        flush_local_view_counts()
+
+    def test_detail_view_is_buffered_not_written(self):
+        self.client.get(self.url, secure=True)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.view_count, 0)
+        self.assertEqual(pending_view_counts([self.company.pk]), {self.company.pk: 1})
+
+    def test_repeat_visit_is_deduplicated(self):
+        self.client.get(self.url, secure=True)
+        self.client.get(self.url, secure=True)
+        self.assertEqual(pending_view_counts([self.company.pk]), {self.company.pk: 1})
+
+        other = self.client_class()
+        other.get(self.url, secure=True, HTTP_USER_AGENT="another-browser")
+        self.assertEqual(pending_view_counts([self.company.pk]), {self.company.pk: 2})
+
+    def test_forwarded_client_ips_are_counted_separately(self):
+        for ip in ("203.0.113.5", "198.51.100.7, 10.0.0.2"):
+            self.client_class().get(
+                self.url, secure=True, REMOTE_ADDR="172.18.0.5", HTTP_X_FORWARDED_FOR=ip
+            )
+        self.assertEqual(pending_view_counts([self.company.pk]), {self.company.pk: 2})
+
+        self.client_class().get(
+            self.url, secure=True, REMOTE_ADDR="172.18.0.5", HTTP_X_FORWARDED_FOR="203.0.113.5"
+        )
+        self.assertEqual(pending_view_counts([self.company.pk]), {self.company.pk: 2})
+
+    def test_edge_cache_refresh_is_not_counted(self):
+        self.client.get(self.url, secure=True, HTTP_X_EDGE_REFRESH="1")
+        self.assertEqual(pending_view_counts([self.company.pk]), {})
+        self.client.get(self.url, secure=True)
+        self.assertEqual(pending_view_counts([self.company.pk]), {self.company.pk: 1})
+
+    def test_flush_command_applies_buffer(self):
+        self.client.get(self.url, secure=True)
+        out = StringIO()
+        call_command("flush_view_counts", stdout=out)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.view_count, 1)
+        self.assertEqual(pending_view_counts([self.company.pk]), {})
+        self.assertIn("Flushed 1", out.getvalue())
+
+    def test_apply_view_counts_updates_many_rows_at_once(self):
+        other = Company.objects.create(name="Other Co", is_active=True, view_count=5)
+        # One UPDATE plus the two daily-rollup upserts, however many companies
+        with self.assertNumQueries(3):
+            apply_view_counts({self.company.pk: 3, other.pk: 2})
+        self.company.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.company.view_count, other.view_count), (3, 7))
+
+
+class ExitFlushTests(SimpleTestCase):
+    """Leftover buffered views are only written by serving processes."""
+
+    def test_no_flush_at_exit_outside_serving_processes(self):
+        import importlib.util
+        from unittest import mock
+
+        from frontend import view_counts
+
+        # A fresh copy of the module, as the test runner or a command imports it
+        spec = importlib.util.spec_from_file_location("view_counts_copy", view_counts.__file__)
+        module = importlib.util.module_from_spec(spec)
+        with mock.patch("atexit.register") as register:
+            spec.loader.exec_module(module)
+            register.assert_not_called()
+
+            module.register_exit_flush()  # myproject/wsgi.py, myproject/asgi.py
+            register.assert_called_once_with(module.flush_local_view_counts)
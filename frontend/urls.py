@@ -96,6 +96,11 @@ urlpatterns = [
     path("bizness/<int:pk>/", company_detail_by_pk),
     # Canonical slug-based URL (SEO-friendly)
     path("bizneslar/<slug:slug>/", company_detail, name="company_detail"),
+    path(
+        "api/companies/<slug:slug>/reviews/",
+        views.company_reviews_feed,
+        name="company_reviews_feed",
+    ),
     path("widget/<int:pk>/", views.company_widget, name="company_widget"),
     path(
         "business/<int:pk>/reveal/<str:kind>/",
@@ -114,6 +119,7 @@ urlpatterns = [
     path("verification-badge/", verification_badge, name="verification_badge"),
     # New ownership claim API
     path("api/business/<int:pk>/claim/", submit_ownership_claim, name="submit_ownership_claim"),
+    path("api/csrf/", views.csrf_token_api, name="csrf_token"),
     path("api/admin/claim/<int:claim_id>/approve/", admin_approve_claim, name="admin_approve_claim"),
     path("api/admin/claim/<int:claim_id>/reject/", admin_reject_claim, name="admin_reject_claim"),
     path("api/telegram/claim-webhook/", telegram_claim_webhook, name="telegram_claim_webhook"),
@@ -209,6 +215,16 @@ urlpatterns = [
         moderation_views.request_data_export,
         name="request_data_export",
     ),
+    path(
+        "export/download/<int:export_id>/",
+        moderation_views.download_data_export,
+        name="download_data_export",
+    ),
+    path(
+        "export/status/<int:export_id>/",
+        moderation_views.data_export_status,
+        name="data_export_status",
+    ),
     # Utility
     path("health/", views.health_check, name="health_check"),
     # API v1
@@ -33,15 +33,12 @@ def compute_assessment(rating: float, review_count: int) -> Assessment:
 
 # --- Notifications / Utilities ---
 def send_telegram_review_notification(review) -> None:
-    """Send a Telegram notification for a new review with Approve/Reject inline buttons.
-    If the review has a receipt image, sends it via sendPhoto (multipart); otherwise sendMessage.
+    """Queue a Telegram notification for a new review with Approve/Reject inline buttons.
+    If the review has a receipt image it is sent via sendPhoto, otherwise sendMessage.
+    Delivery happens in ``process_outbox``; this only writes outbox rows.
     """
-    import json
-    import urllib.request
-    import urllib.parse
-    import io
-    import os
     from django.conf import settings
+    from .outbox import enqueue_telegram
 
     token = getattr(settings, "TELEGRAM_BOT_TOKEN", "")
     chat_ids = getattr(settings, "TELEGRAM_REVIEWS_CHAT_IDS", [])
@@ -59,147 +56,43 @@ def send_telegram_review_notification(review) -> None:
         f"🔗 <a href='{site_url}/company/{review.company.pk}/'>Kompaniyaga o'tish</a>"
     )
 
-    reply_markup = json.dumps({
+    reply_markup = {
         "inline_keyboard": [[
             {"text": "✅ Tasdiqlash", "callback_data": f"approve:{review.pk}"},
             {"text": "❌ O'chirish", "callback_data": f"reject:{review.pk}"},
         ]]
-    })
+    }
 
-    # Check whether there is a receipt image file on disk
-    has_receipt = False
-    receipt_path = None
-    if review.receipt:
-        try:
-            receipt_path = review.receipt.path
-            has_receipt = os.path.isfile(receipt_path)
-        except Exception:
-            has_receipt = False
+    photo = review.receipt.name if review.receipt else None
 
     for chat_id in chat_ids:
-        try:
-            if has_receipt:
-                # --- sendPhoto via multipart/form-data ---
-                boundary = "TGBotBoundary"
-                def _field(name, value):
-                    return (
-                        f"--{boundary}\r\n"
-                        f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
-                        f"{value}\r\n"
-                    ).encode("utf-8")
-
-                with open(receipt_path, "rb") as fh:
-                    file_bytes = fh.read()
-                filename = os.path.basename(receipt_path)
-                # Determine MIME type
-                ext = filename.rsplit(".", 1)[-1].lower()
-                mime = {"jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png",
-                        "gif": "image/gif", "webp": "image/webp"}.get(ext, "application/octet-stream")
-
-                body = io.BytesIO()
-                body.write(_field("chat_id", str(chat_id)))
-                body.write(_field("caption", text[:1024]))
-                body.write(_field("parse_mode", "HTML"))
-                body.write(_field("reply_markup", reply_markup))
-                # file field
-                body.write((
-                    f"--{boundary}\r\n"
-                    f"Content-Disposition: form-data; name=\"photo\"; filename=\"{filename}\"\r\n"
-                    f"Content-Type: {mime}\r\n\r\n"
-                ).encode("utf-8"))
-                body.write(file_bytes)
-                body.write(f"\r\n--{boundary}--\r\n".encode("utf-8"))
-
-                body_bytes = body.getvalue()
-                url = f"https://api.telegram.org/bot{token}/sendPhoto"
-                req = urllib.request.Request(
-                    url,
-                    data=body_bytes,
-                    headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
-                )
-                with urllib.request.urlopen(req, timeout=15) as resp:
-                    resp.read()
-            else:
-                # --- plain sendMessage ---
-                base = f"https://api.telegram.org/bot{token}/sendMessage"
-                data = {
-                    "chat_id": chat_id,
-                    "text": text,
-                    "parse_mode": "HTML",
-                    "disable_web_page_preview": "true",
-                    "reply_markup": reply_markup,
-                }
-                req = urllib.request.Request(
-                    base, data=urllib.parse.urlencode(data).encode("utf-8")
-                )
-                with urllib.request.urlopen(req, timeout=5) as resp:
-                    resp.read()
-        except Exception:
-            # If photo send fails, fall back to text-only message
-            try:
-                base = f"https://api.telegram.org/bot{token}/sendMessage"
-                data = {
-                    "chat_id": chat_id,
-                    "text": text + "\n\n📎 <i>Chek fayli yuborishda xatolik</i>",
-                    "parse_mode": "HTML",
-                    "disable_web_page_preview": "true",
-                    "reply_markup": reply_markup,
-                }
-                req = urllib.request.Request(
-                    base, data=urllib.parse.urlencode(data).encode("utf-8")
-                )
-                with urllib.request.urlopen(req, timeout=5) as resp:
-                    resp.read()
-            except Exception:
-                continue
+        enqueue_telegram(chat_id, text, reply_markup=reply_markup, photo=photo)
 
 
 def answer_telegram_callback(callback_query_id: str, text: str, token: str) -> None:
     """Acknowledge a Telegram callback query (removes the loading spinner)."""
-    import urllib.request
-    import urllib.parse
+    from .telegram import get_telegram_client
 
     try:
-        base = f"https://api.telegram.org/bot{token}/answerCallbackQuery"
-        data = {"callback_query_id": callback_query_id, "text": text, "show_alert": "false"}
-        req = urllib.request.Request(
-            base, data=urllib.parse.urlencode(data).encode("utf-8")
-        )
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            resp.read()
+        get_telegram_client(token).answer_callback_query(callback_query_id, text)
     except Exception:
         pass
 
 
 def edit_telegram_message(chat_id: str, message_id: int, new_text: str, token: str) -> None:
     """Edit an existing Telegram message after approve/reject."""
-    import urllib.request
-    import urllib.parse
+    from .telegram import get_telegram_client
 
     try:
-        base = f"https://api.telegram.org/bot{token}/editMessageText"
-        data = {
-            "chat_id": chat_id,
-            "message_id": message_id,
-            "text": new_text,
-            "parse_mode": "HTML",
-            "disable_web_page_preview": "true",
-        }
-        req = urllib.request.Request(
-            base, data=urllib.parse.urlencode(data).encode("utf-8")
-        )
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            resp.read()
+        get_telegram_client(token).edit_message_text(chat_id, message_id, new_text)
     except Exception:
         pass
 
 
 def send_ownership_claim_notification(claim) -> None:
     """Send structured Telegram message for a new BusinessOwnershipClaim with Approve/Reject buttons."""
-    import json
-    import urllib.request
-    import urllib.parse
     from django.conf import settings
+    from .telegram import get_telegram_client
 
     token = getattr(settings, "TELEGRAM_BOT_TOKEN", "")
     chat_ids = getattr(settings, "TELEGRAM_ADMIN_CHAT_IDS", [])
@@ -239,28 +132,16 @@ def send_ownership_claim_notification(claim) -> None:
         ]]
     }
 
-    base = f"https://api.telegram.org/bot{token}/sendMessage"
+    client = get_telegram_client(token)
+    results = client.fan_out(
+        chat_ids, lambda chat_id: client.send_message(chat_id, text, reply_markup=keyboard)
+    )
     last_msg_id = None
     last_chat_id = None
-    for chat_id in chat_ids:
-        try:
-            data = {
-                "chat_id": chat_id,
-                "text": text,
-                "parse_mode": "HTML",
-                "disable_web_page_preview": "true",
-                "reply_markup": json.dumps(keyboard),
-            }
-            req = urllib.request.Request(
-                base, data=urllib.parse.urlencode(data).encode("utf-8")
-            )
-            with urllib.request.urlopen(req, timeout=5) as resp:
-                result = json.loads(resp.read())
-                if result.get("ok"):
-                    last_msg_id = str(result["result"]["message_id"])
-                    last_chat_id = str(chat_id)
-        except Exception:
-            continue
+    for chat_id, result in results.items():
+        if isinstance(result, dict) and result.get("message_id"):
+            last_msg_id = str(result["message_id"])
+            last_chat_id = str(chat_id)
 
     # Store message id so we can edit it on approve/reject
     if last_msg_id:
@@ -272,37 +153,20 @@ def send_ownership_claim_notification(claim) -> None:
 
 
 def send_telegram_message(message: str, chat_ids: list[str] | None = None) -> None:
-    import json
-    import urllib.request
-    import urllib.parse
+    """Send ``message`` to ``chat_ids`` (default: admin chats) concurrently; failures are logged."""
     from django.conf import settings
+    from .telegram import get_telegram_client
 
-    token = getattr(settings, "TELEGRAM_BOT_TOKEN", "")
+    client = get_telegram_client()
     chats = (
         chat_ids
         if chat_ids is not None
         else getattr(settings, "TELEGRAM_ADMIN_CHAT_IDS", [])
     )
-    if not token or not chats:
+    if client is None or not chats:
         return
 
-    base = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload_base = {
-        "text": message,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": "true",
-    }
-    for chat_id in chats:
-        try:
-            data = payload_base | {"chat_id": chat_id}
-            req = urllib.request.Request(
-                base, data=urllib.parse.urlencode(data).encode("utf-8")
-            )
-            with urllib.request.urlopen(req, timeout=5) as resp:
-                resp.read()
-        except Exception:
-            # Ignore failures silently in development
-            continue
+    client.fan_out(chats, lambda chat_id: client.send_message(chat_id, message))
 
 
 def diff_instance_fields(instance, changed_data: dict) -> str:
@@ -313,24 +177,178 @@ def diff_instance_fields(instance, changed_data: dict) -> str:
     return "; ".join(parts)
 
 
+RATING_BUCKET_FIELDS = {star: f"rating_{star}_count" for star in range(1, 6)}
+
+
+def review_stats_contribution(company_id, is_approved, rating):
+    """What a review adds to its company's aggregates: ``(company_id, rating)`` or None."""
+    try:
+        rating = int(rating)
+    except (TypeError, ValueError):
+        return None
+    if company_id and is_approved and 1 <= rating <= 5:
+        return (company_id, rating)
+    return None
+
+
+def apply_review_stats_change(removed=(), added=()) -> None:
+    """Fold approved-review contributions into Company aggregates in O(1).
+
+    ``removed``/``added`` are iterables of ``(company_id, rating)`` pairs as
+    returned by :func:`review_stats_contribution`. Each affected company gets
+    a single ``UPDATE`` with ``F()`` deltas; ``rating`` is derived in the same
+    statement from the new running sum and count.
+    """
+    from collections import Counter, defaultdict
+
+    deltas = defaultdict(Counter)
+    for sign, contributions in ((-1, removed), (1, added)):
+        for item in contributions:
+            if not item:
+                continue
+            company_id, rating = item
+            delta = deltas[company_id]
+            delta["count"] += sign
+            delta["sum"] += sign * rating
+            delta[rating] += sign
+
+    for company_id, delta in deltas.items():
+        if any(delta.values()):
+            _apply_company_stats_delta(company_id, delta)
+
+
+def _apply_company_stats_delta(company_id, delta) -> None:
+    from django.db.models import DecimalField, F, FloatField, Value
+    from django.db.models.functions import Cast, Coalesce, Greatest, NullIf, Round
+    from .models import Company
+
+    count = Greatest(F("review_count") + delta["count"], Value(0))
+    total = Greatest(F("rating_sum") + delta["sum"], Value(0))
+    updates = {
+        "review_count": count,
+        "rating_sum": total,
+        "rating": Cast(
+            Coalesce(Round(Cast(total, FloatField()) / NullIf(count, Value(0)), 2), Value(0.0)),
+            DecimalField(max_digits=3, decimal_places=2),
+        ),
+    }
+    for star, field in RATING_BUCKET_FIELDS.items():
+        if delta[star]:
+            updates[field] = Greatest(F(field) + delta[star], Value(0))
+    Company.objects.filter(pk=company_id).update(**updates)
+
+
+def set_reviews_approval(queryset, approved: bool) -> int:
+    """Bulk (un)approve reviews and fold the change into company aggregates
+    and the authors' gamification counters.
+
+    Replaces ``queryset.update(is_approved=...)`` + per-company rescans.
+    Returns the number of reviews whose approval state actually changed.
+    """
+    from collections import Counter
+
+    from django.db import transaction
+
+    from .gamification import record_review_approved, record_review_withdrawn
+    from .rollups import mark_days_for_refold
+
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(is_approved=not approved)
+            .select_for_update()
+            .values_list("pk", "company_id", "rating", "created_at", "user_id")
+        )
+        if not rows:
+            return 0
+        queryset.model.objects.filter(pk__in=[row[0] for row in rows]).update(
+            is_approved=approved
+        )
+        contributions = [
+            review_stats_contribution(company_id, True, rating)
+            for _, company_id, rating, _, _ in rows
+        ]
+        if approved:
+            apply_review_stats_change(added=contributions)
+        else:
+            apply_review_stats_change(removed=contributions)
+        mark_days_for_refold(*(created_at for _, _, _, created_at, _ in rows))
+        # The Review signals would have moved each author's gamification
+        # counters; one update per author instead of per review
+        record = record_review_approved if approved else record_review_withdrawn
+        for user_id, reviews in Counter(row[4] for row in rows if row[4]).items():
+            record(user_id, reviews)
+
+    # queryset.update() bypasses the Review signals that invalidate caches
+    from .cache_utils import company_cache_tags, company_tag, invalidate_tags
+    from .edge_cache import purge_tags
+    from .models import Company
+
+    company_ids = {company_id for _, company_id, _, _, _ in rows}
+    tags = []
+    for company_id, category_id, city in Company.objects.filter(
+        pk__in=company_ids
+    ).values_list("pk", "category_fk_id", "city"):
+        tags.extend(company_cache_tags(company_id, category_id, city))
+    invalidate_tags(*tags)
+    purge_tags(*(company_tag(company_id) for company_id in company_ids))
+    return len(rows)
+
+
+def company_stats_from_reviews(company_ids) -> dict:
+    """Recompute aggregates for ``company_ids`` with a single GROUP BY.
+
+    Returns ``{company_id: {field: value}}`` for every requested id.
+    """
+    from collections import defaultdict
+    from django.db.models import Count
+    from .models import Review
+
+    hist = defaultdict(dict)
+    rows = (
+        Review.objects.filter(
+            company_id__in=company_ids, is_approved=True, rating__gte=1, rating__lte=5
+        )
+        .values("company_id", "rating")
+        .annotate(n=Count("id"))
+    )
+    for row in rows:
+        hist[row["company_id"]][row["rating"]] = row["n"]
+
+    stats = {}
+    for company_id in company_ids:
+        buckets = hist.get(company_id, {})
+        count = sum(buckets.values())
+        total = sum(star * n for star, n in buckets.items())
+        values = {
+            "review_count": count,
+            "rating_sum": total,
+            "rating": round(total / count, 2) if count else 0,
+        }
+        for star, field in RATING_BUCKET_FIELDS.items():
+            values[field] = buckets.get(star, 0)
+        stats[company_id] = values
+    return stats
+
+
 def recalculate_company_stats(company_id: int) -> None:
-    """Recalculate rating and review_count for a company based on approved reviews."""
-    from django.db.models import Avg, Count
+    """Rescan approved reviews and rewrite a company's aggregates.
+
+    Day-to-day updates are incremental (:func:`apply_review_stats_change`);
+    this full rescan is kept for repairs and the ``reconcile_company_stats``
+    command.
+    """
     from .models import Company
 
     try:
         company = Company.objects.get(pk=company_id)
-        agg = company.reviews.filter(is_approved=True).aggregate(
-            avg=Avg("rating"), cnt=Count("id")
-        )
-        new_review_count = int(agg.get("cnt") or 0)
-        new_rating = round(float(agg.get("avg") or 0.0), 2) if new_review_count else 0
-
-        if company.review_count != new_review_count or float(company.rating) != float(
-            new_rating
-        ):
-            company.review_count = new_review_count
-            company.rating = new_rating
-            company.save(update_fields=["review_count", "rating"])
     except Company.DoesNotExist:
-        pass
+        return
+    values = company_stats_from_reviews([company_id])[company_id]
+    changed = [
+        field for field, value in values.items()
+        if float(getattr(company, field)) != float(value)
+    ]
+    if changed:
+        for field in changed:
+            setattr(company, field, values[field])
+        company.save(update_fields=changed)
@@ -0,0 +1,203 @@
+"""
+Buffered company view counters.
+
+``company_detail`` used to run ``UPDATE ... view_count + 1`` (and write a
+session) for every new visitor, serialising writes on popular rows. Views
+are now accumulated in a Redis hash (or, without Redis, an in-process
+counter) and folded into ``Company.view_count`` in one bulk statement:
+
+- Redis: ``flush_view_counts`` (cron / systemd timer) drains the hash.
+- In-process: the buffer flushes itself every ``VIEW_FLUSH_INTERVAL``
+  seconds on the next recorded view, and when a WSGI/ASGI worker exits
+  (:func:`register_exit_flush`). Management commands and the test runner
+  never flush at exit: their database may be gone, or not the one the
+  views were counted against.
+
+Visitor de-duplication uses a short-lived cache key instead of the session,
+so anonymous visits no longer create session rows.
+"""
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+VIEW_BUFFER_KEY = "viewbuf"
+VIEW_FLUSHING_KEY = "viewbuf:flushing"
+VIEW_FLUSH_LOCK = "viewbuf:lock"
+VIEW_DEDUPE_TIMEOUT = 60 * 30  # one view per visitor per company per 30 minutes
+VIEW_FLUSH_INTERVAL = 60  # seconds, in-process buffer only
+
+_local_buffer = Counter()
+_local_lock = threading.Lock()
+_local_flushed_at = time.monotonic()
+
+
+def _redis():
+    """Raw Redis client behind the default cache, or None (LocMem, tests)."""
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+    except Exception:
+        return None
+
+
+def _redis_key(name: str) -> str:
+    return cache.make_key(name)
+
+
+def _visitor_fingerprint(request) -> str:
+    session_key = getattr(request, "session", None) and request.session.session_key
+    if session_key:
+        raw = f"s:{session_key}"
+    else:
+        # Client IP as elsewhere in the views: behind nginx REMOTE_ADDR is the proxy
+        ip = request.META.get("HTTP_X_FORWARDED_FOR", request.META.get("REMOTE_ADDR", ""))
+        ip = ip.split(",")[0].strip() if ip else ""
+        raw = f"a:{ip}:{request.META.get('HTTP_USER_AGENT', '')}"
+    return hashlib.md5(raw.encode()).hexdigest()[:16]
+
+
+def record_company_view(request, company_id) -> bool:
+    """Count a view unless this visitor was counted recently; returns True if counted."""
+    dedupe_key = f"viewed:{company_id}:{_visitor_fingerprint(request)}"
+    if not cache.add(dedupe_key, 1, VIEW_DEDUPE_TIMEOUT):
+        return False
+
+    conn = _redis()
+    if conn is not None:
+        try:
+            conn.hincrby(_redis_key(VIEW_BUFFER_KEY), company_id, 1)
+            return True
+        except Exception:
+            logger.warning("Redis view buffer unavailable; buffering in-process")
+
+    global _local_flushed_at
+    with _local_lock:
+        _local_buffer[int(company_id)] += 1
+        due = time.monotonic() - _local_flushed_at >= VIEW_FLUSH_INTERVAL
+    if due:
+        flush_local_view_counts()
+    return True
+
+
+def pending_view_counts(company_ids) -> dict:
+    """Views recorded but not yet written to the database, by company id."""
+    company_ids = [int(pk) for pk in company_ids]
+    pending = Counter()
+    with _local_lock:
+        for pk in company_ids:
+            if _local_buffer.get(pk):
+                pending[pk] += _local_buffer[pk]
+
+    conn = _redis()
+    if conn is not None and company_ids:
+        try:
+            for key in (VIEW_BUFFER_KEY, VIEW_FLUSHING_KEY):
+                values = conn.hmget(_redis_key(key), company_ids)
+                for pk, value in zip(company_ids, values):
+                    if value:
+                        pending[pk] += int(value)
+        except Exception:
+            pass
+    return dict(pending)
+
+
+def apply_view_counts(counts: dict) -> int:
+    """Add ``{company_id: views}`` to ``Company.view_count`` in one UPDATE.
+
+    The same views are added to today's ``DailyCompanyStats`` rows.
+    """
+    from .models import Company
+    from .rollups import add_daily_views
+
+    counts = {int(pk): int(n) for pk, n in counts.items() if int(n) > 0}
+    if not counts:
+        return 0
+    add_daily_views(counts)
+    table = Company._meta.db_table
+    if connection.vendor == "postgresql":
+        values = ", ".join(["(%s, %s)"] * len(counts))
+        params = [x for item in counts.items() for x in item]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} AS c SET view_count = c.view_count + v.n "
+                f"FROM (VALUES {values}) AS v(id, n) WHERE c.id = v.id",
+                params,
+            )
+            return cursor.rowcount
+
+    from django.db.models import Case, F, IntegerField, Value, When
+
+    delta = Case(
+        *[When(pk=pk, then=Value(n)) for pk, n in counts.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return Company.objects.filter(pk__in=counts).update(view_count=F("view_count") + delta)
+
+
+def flush_local_view_counts() -> int:
+    """Write this process's in-memory buffer to the database."""
+    global _local_flushed_at
+    with _local_lock:
+        counts = dict(_local_buffer)
+        _local_buffer.clear()
+        _local_flushed_at = time.monotonic()
+    if not counts:
+        return 0
+    try:
+        with transaction.atomic():
+            apply_view_counts(counts)
+    except Exception:
+        logger.exception("Failed to flush buffered view counts")
+        with _local_lock:
+            _local_buffer.update(counts)
+        return 0
+    return sum(counts.values())
+
+
+def flush_redis_view_counts() -> int:
+    """Drain the shared Redis buffer into the database; returns views written.
+
+    The live hash is renamed aside first, so views recorded during the flush
+    land in a fresh hash. A leftover ``flushing`` hash from a crashed run is
+    applied before anything new.
+    """
+    conn = _redis()
+    if conn is None:
+        return 0
+    if not cache.add(VIEW_FLUSH_LOCK, 1, 300):
+        logger.info("Another view-count flush is running")
+        return 0
+    live, flushing = _redis_key(VIEW_BUFFER_KEY), _redis_key(VIEW_FLUSHING_KEY)
+    try:
+        if not conn.exists(flushing) and conn.exists(live):
+            conn.renamenx(live, flushing)
+        raw = conn.hgetall(flushing)
+        if not raw:
+            return 0
+        counts = {int(pk): int(n) for pk, n in raw.items()}
+        with transaction.atomic():
+            apply_view_counts(counts)
+        conn.delete(flushing)
+        return sum(counts.values())
+    finally:
+        cache.delete(VIEW_FLUSH_LOCK)
+
+
+def flush_view_counts() -> int:
+    return flush_redis_view_counts() + flush_local_view_counts()
+
+
+def register_exit_flush() -> None:
+    """Flush the in-process buffer when this process exits (serving processes only)."""
+    atexit.register(flush_local_view_counts)
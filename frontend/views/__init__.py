@@ -25,6 +25,7 @@ from .company import (
     verification_badge,
     company_detail,
     company_detail_by_pk,
+    company_reviews_feed,
     reveal_contact,
     like_company,
     submit_ownership_claim,
@@ -59,6 +60,7 @@ from .misc import (
     bing_site_auth,
     favicon_file,
     service_worker,
+    csrf_token_api,
     health_check,
     ratelimit_error,
     widgets_page,
@@ -80,6 +82,7 @@ __all__ = [
     "verification_badge",
     "company_detail",
     "company_detail_by_pk",
+    "company_reviews_feed",
     "reveal_contact",
     "like_company",
     # review
@@ -103,6 +106,7 @@ __all__ = [
     "bing_site_auth",
     "favicon_file",
     "service_worker",
+    "csrf_token_api",
     "health_check",
     "ratelimit_error",
     "widgets_page",
@@ -6,14 +6,25 @@ from datetime import timedelta
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
 from django.core.mail import send_mail
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Avg, Count, F, Prefetch, Q, Sum
+from django.db.models import Avg, Count, F, Q, Sum
 from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.urls import reverse
-from frontend.cache_utils import get_safe_pagination_param, get_safe_limit_param
+from frontend.cache_utils import (
+    CATEGORIES_TAG,
+    COMPANY_DIRECTORY_TAG,
+    COMPANY_LIST_TAG,
+    category_tag,
+    city_tag,
+    company_fragment_versions,
+    company_tag,
+    get_safe_limit_param,
+    get_or_compute,
+    get_safe_pagination_param,
+    invalidate_tags,
+)
 from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.timezone import now
@@ -22,6 +33,10 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django_ratelimit.decorators import ratelimit
 
+from ..activity_log import log_activity
+from ..analytics import company_totals, daily_series
+from ..edge_cache import is_edge_refresh
+from ..http_cache import public_cache
 from ..forms import (
     BusinessOwnershipClaimForm,
     ClaimCompanyForm,
@@ -29,7 +44,6 @@ from ..forms import (
     ReviewApprovalRequestForm,
 )
 from ..models import (
-    ActivityLog,
     BusinessCategory,
     BusinessOwnershipClaim,
     Company,
@@ -45,37 +59,31 @@ from ..utils import (
     edit_telegram_message,
     answer_telegram_callback,
 )
+from ..pagination import approximate_count, keyset_paginate
+from ..review_feed import (
+    cursor_after,
+    mark_liked,
+    parse_review_feed_params,
+    review_feed_count,
+    review_feed_page,
+    review_feed_queryset,
+)
+from ..search import autocomplete_index, search_companies
+from ..view_counts import pending_view_counts, record_company_view
 from ..visibility import (
+    get_cached_categories,
     is_company_publicly_visible,
     public_companies_queryset,
     visible_business_categories,
 )
 
-try:
-    from django.contrib.postgres.search import (
-        SearchQuery,
-        SearchRank,
-        SearchVector,
-        TrigramSimilarity,
-    )
-except ImportError:
-    SearchQuery = SearchRank = SearchVector = TrigramSimilarity = None
-
 logger = logging.getLogger(__name__)
 
+# nginx-served hits skip record_company_view, so keep that window short
+COMPANY_DETAIL_S_MAXAGE = 30
 
-def home(request):
-    _is_anon_get = request.method == "GET" and not request.user.is_authenticated
-    _home_cache_key = None
-    if _is_anon_get:
-        from django.utils.translation import get_language
-        _home_cache_key = f"home_page:{get_language()}"
-        _cached = cache.get(_home_cache_key)
-        if _cached is not None:
-            _resp = HttpResponse(_cached)
-            _resp["Vary"] = "Accept-Language"
-            return _resp
 
+def _render_home(request):
     top_companies = public_companies_queryset().select_related("category_fk").order_by("-rating")[:6]
     trending = public_companies_queryset().select_related("category_fk").order_by("-review_count")[:6]
     latest_reviews = (
@@ -98,14 +106,28 @@ def home(request):
         "featured_categories": featured_categories,
         "canonical_url": request.build_absolute_uri(),
     }
+    return render(request, "pages/home.html", ctx)
+
+
+def home(request):
+    if request.method == "GET" and not request.user.is_authenticated:
+        from django.utils.translation import get_language
+        content = get_or_compute(
+            f"home_page:{get_language()}",
+            lambda: _render_home(request).content,
+            60 * 5,
+            tags=[COMPANY_LIST_TAG, CATEGORIES_TAG],
+        )
+        response = HttpResponse(content)
+        response["Vary"] = "Accept-Language"
+        return response
+
     if request.user.is_authenticated and not request.session.get("_redirected_once"):
         request.session["_next_after_login"] = request.session.get("_next_after_login", "/profile/")
         request.session["_redirected_once"] = True
 
-    response = render(request, "pages/home.html", ctx)
+    response = _render_home(request)
     response["Vary"] = "Accept-Language"
-    if _is_anon_get and _home_cache_key:
-        cache.set(_home_cache_key, response.content, 60 * 5)
     return response
 
 
@@ -127,50 +149,17 @@ def business_dashboard(request):
         total_likes=Sum("like_count"),
         total_views=Sum("view_count"),
     )
-    contact_clicks = ActivityLog.objects.filter(
-        company__in=companies, action="contact_revealed"
-    ).count()
-    stats["total_clicks"] = contact_clicks
-
-    from django.db.models.functions import TruncDay
-
-    days_30_ago = now() - timedelta(days=29)
-    daily_reviews = (
-        Review.objects.filter(company__in=companies, created_at__gte=days_30_ago)
-        .annotate(day=TruncDay("created_at"))
-        .values("day")
-        .annotate(count=Count("id"))
-        .order_by("day")
-    )
-    daily_clicks = (
-        ActivityLog.objects.filter(
-            company__in=companies, action="contact_revealed", created_at__gte=days_30_ago
-        )
-        .annotate(day=TruncDay("created_at"))
-        .values("day")
-        .annotate(count=Count("id"))
-        .order_by("day")
-    )
-
-    chart_data = {}
-    for i in range(30):
-        d = (now() - timedelta(days=i)).date()
-        chart_data[d] = {"reviews": 0, "clicks": 0}
-    for entry in daily_reviews:
-        if entry["day"]:
-            d = entry["day"].date()
-            if d in chart_data:
-                chart_data[d]["reviews"] = entry["count"]
-    for entry in daily_clicks:
-        if entry["day"]:
-            d = entry["day"].date()
-            if d in chart_data:
-                chart_data[d]["clicks"] = entry["count"]
-
-    sorted_dates = sorted(chart_data.keys())
-    chart_labels = [d.strftime("%d.%m") for d in sorted_dates]
-    chart_reviews = [chart_data[d]["reviews"] for d in sorted_dates]
-    chart_clicks = [chart_data[d]["clicks"] for d in sorted_dates]
+    company_ids = list(companies.values_list("pk", flat=True))
+    # Include views still sitting in the buffer so totals stay current
+    pending_views = pending_view_counts(company_ids)
+    if pending_views:
+        stats["total_views"] = (stats["total_views"] or 0) + sum(pending_views.values())
+    stats["total_clicks"] = company_totals(company_ids)["contact_reveals"]
+
+    series = daily_series(company_ids, 30)
+    chart_labels = [d.strftime("%d.%m") for d in series["dates"]]
+    chart_reviews = series["reviews"]
+    chart_clicks = series["contact_reveals"]
 
     return render(
         request,
@@ -203,7 +192,7 @@ def manager_company_edit(request, pk: int):
         if form.is_valid():
             obj = form.save()
             changed = {k: form.cleaned_data.get(k) for k in form.changed_data}
-            ActivityLog.objects.create(
+            log_activity(
                 actor=request.user,
                 action="company_edit",
                 company=obj,
@@ -235,7 +224,7 @@ def manager_request_approval(request, pk: int):
         if form.is_valid():
             review.approval_requested = True
             review.save(update_fields=["approval_requested"])
-            ActivityLog.objects.create(
+            log_activity(
                 actor=request.user,
                 action="approval_requested",
                 company=review.company,
@@ -263,73 +252,80 @@ def manager_request_approval(request, pk: int):
 
 @ratelimit(key="ip", rate="30/m", method="GET")
 def search_suggestions_api(request):
-    """API endpoint for live search suggestions."""
+    """API endpoint for live search suggestions (served from the in-process index)."""
     query = request.GET.get("q", "").strip()
     if len(query) < 2:
         return JsonResponse({"results": []})
 
     from django.utils.translation import get_language
-    cache_key = f"api:search_suggestions:{get_language()}:{query.lower()}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return JsonResponse({"results": cached})
-
-    companies = (
-        public_companies_queryset()
-        .filter(Q(name__icontains=query) | Q(description__icontains=query))
-        .select_related("category_fk")
-        .only(
-            "id", "name", "category_fk", "logo", "logo_url",
-            "logo_scale", "image", "image_url", "library_image_path",
-        )
-        .order_by("-rating")[:8]
-    )
-
+    lang = "ru" if (get_language() or "").startswith("ru") else "uz"
     results = [
         {
             "type": "company",
-            "id": c.id,
-            "name": c.name,
-            "category": c.category_fk.display_name if c.category_fk else "",
-            "logo": c.display_logo,
-            "image": c.display_image_url,
-            "logo_scale": c.logo_scale,
-            "url": reverse("company_detail", kwargs={"slug": c.slug}),
+            "id": entry["id"],
+            "name": entry["names"][lang],
+            "category": autocomplete_index.category_name(entry["category_id"], lang),
+            "logo": entry["logo"],
+            "image": entry["image"],
+            "logo_scale": entry["logo_scale"],
+            "url": reverse("company_detail", kwargs={"slug": entry["slug"]}),
         }
-        for c in companies
+        for entry in autocomplete_index.search(query)
     ]
-    cache.set(cache_key, results, 60 * 5)
     return JsonResponse({"results": results})
 
 
-def business_list(request, category_slug=None):
-    """View that lists all businesses as clickable cards with enhanced search."""
-    companies = (
-        public_companies_queryset()
-        .select_related("category_fk")
-        .only(
-            "id", "name", "city", "created_at", "description", "description_ru",
-            "image", "image_800", "image_url", "library_image_path",
-            "logo", "logo_url", "logo_url_backup", "logo_scale",
-            "is_verified", "rating", "review_count",
-            "category_fk", "category_fk__id", "category_fk__name",
-            "category_fk__name_ru", "category_fk__slug",
-        )
-    )
+def _business_list_cache_tags(category_filter, cat_vals, city):
+    """Narrowest set of tags a cached business_list page depends on.
 
-    is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
-    is_get = request.method.upper() == "GET"
-    query = request.GET.get("q", "").strip()
-    use_cache = is_get and (not request.user.is_authenticated) and (not is_ajax) and (not query)
-    cache_key = None
-    if use_cache:
-        from django.utils.translation import get_language
-        cache_key = f"business_list:{get_language()}:{request.get_full_path()}"
-        cached_html = cache.get(cache_key)
-        if cached_html:
-            return HttpResponse(cached_html)
-
-    city = request.GET.get("city", "").strip()
+    Category-filtered pages only depend on their categories, city pages on
+    their city; everything else depends on the whole company listing.
+    """
+    slugs = [v for v in cat_vals if not v.isdigit()]
+    if category_filter:
+        slugs.append(category_filter)
+    category_ids = {int(v) for v in cat_vals if v.isdigit()}
+    if slugs:
+        slug_map = {c.slug: c.pk for c in get_cached_categories()}
+        category_ids.update(slug_map[s] for s in slugs if s in slug_map)
+
+    if slugs or category_ids:
+        tags = [category_tag(pk) for pk in category_ids]
+    elif city:
+        tags = [city_tag(city)]
+    else:
+        tags = [COMPANY_LIST_TAG]
+    # Sidebar filters (category counts, city list) are part of the page
+    return tags + [CATEGORIES_TAG, COMPANY_DIRECTORY_TAG]
+
+
+# Offset ordering per sort option ("default" = unfiltered listing)
+BUSINESS_LIST_ORDERINGS = {
+    "top": ("-rating", "-review_count", "name"),
+    "new": ("-created_at",),
+    "most_reviews": ("-review_count",),
+    "az": ("name",),
+    "default": ("-review_count", "-rating", "name"),
+}
+# Same sorts as total keys for cursor mode (id breaks ties)
+BUSINESS_LIST_KEYSETS = {
+    "top": ("-rating", "-review_count", "-id"),
+    "new": ("-created_at", "-id"),
+    "most_reviews": ("-review_count", "-id"),
+    "az": ("name", "id"),
+    "default": ("-review_count", "-rating", "-id"),
+}
+
+
+def _canonical_without_cursor(request) -> str:
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    query = params.urlencode()
+    return request.build_absolute_uri(request.path + (f"?{query}" if query else ""))
+
+
+def _business_list_params(request, category_slug=None) -> dict:
+    """Parse the business_list filter/sort parameters from the query string."""
     categories_multi = request.GET.getlist("categories")
     if categories_multi:
         cat_vals = []
@@ -338,57 +334,48 @@ def business_list(request, category_slug=None):
     else:
         categories_param = request.GET.get("categories", "").strip()
         cat_vals = [v.strip() for v in categories_param.split(",") if v.strip()]
-    min_rating = request.GET.get("min_rating")
-    verified = request.GET.get("verified")
-    sort = request.GET.get("sort", "top")
 
     if category_slug:
         category_filter = category_slug
     else:
         category_filter = request.GET.get("category", "").strip()
 
+    return {
+        "query": request.GET.get("q", "").strip(),
+        "city": request.GET.get("city", "").strip(),
+        "cat_vals": cat_vals,
+        "min_rating": request.GET.get("min_rating"),
+        "verified": request.GET.get("verified"),
+        "sort": request.GET.get("sort", "top"),
+        "category_filter": category_filter,
+    }
+
+
+def _business_list_context(request, params: dict) -> dict:
+    companies = (
+        public_companies_queryset()
+        .select_related("category_fk")
+        .only(
+            "id", "name", "city", "created_at", "description", "description_ru",
+            "image", "image_800", "image_url", "library_image_path",
+            "logo", "logo_url", "logo_url_backup", "logo_scale",
+            "is_verified", "rating", "review_count",
+            "category_fk", "category_fk__id", "category_fk__name",
+            "category_fk__name_ru", "category_fk__slug",
+        )
+    )
+
+    query = params["query"]
+    city = params["city"]
+    cat_vals = params["cat_vals"]
+    min_rating = params["min_rating"]
+    verified = params["verified"]
+    sort = params["sort"]
+    category_filter = params["category_filter"]
+
     if query:
-        from django.db import connection
-        if connection.vendor == "postgresql":
-            search_vector = (
-                SearchVector("name", weight="A")
-                + SearchVector("description", weight="B")
-                + SearchVector("city", weight="C")
-            )
-            search_query = SearchQuery(query, search_type="websearch")
-            companies = (
-                companies.annotate(search=search_vector, rank=SearchRank(search_vector, search_query))
-                .filter(
-                    Q(search=search_query)
-                    | Q(name__icontains=query)
-                    | Q(city__icontains=query)
-                    | Q(category_fk__name__icontains=query)
-                    | Q(category_fk__name_ru__icontains=query)
-                )
-                .order_by("-rank", "-review_count", "-rating")
-            )
-            if not companies.exists():
-                companies = (
-                    public_companies_queryset()
-                    .select_related("category_fk")
-                    .only(
-                        "id", "name", "city", "created_at", "description", "description_ru",
-                        "image", "image_800", "image_url", "library_image_path",
-                        "logo", "logo_url", "logo_url_backup", "logo_scale",
-                        "is_verified", "rating", "review_count", "category_fk",
-                    )
-                    .annotate(similarity=TrigramSimilarity("name", query))
-                    .filter(similarity__gt=0.3)
-                    .order_by("-similarity")
-                )
-        else:
-            companies = companies.filter(
-                Q(name__icontains=query)
-                | Q(city__icontains=query)
-                | Q(category_fk__name__icontains=query)
-                | Q(category_fk__name_ru__icontains=query)
-                | Q(description__icontains=query)
-            ).order_by("-review_count", "-rating", "name")
+        # One indexed lookup on the materialized search_document
+        companies = search_companies(companies, query)
 
     category_display_name = category_filter
     if category_filter:
@@ -429,17 +416,6 @@ def business_list(request, category_slug=None):
         except Exception:
             pass
 
-    if sort == "top":
-        companies = companies.order_by("-rating", "-review_count", "name")
-    elif sort == "new":
-        companies = companies.order_by("-created_at")
-    elif sort == "most_reviews":
-        companies = companies.order_by("-review_count")
-    elif sort == "az":
-        companies = companies.order_by("name")
-    else:
-        companies = companies.order_by("-rating", "-review_count", "name")
-
     if (
         not query
         and not cat_vals
@@ -447,7 +423,10 @@ def business_list(request, category_slug=None):
         and not min_rating
         and (verified is None or verified == "")
     ):
-        companies = companies.order_by("-review_count", "-rating", "name")
+        sort_key = "default"
+    else:
+        sort_key = sort if sort in BUSINESS_LIST_ORDERINGS else "top"
+    companies = companies.order_by(*BUSINESS_LIST_ORDERINGS[sort_key])
 
     search_suggestions = []
     search_context = query or category_display_name
@@ -457,18 +436,36 @@ def business_list(request, category_slug=None):
         else ""
     )
 
-    total_count = companies.count()
+    total_count = approximate_count(
+        companies, _business_list_cache_tags(category_filter, cat_vals, city)
+    )
     page_limit = get_safe_limit_param(request, "limit", 20, 50)
-    paginator = Paginator(companies, page_limit)
-    page_number = request.GET.get("page", 1)
-    logger.debug("business_list requested page: %s; total_companies=%s", page_number, total_count)
+    cursor_mode = "cursor" in request.GET
+    if cursor_mode:
+        # Opt-in keyset mode: constant cost per page however deep
+        page_obj = keyset_paginate(
+            companies, BUSINESS_LIST_KEYSETS[sort_key], page_limit, request.GET.get("cursor")
+        )
+    else:
+        # Offset pages stay the default for crawlable HTML
+        paginator = Paginator(companies, page_limit)
+        paginator.count = total_count
+        page_number = request.GET.get("page", 1)
+        logger.debug("business_list requested page: %s; total_companies=%s", page_number, total_count)
 
-    try:
-        page_obj = paginator.page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+        try:
+            page_obj = paginator.page(page_number)
+        except PageNotAnInteger:
+            page_obj = paginator.page(1)
+        except EmptyPage:
+            page_obj = paginator.page(max(1, paginator.num_pages))
+
+    # Cards are fragment-cached per company (business_list.html), so signed-in
+    # users reuse them too; the tag version re-renders a card when it changes
+    versions = company_fragment_versions(c.pk for c in page_obj)
+    for index, company in enumerate(page_obj):
+        company.fragment_version = versions[company.pk]
+        company.eager_logo = index < 6
 
     if (query or category_filter) and total_count == 0:
         popular_categories = (
@@ -487,10 +484,9 @@ def business_list(request, category_slug=None):
 
     from django.utils.translation import get_language
     current_lang = get_language() or "uz"
-    filter_cache_key = f"business_list:filters:{current_lang}"
-    filter_data = cache.get(filter_cache_key)
-    if filter_data is None:
-        filter_data = {
+    filter_data = get_or_compute(
+        f"business_list:filters:{current_lang}",
+        lambda: {
             "all_categories": list(
                 visible_business_categories(BusinessCategory.objects.all())
                 .annotate(company_count=Count("companies", filter=Q(companies__is_active=True)))
@@ -502,8 +498,10 @@ def business_list(request, category_slug=None):
                 .distinct()
                 .order_by("city")
             ),
-        }
-        cache.set(filter_cache_key, filter_data, 60 * 10)
+        },
+        60 * 10,
+        tags=[CATEGORIES_TAG, COMPANY_DIRECTORY_TAG],
+    )
 
     ctx = {
         "companies": page_obj,
@@ -513,7 +511,8 @@ def business_list(request, category_slug=None):
         "category_filter": category_display_name,
         "search_display": search_display,
         "search_suggestions": search_suggestions,
-        "canonical_url": request.build_absolute_uri(),
+        "canonical_url": _canonical_without_cursor(request),
+        "cursor_mode": cursor_mode,
         "all_categories": filter_data["all_categories"],
         "all_cities": filter_data["all_cities"],
         "selected_filters": {
@@ -526,15 +525,43 @@ def business_list(request, category_slug=None):
         },
     }
 
-    if use_cache and cache_key:
+    return ctx
+
+
+def _business_list_http_tags(request, category_slug=None):
+    params = _business_list_params(request, category_slug)
+    return _business_list_cache_tags(params["category_filter"], params["cat_vals"], params["city"])
+
+
+@public_cache(_business_list_http_tags)
+def business_list(request, category_slug=None):
+    """View that lists all businesses as clickable cards with enhanced search."""
+    params = _business_list_params(request, category_slug)
+
+    is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    is_get = request.method.upper() == "GET"
+    use_cache = is_get and (not request.user.is_authenticated) and (not is_ajax) and (not params["query"])
+    if use_cache:
         from django.template.loader import render_to_string
-        rendered = render_to_string("pages/business_list.html", ctx, request=request)
-        cache.set(cache_key, rendered, 60 * 5)
+        from django.utils.translation import get_language
+        rendered = get_or_compute(
+            f"business_list:{get_language()}:{request.get_full_path()}",
+            lambda: render_to_string(
+                "pages/business_list.html",
+                _business_list_context(request, params),
+                request=request,
+            ),
+            60 * 5,
+            tags=_business_list_cache_tags(
+                params["category_filter"], params["cat_vals"], params["city"]
+            ),
+        )
         return HttpResponse(rendered)
 
-    return render(request, "pages/business_list.html", ctx)
+    return render(request, "pages/business_list.html", _business_list_context(request, params))
 
 
+@public_cache(lambda request: [CATEGORIES_TAG, COMPANY_LIST_TAG])
 def category_browse(request):
     categories = (
         visible_business_categories(BusinessCategory.objects.all())
@@ -590,7 +617,7 @@ def claim_company(request, pk: int):
                 request_ip=(ip.split(",")[0].strip() if ip else None),
                 user_agent=ua,
             )
-            ActivityLog.objects.create(
+            log_activity(
                 actor=request.user,
                 action="company_claim_requested",
                 company=company,
@@ -650,7 +677,7 @@ def verify_claim(request, token: str):
     claim.status = "verified"
     claim.verified_at = now()
     claim.save(update_fields=["status", "verified_at"])
-    ActivityLog.objects.create(
+    log_activity(
         actor=claim.claimant,
         action="company_claim_verified",
         company=company,
@@ -710,7 +737,7 @@ def submit_ownership_claim(request, pk: int):
         request_ip=(ip.split(",")[0].strip() if ip else None),
     )
 
-    ActivityLog.objects.create(
+    log_activity(
         actor=request.user if request.user.is_authenticated else None,
         action="ownership_claim_submitted",
         company=company,
@@ -754,7 +781,7 @@ def admin_approve_claim(request, claim_id: int):
         company.manager = claim.user
     company.save(update_fields=["is_claimed", "is_verified", "owner", "manager"])
 
-    ActivityLog.objects.create(
+    log_activity(
         actor=request.user,
         action="ownership_claim_approved",
         company=company,
@@ -816,7 +843,7 @@ def admin_reject_claim(request, claim_id: int):
     claim.reviewed_by = request.user
     claim.save(update_fields=["status", "rejection_reason", "reviewed_at", "reviewed_by"])
 
-    ActivityLog.objects.create(
+    log_activity(
         actor=request.user,
         action="ownership_claim_rejected",
         company=claim.company,
@@ -982,6 +1009,45 @@ def telegram_claim_webhook(request):
     return JsonResponse({"ok": True})
 
 
+def _public_company_ref(request, slug):
+    """``(pk, category_id)`` of a publicly visible company, looked up once per request."""
+    if not hasattr(request, "_public_company_ref"):
+        company = (
+            Company.objects.select_related("category_fk")
+            .only("id", "is_active", "category_fk", "category_fk__is_active")
+            .filter(slug=slug)
+            .first()
+        )
+        request._public_company_ref = (
+            (company.pk, company.category_fk_id)
+            if company and is_company_publicly_visible(company)
+            else None
+        )
+    return request._public_company_ref
+
+
+def _company_detail_http_tags(request, slug):
+    ref = _public_company_ref(request, slug)
+    if ref is None:
+        return None
+    pk, category_id = ref
+    # Similar companies come from the same category
+    tags = [company_tag(pk), CATEGORIES_TAG]
+    if category_id:
+        tags.append(category_tag(category_id))
+    return tags
+
+
+def _count_not_modified_view(request, slug):
+    if not is_edge_refresh(request):
+        record_company_view(request, _public_company_ref(request, slug)[0])
+
+
+@public_cache(
+    _company_detail_http_tags,
+    s_maxage=COMPANY_DETAIL_S_MAXAGE,
+    on_not_modified=_count_not_modified_view,
+)
 def company_detail(request, slug: str):
     company = get_object_or_404(
         Company.objects.select_related("category_fk"),
@@ -993,73 +1059,27 @@ def company_detail(request, slug: str):
     ):
         raise Http404
 
-    session_key = f"viewed_company_{company.pk}"
-    if not request.session.get(session_key):
-        Company.objects.filter(pk=company.pk).update(view_count=F("view_count") + 1)
-        request.session[session_key] = True
+    # Buffered; flushed to Company.view_count in bulk (see view_counts).
+    # Edge cache refreshes after a save are not visits.
+    if not is_edge_refresh(request):
+        record_company_view(request, company.pk)
 
     company.assessment = compute_assessment(float(company.rating), int(company.review_count))
-    base_reviews_qs = company.reviews.filter(is_approved=True)
-    reviews_qs = base_reviews_qs
-
-    sort = request.GET.get("sort", "most_liked")
-    with_text = request.GET.get("with_text") in ("1", "true", "on")
-    with_response = request.GET.get("with_response") in ("1", "true", "on")
-    stars_list = request.GET.getlist("stars")
-    if len(stars_list) == 1 and "," in stars_list[0]:
-        stars_list = [s.strip() for s in stars_list[0].split(",") if s.strip()]
-    try:
-        stars_selected = sorted(
-            {int(s) for s in stars_list if str(s).isdigit() and 1 <= int(s) <= 5},
-            reverse=True,
-        )
-    except Exception:
-        stars_selected = []
-
-    if with_text:
-        reviews_qs = reviews_qs.filter(~Q(text=""))
-    if stars_selected:
-        reviews_qs = reviews_qs.filter(rating__in=stars_selected)
-    if with_response:
-        reviews_qs = reviews_qs.exclude(owner_response_text="")
-
-    if sort == "highest":
-        reviews_qs = reviews_qs.order_by("-rating", "-created_at")
-    elif sort == "lowest":
-        reviews_qs = reviews_qs.order_by("rating", "-created_at")
-    elif sort == "newest":
-        reviews_qs = reviews_qs.order_by("-created_at")
-    else:
-        reviews_qs = reviews_qs.order_by("-like_count", "-created_at")
-
-    dist_counts = {i: 0 for i in range(1, 6)}
-    agg = base_reviews_qs.values("rating").annotate(c=Count("id"))
-    for row in agg:
-        r = int(row["rating"])
-        if 1 <= r <= 5:
-            dist_counts[r] = int(row["c"])
-    total = sum(dist_counts.values()) or 1
-    dist = [
-        {"star": star, "count": dist_counts.get(star, 0), "percent": round((dist_counts.get(star, 0) / total) * 100)}
-        for star in range(5, 0, -1)
-    ]
-
-    reviews_qs = reviews_qs.select_related("user")
-    
-    if request.user.is_authenticated:
-        from ..models import ReviewLike
-        reviews_qs = reviews_qs.prefetch_related(
-            Prefetch(
-                "likes",
-                queryset=ReviewLike.objects.filter(user=request.user),
-                to_attr="user_likes"
-            )
-        )
-    else:
-        reviews_qs = reviews_qs.prefetch_related("likes")
-    
+    feed_params = parse_review_feed_params(request.GET)
+    sort = feed_params["sort"]
+    with_text = feed_params["with_text"]
+    with_response = feed_params["with_response"]
+    stars_selected = feed_params["stars"]
+
+    # Histogram is maintained on the company row by review signals
+    dist = company.rating_distribution
+
+    # Numbered pages stay crawlable; infinite scroll continues from the
+    # last review on this page through company_reviews_feed (keyset)
+    reviews_qs = review_feed_queryset(company, feed_params, request.user)
     review_limit = get_safe_limit_param(request, "limit", 10, 50)
     paginator = Paginator(reviews_qs, review_limit)
+    paginator.count = review_feed_count(company, feed_params, reviews_qs)
     page_obj = paginator.get_page(get_safe_pagination_param(request))
 
     qd = request.GET.copy()
@@ -1076,10 +1096,17 @@ def company_detail(request, slug: str):
         qs_no_stars = qs_no_stars + "&"
 
     reviews = page_obj
-
-    if request.user.is_authenticated:
-        for r in reviews:
-            r.is_liked_by_user = bool(getattr(r, 'user_likes', []))
+    mark_liked(reviews, request.user)
+    feed_cursor = (
+        cursor_after(page_obj.object_list[len(page_obj.object_list) - 1], sort)
+        if page_obj.has_next() else ""
+    )
+    feed_qd = request.GET.copy()
+    for k in ["page", "limit", "cursor"]:
+        feed_qd.pop(k, None)
+    feed_url = reverse("company_reviews_feed", kwargs={"slug": company.slug})
+    if feed_qd:
+        feed_url = f"{feed_url}?{feed_qd.urlencode()}"
 
     current = page_obj.number
     total_pages = paginator.num_pages
@@ -1149,10 +1176,57 @@ def company_detail(request, slug: str):
             "canonical_url": request.build_absolute_uri(company.get_absolute_url()),
             "pending_ownership_claim": pending_ownership_claim,
             "user_has_pending_claim": user_has_pending_claim,
+            "review_feed_url": feed_url,
+            "review_feed_cursor": feed_cursor,
         },
     )
 
 
+@ratelimit(key="ip", rate="60/m", method="GET")
+def company_reviews_feed(request, slug: str):
+    """JSON infinite-scroll feed of a company's approved reviews (keyset cursors)."""
+    company = get_object_or_404(
+        Company.objects.select_related("category_fk"),
+        slug=slug,
+    )
+    if not is_company_publicly_visible(company) and not (
+        request.user.is_superuser
+        or (request.user.is_authenticated and company.manager == request.user)
+    ):
+        raise Http404
+
+    params = parse_review_feed_params(request.GET)
+    limit = get_safe_limit_param(request, "limit", 10, 50)
+    page = review_feed_page(company, params, limit, request.GET.get("cursor"), request.user)
+
+    from django.template.loader import render_to_string
+    html = "".join(
+        render_to_string(
+            "pages/company_review_card.html",
+            {"r": review, "company": company},
+            request=request,
+        )
+        for review in page
+    )
+    return JsonResponse({
+        "html": html,
+        "reviews": [
+            {
+                "id": r.pk,
+                "rating": r.rating,
+                "text": r.text,
+                "user_name": r.user_name,
+                "like_count": r.like_count,
+                "created_at": r.created_at.isoformat(),
+                "owner_response_text": r.owner_response_text,
+            }
+            for r in page
+        ],
+        "next_cursor": page.next_cursor,
+        "has_next": page.has_next(),
+    })
+
+
 @login_required
 @ratelimit(key="user", rate="10/m", method="POST")
 def reveal_contact(request, pk: int, kind: str):
@@ -1172,7 +1246,7 @@ def reveal_contact(request, pk: int, kind: str):
     value = company.phone_public if kind == "phone" else company.email_public
     if not value:
         return JsonResponse({"ok": False, "error": "not_set"}, status=404)
-    ActivityLog.objects.create(
+    log_activity(
         actor=request.user, action="contact_revealed", company=company,
         details=f"{kind} revealed",
     )
@@ -1206,16 +1280,18 @@ def like_company(request, pk: int):
     if created:
         liked = True
         Company.objects.filter(pk=pk).update(like_count=F("like_count") + 1)
-        ActivityLog.objects.create(
+        log_activity(
             actor=request.user, action="company_liked", company=company, details="liked"
         )
     else:
         obj.delete()
         Company.objects.filter(pk=pk, like_count__gt=0).update(like_count=F("like_count") - 1)
-        ActivityLog.objects.create(
+        log_activity(
             actor=request.user, action="company_liked", company=company, details="unliked"
         )
 
+    # The count is on the HTTP-cached company page
+    invalidate_tags(company_tag(pk))
     current = Company.objects.filter(pk=pk).values_list("like_count", flat=True).first()
     return JsonResponse({"ok": True, "like_count": int(current or 0), "liked": liked})
 
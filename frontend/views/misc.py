@@ -8,6 +8,7 @@ from django.core.cache import cache
 from django.core.mail import EmailMessage
 from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
+from django.middleware.csrf import get_token
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.cache import cache_control
 
@@ -192,6 +193,11 @@ def service_worker(request):
     return HttpResponse(status=404)
 
 
+def csrf_token_api(request):
+    """CSRF token for forms on HTTP-cached public pages, which are served without one."""
+    return JsonResponse({"token": get_token(request)})
+
+
 def health_check(request):
     """Health check endpoint for monitoring."""
     import time
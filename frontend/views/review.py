@@ -5,7 +5,7 @@ import logging
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
-from django.db.models import Avg, Count, F, Q
+from django.db.models import F, Q
 from django.http import Http404, JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.utils import timezone
@@ -14,8 +14,10 @@ from django.utils.translation import gettext as _
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django_ratelimit.decorators import ratelimit
 
+from ..activity_log import log_activity
+from ..cache_utils import company_tag, invalidate_tags
 from ..forms import OwnerResponseForm, ReportReviewForm, ReviewEditForm, ReviewForm
-from ..models import ActivityLog, Company, Review
+from ..models import Company, Review
 from ..utils import send_telegram_message
 from ..visibility import is_company_publicly_visible, public_companies_queryset
 
@@ -88,13 +90,8 @@ def review_submission(request):
             review.approval_requested = True
             review.save()
 
+            # New reviews start unapproved, so company aggregates are unchanged
             company = review.company
-            agg = company.reviews.filter(is_approved=True).aggregate(avg=Avg("rating"), cnt=Count("id"))
-            company.review_count = int(agg.get("cnt") or 0)
-            company.rating = (
-                round(float(agg.get("avg") or 0.0), 2) if company.review_count else 0
-            )
-            company.save(update_fields=["review_count", "rating"])
 
             try:
                 from ..email_notifications import EmailNotificationService
@@ -134,8 +131,8 @@ def manager_review_response(request, pk: int):
         if form.is_valid():
             review = form.save(commit=False)
             review.owner_response_at = timezone.now()
-            review.save(update_fields=["owner_response_text", "owner_response_at"])
-            ActivityLog.objects.create(
+            review.save(update_fields=["owner_response_text", "owner_response_at", "updated_at"])
+            log_activity(
                 actor=request.user,
                 action="owner_responded",
                 company=review.company,
@@ -243,6 +240,8 @@ def like_review(request, pk: int):
         obj.delete()
         Review.objects.filter(pk=pk, like_count__gt=0).update(like_count=F("like_count") - 1)
 
+    # The count is on the HTTP-cached company page
+    invalidate_tags(company_tag(review.company_id))
     current = Review.objects.filter(pk=pk).values_list("like_count", flat=True).first()
     return JsonResponse({"ok": True, "like_count": int(current or 0), "liked": liked})
 
@@ -14,6 +14,7 @@ A BusinessCategory is publicly visible when:
 from django.core.cache import cache
 from django.db.models import QuerySet
 
+from .cache_utils import CATEGORIES_TAG, invalidate_tags, tagged_cache_key
 from .models import BusinessCategory, Company
 
 
@@ -23,18 +24,19 @@ CATEGORIES_CACHE_TTL = 60 * 15  # 15 minutes
 
 def get_cached_categories() -> QuerySet[BusinessCategory]:
     """Get visible business categories with caching."""
-    cached = cache.get(CATEGORIES_CACHE_KEY)
+    cache_key = tagged_cache_key(CATEGORIES_CACHE_KEY, [CATEGORIES_TAG])
+    cached = cache.get(cache_key)
     if cached is not None:
         return cached
     
     categories = visible_business_categories(BusinessCategory.objects.all())
-    cache.set(CATEGORIES_CACHE_KEY, categories, CATEGORIES_CACHE_TTL)
+    cache.set(cache_key, categories, CATEGORIES_CACHE_TTL)
     return categories
 
 
 def invalidate_categories_cache() -> None:
     """Call this when categories are modified."""
-    cache.delete(CATEGORIES_CACHE_KEY)
+    invalidate_tags(CATEGORIES_TAG)
 
 
 # ---------------------------------------------------------------------------
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
 
 application = get_asgi_application()
+
+# Views buffered in this worker (no Redis) are written when it exits
+from frontend.view_counts import register_exit_flush  # noqa: E402
+
+register_exit_flush()
@@ -210,6 +210,28 @@ else:
         }
     }
 
+# Part of every HTTP ETag (frontend.http_cache): set it per release (e.g. the
+# git SHA) so template changes are not answered with 304 Not Modified
+HTTP_CACHE_VERSION = os.environ.get("HTTP_CACHE_VERSION", "")
+
+# nginx micro-cache purge listener (frontend.edge_cache), e.g.
+# http://nginx:8081 in docker-compose; empty disables purging. Each path is
+# refreshed once per host, since the host is part of the cache key.
+EDGE_CACHE_PURGE_URL = os.environ.get("EDGE_CACHE_PURGE_URL", "")
+EDGE_CACHE_HOSTS = [
+    h.strip()
+    for h in os.environ.get("EDGE_CACHE_HOSTS", "fikrly.uz,www.fikrly.uz").split(",")
+    if h.strip()
+]
+
+# ActivityLog retention (frontend.activity_log): months kept in the database
+# besides the current one; older months are moved to gzip files here by
+# `manage.py archive_activity_log`
+ACTIVITY_LOG_RETENTION_MONTHS = int(os.environ.get("ACTIVITY_LOG_RETENTION_MONTHS", "12"))
+ACTIVITY_LOG_ARCHIVE_DIR = Path(
+    os.environ.get("ACTIVITY_LOG_ARCHIVE_DIR", BASE_DIR / "archive" / "activity_log")
+)
+
 # ... existing code ...
 
 DB_ENGINE = os.environ.get("DB_ENGINE", "django.db.backends.postgresql")
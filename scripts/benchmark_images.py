@@ -0,0 +1,134 @@
+"""
+Benchmark upload image processing: time and peak RSS per upload.
+
+Compares the previous approach (full-resolution decode, then one copy and
+resize of the full image per variant size) with ``render_variants`` (one
+reduced-size JPEG decode and a resize ladder). Each run happens in a fresh
+process; peak RSS is how far the resident set grows above its starting
+point during the upload (imports and reading the file excluded).
+
+Usage:
+    python scripts/benchmark_images.py [--megapixels 12 24] [--runs 3]
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WIDTHS = (400, 800, 1200)
+
+
+def make_photo(megapixels):
+    """A noisy JPEG (compresses like a photo, unlike a flat colour)."""
+    from PIL import Image
+
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    noise = Image.effect_noise((width // 8, height // 8), 64).resize((width, height))
+    img = Image.merge("RGB", (noise, noise.rotate(180), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def legacy(data):
+    """The pre-pipeline path: optimize on upload, then generate each WebP from a full copy."""
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    img.thumbnail((1200, 800), Image.Resampling.LANCZOS)
+    img.save(io.BytesIO(), format="JPEG", quality=85, optimize=True)
+
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    for size in WIDTHS:
+        copy = img.copy()
+        copy.thumbnail((size, int(size * 0.75)))
+        copy.save(io.BytesIO(), format="WEBP", quality=85)
+
+
+def current(data):
+    from frontend.image_optimization import render_variants
+
+    render_variants(data, WIDTHS, formats=("webp",))
+
+
+def _rss_kib(field):
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_peak_rss():
+    """Restart the VmHWM high-water mark at the current RSS (Linux >= 4.0)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _run(name, path, queue):
+    import frontend.image_optimization  # noqa: F401  (imports are not part of the upload)
+
+    fn = {"legacy": legacy, "current": current}[name]
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if _reset_peak_rss():
+        base = _rss_kib("VmRSS")
+        start = time.perf_counter()
+        fn(data)
+        elapsed = time.perf_counter() - start
+        peak = _rss_kib("VmHWM")
+    else:  # no /proc: the lifetime high-water mark is the best available
+        base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        fn(data)
+        elapsed = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (peak - base) / 1024))  # KiB on Linux
+
+
+def measure(name, path, runs):
+    ctx = multiprocessing.get_context("spawn")
+    times, rss = [], []
+    for _ in range(runs):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run, args=(name, path, queue))
+        proc.start()
+        elapsed, peak = queue.get()
+        proc.join()
+        times.append(elapsed)
+        rss.append(peak)
+    return statistics.median(times), max(rss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[12, 24])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'photo':>8} {'approach':>8} {'time (s)':>9} {'peak RSS (MiB)':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mp in args.megapixels:
+            path = os.path.join(tmp, f"{mp}.jpg")
+            with open(path, "wb") as fh:
+                fh.write(make_photo(mp))
+            for name in ("legacy", "current"):
+                elapsed, peak = measure(name, path, args.runs)
+                print(f"{mp:>6.0f}MP {name:>8} {elapsed:>9.2f} {peak:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()